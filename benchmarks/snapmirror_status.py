@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""Benchmark the conversion of snapmirror status records.
+
+Compares the table-driven :class:`~nidhogg.converter.Converter` with the former hand-written conversion on a
+synthetic reply of 50000 cluster-mode relationships::
+
+    python benchmarks/snapmirror_status.py [number of records]
+"""
+from __future__ import print_function, unicode_literals
+
+import os
+import sys
+import timeit
+
+# run from a checkout without installing nidhogg
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from nidhogg.clustermode import DESIRED_ATTRIBUTES, ClusterMode  # noqa: E402
+from nidhogg.compatible import SnapmirrorStatus  # noqa: E402
+
+
+def legacy_item_to_snapmirrorstatus(self, item):
+    """Conversion before the table-driven converter, ``item[k] if k in item else None`` per key."""
+    return self._data_class(SnapmirrorStatus)(
+        source_location=item["source-location"],
+        destination_location=item["destination-location"],
+        lag_time=item["lag-time"],
+        last_transfer_from=item["last-transfer-from"],
+        last_transfer_size=item["last-transfer-size"],
+        last_transfer_duration=item["last-transfer-duration"],
+        last_transfer_type=item['last-transfer-type'] if 'last-transfer-type' in item else None,
+        status=item["status"] if 'status' in item else None,
+        transfer_progress=item["transfer-progress"] if 'transfer-progress' in item else None,
+        mirror_timestamp=item["mirror-timestamp"] if 'mirror-timestamp' in item else None,
+        contents=item["contents"] if 'contents' in item else None,
+        state=item["state"] if 'state' in item else None,
+        base_snapshot=item['base-snapshot'] if 'base-snapshot' in item else None,
+        current_transfer_error=item['current-transfer-error'] if 'current-transfer-error' in item else None,
+        current_transfer_type=item['current-transfer-type'] if 'current-transfer-type' in item else None,
+        inodes_replicated=item['inodes-replicated'] if 'inodes-replicated' in item else None,
+        replication_ops=item['replication-ops'] if 'replication-ops' in item else None,
+        break_failed_count=item['break-failed-count'] if 'break-failed-count' in item else None,
+        break_successful_count=item['break-successful-count'] if 'break-successful-count' in item else None,
+        destination_volume=item['destination-volume'] if 'destination-volume' in item else None,
+        destination_volume_node=item['destination-volume-node'] if 'destination-volume-node' in item else None,
+        destination_vserver=item['destination-vserver'] if 'destination-vserver' in item else None,
+        destination_vserver_uuid=item['destination-vserver-uuid'] if 'destination-vserver-uuid' in item else None,
+        exported_snapshot=item['exported-snapshot'] if 'exported-snapshot' in item else None,
+        exported_snapshot_timestamp=item['exported-snapshot-timestamp'] if 'exported-snapshot-timestamp' in item else None,
+        is_constituent=item['is-constituent'] if 'is-constituent' in item else None,
+        is_healthy=item['is-healthy'] if 'is-healthy' in item else None,
+        last_transfer_end_timestamp=item['last-transfer-end-timestamp'] if 'last-transfer-end-timestamp' in item else None,
+        last_transfer_network_compression_ratio=item['last-transfer-network-compression-ratio'] if 'last-transfer-network-compression-ratio' in item else None,
+        max_transfer_rate=item['max-transfer-rate'] if 'max-transfer-rate' in item else None,
+        mirror_state=item['mirror-state'] if 'mirror-state' in item else None,
+        newest_snapshot=item['newest-snapshot'] if 'newest-snapshot' in item else None,
+        newest_snapshot_timestamp=item['newest-snapshot-timestamp'] if 'newest-snapshot-timestamp' in item else None,
+        opmask=item['opmask'] if 'opmask' in item else None,
+        policy=item['policy'] if 'policy' in item else None,
+        policy_type=item['policy-type'] if 'policy-type' in item else None,
+        relationship_control_plane=item['relationship-control-plane'] if 'relationship-control-plane' in item else None,
+        relationship_group_type=item['relationship-group-type'] if 'relationship-group-type' in item else None,
+        relationship_id=item['relationship-id'] if 'relationship-id' in item else None,
+        relationship_status=item['relationship-status'] if 'relationship-status' in item else None,
+        relationship_type=item['relationship-type'] if 'relationship-type' in item else None,
+        resync_failed_count=item['resync-failed-count'] if 'resync-failed-count' in item else None,
+        resync_successful_count=item['resync-successful-count'] if 'resync-successful-count' in item else None,
+        source_volume=item['source-volume'] if 'source-volume' in item else None,
+        source_vserver=item['source-vserver'] if 'source-vserver' in item else None,
+        source_vserver_uuid=item['source-vserver-uuid'] if 'source-vserver-uuid' in item else None,
+        total_transfer_bytes=item['total-transfer-bytes'] if 'total-transfer-bytes' in item else None,
+        total_transfer_time_secs=item['total-transfer-time-secs'] if 'total-transfer-time-secs' in item else None,
+        update_failed_count=item['update-failed-count'] if 'update-failed-count' in item else None,
+        update_successful_count=item['update-successful-count'] if 'update-successful-count' in item else None,
+        vserver=item['vserver'] if 'vserver' in item else None,
+        snapmirror_status=item['relationship-status'].lower() if self.clustered else item["status"].lower(),
+    )
+
+
+def synthetic_records(n):
+    """Records like a cluster-mode filer sends them for the desired attributes of ``snapmirror-get-iter``."""
+    keys = list(DESIRED_ATTRIBUTES["snapmirror_get_iter"]["snapmirror_info"])
+    records = []
+    for i in range(n):
+        record = dict((key.replace("_", "-"), "{0}-{1}".format(key, i)) for key in keys)
+        record["relationship-status"] = "idle"
+        records.append(record)
+    return records
+
+
+def main(n=50000):
+    records = synthetic_records(n)
+    candidates = []
+    for compact in (False, True):
+        filer = ClusterMode("https://filer99.example.com", "user", "password", 1, 21, False)
+        filer.clustered = True
+        filer.compact_records = compact
+        assert [filer._item_to_snapmirrorstatus(r) for r in records[:10]] == \
+            [legacy_item_to_snapmirrorstatus(filer, r) for r in records[:10]]
+        suffix = ", compact records" if compact else ""
+        candidates.extend([
+            ("legacy" + suffix, lambda filer=filer: [legacy_item_to_snapmirrorstatus(filer, r) for r in records]),
+            ("converter" + suffix, lambda filer=filer: [filer._item_to_snapmirrorstatus(r) for r in records]),
+        ])
+    for name, func in candidates:
+        best = min(timeit.repeat(func, number=1, repeat=5))
+        print("{0:>28}: {1:.3f}s for {2} records ({3:.1f}us per record)".format(name, best, n, best / n * 1e6))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -1,15 +1,27 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import logging
+
 from .sevenmode import SevenMode
 from .clustermode import ClusterMode
 from .core import NidhoggException
+from .cache import MODE_CACHE
+from .http import POOL_MAXSIZE, NidhoggHttp
+from .fleet import MAX_WORKERS, Fleet
+from .placement import BY_QUOTA, BY_SIZE, VolumeHeap
+
+
+logger = logging.getLogger(__name__)
 
 
-__all__ = ["get_netapp", "get_best_volume_by_size", "get_best_volume_by_quota"]
+__all__ = [
+    "get_netapp", "get_best_volume_by_size", "get_best_volume_by_quota", "get_best_volume_across", "Fleet",
+    "VolumeHeap"
+]
 
 
-def get_netapp(url, username, password, verify=False):
+def get_netapp(url, username, password, verify=False, pool_maxsize=POOL_MAXSIZE, mode_cache=MODE_CACHE):
     """Return the correct connection object to the filer.
 
     You do not have to care if the filer is a cluster-mode or a seven-mode filer.
@@ -26,6 +38,10 @@ def get_netapp(url, username, password, verify=False):
     :type password: str
     :param verify: check SSL certificate
     :type verify: bool
+    :param pool_maxsize: number of keep-alive connections to the filer
+    :type pool_maxsize: int
+    :param mode_cache: cache of the detected modes, None to detect the mode on every call
+    :type mode_cache: :class:`~nidhogg.cache.ModeCache`
     :return: Nidhogg instance
     :rtype: :class:`~nidhogg.sevenmode.SevenMode` (if the filer is a seven-mode filer)
     :rtype: :class:`~nidhogg.clustermode.ClusterMode` (if the filer is a cluster-mode filer)
@@ -37,13 +53,37 @@ def get_netapp(url, username, password, verify=False):
         import nidhogg
         filer = nidhogg.get_netapp("filer99.example.com", "<username>", "<password>")
         filer.list_volumes()
+
+    The connection to the filer is kept open between API calls. Close it if not needed anymore:
+
+    .. code-block:: python
+
+        with nidhogg.get_netapp("filer99.example.com", "<username>", "<password>") as filer:
+            filer.list_volumes()
+
+    The mode of the filer is detected by an API call and cached per url, see :class:`~nidhogg.cache.ModeCache`.
     """
     # prepend https if not specified
     if not url.startswith("https://"):
         url = "https://" + url
-    nidhogg = SevenMode(url, username, password, 1, 15, verify)
-    if nidhogg.clustered:
-        return ClusterMode(url, username, password, 1, 21, verify)
+    clustered = mode_cache.get(url) if mode_cache is not None else None
+    if clustered is None:
+        nidhogg = SevenMode(url, username, password, 1, 15, verify, pool_maxsize=pool_maxsize)
+        clustered = nidhogg.clustered
+        if mode_cache is not None:
+            mode_cache.set(url, clustered)
+        if not clustered:
+            return nidhogg
+        # reuse the connection of the probe
+        http = nidhogg.http
+    else:
+        http = NidhoggHttp
+    if clustered:
+        nidhogg = ClusterMode(url, username, password, 1, 21, verify, http=http, pool_maxsize=pool_maxsize)
+    else:
+        nidhogg = SevenMode(url, username, password, 1, 15, verify, http=http, pool_maxsize=pool_maxsize)
+    # cached property, do not detect it again
+    nidhogg.clustered = clustered
     return nidhogg
 
 
@@ -83,3 +123,55 @@ def get_best_volume_by_quota(volumes, filter_func=None, **kwargs):
         raise NidhoggException("No volume available.")
     # use min() to get the volume with the smallest ratio
     return min(volumes)
+
+
+def get_best_volume_across(filers, username=None, password=None, by=BY_QUOTA, filter_volume_names=[], max_workers=MAX_WORKERS):
+    """Return the candidate volumes of many filers ranked in a heap, the best volume first.
+
+    The volumes are requested from all filers concurrently. Filers that fail are logged and skipped.
+
+    :param filers: hostnames of the filers (see :class:`~nidhogg.fleet.Fleet`) or a fleet
+    :type filers: list of str or :class:`~nidhogg.fleet.Fleet`
+    :param username: username to connect to the Netapp API (unused if *filers* is a fleet)
+    :type username: str
+    :param password: password of the provided user (unused if *filers* is a fleet)
+    :type password: str
+    :param by: rank by quota ratio (:py:const:`~nidhogg.placement.BY_QUOTA`) or by free size
+        (:py:const:`~nidhogg.placement.BY_SIZE`)
+    :type by: str
+    :param filter_volume_names: consider only volumes that are in this list
+    :type filter_volume_names: list of str
+    :param max_workers: maximal number of filers requested concurrently (unused if *filers* is a fleet)
+    :type max_workers: int
+    :return: ranked volumes of all filers
+    :rtype: :class:`~nidhogg.placement.VolumeHeap`
+    :raises NidhoggException: if the ranking is unknown
+
+    Example:
+
+    .. code-block:: python
+
+        import nidhogg
+        volumes = nidhogg.get_best_volume_across(["filer01.example.com", "filer02.example.com"], "<username>", "<password>")
+        for share_name, size_in_mb in shares:
+            # check_volume(volume, size) is a filter function, see get_best_volume_by_quota
+            volume = volumes.allocate(size_in_mb * 1024 * 1024, check_volume, size=size_in_mb)
+    """
+    if by not in (BY_QUOTA, BY_SIZE):
+        raise NidhoggException("Ranking {0} not in {1}.".format(by, [BY_QUOTA, BY_SIZE]))
+    fleet = filers if isinstance(filers, Fleet) else Fleet(filers, username, password, max_workers=max_workers)
+    try:
+        if by == BY_QUOTA:
+            results = fleet.get_volumes_with_quota_info(filter_volume_names=filter_volume_names)
+        else:
+            results = fleet.call("get_volumes", filter_volume_names=filter_volume_names)
+    finally:
+        if fleet is not filers:
+            fleet.close()
+    volumes = []
+    for filer, result in results.items():
+        if result["error"]:
+            logger.warning("get_best_volume_across: skipped filer {0}: {1}".format(filer, result["error"]))
+            continue
+        volumes.extend(result["result"])
+    return VolumeHeap(volumes, by=by)
@@ -0,0 +1,890 @@
+# -*- coding: utf-8 -*-
+"""asyncio API of nidhogg (Python >= 3.6).
+
+The classes in this module provide the same methods as :class:`~nidhogg.sevenmode.SevenMode` and
+:class:`~nidhogg.clustermode.ClusterMode`, but every method that calls the filer is a coroutine
+(and every ``iter_*`` method an async generator). Converters and data objects are shared with the
+synchronous API.
+
+Example:
+
+.. code-block:: python
+
+    import asyncio
+    import nidhogg.aio
+
+    async def main():
+        async with await nidhogg.aio.get_netapp("filer99.example.com", "<username>", "<password>") as filer:
+            print(await filer.list_volumes())
+
+    asyncio.get_event_loop().run_until_complete(main())
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import functools
+import logging
+from timeit import default_timer
+
+import xmltodict
+
+import nidhogg.core     # this style needed for patching
+
+from .cache import MODE_CACHE
+from .clustermode import MAX_RECORDS, ClusterMode, QuotaResizeJob
+from .compatible import ProvisionResult, Volume, VolumeWithQuotaRatio
+from .core import ACL_SYNC_WORKERS, PROVISION_WORKERS, NidhoggException, QuotaResize
+from .http import FILER_URL, POOL_MAXSIZE
+from .sevenmode import SevenMode
+
+try:
+    import aiohttp
+except ImportError:     # pragma: no cover
+    aiohttp = None
+
+
+logger = logging.getLogger(__name__)
+
+
+__all__ = [
+    "get_netapp", "AsyncNidhoggHttp", "AsyncSevenMode", "AsyncClusterMode", "AsyncQuotaResize", "AsyncQuotaResizeJob"
+]
+
+
+async def get_netapp(url, username, password, verify=False, pool_maxsize=POOL_MAXSIZE, http=None,
+                     mode_cache=MODE_CACHE):
+    """Return the correct asynchronous connection object to the filer.
+
+    See :py:func:`nidhogg.get_netapp`.
+
+    :param url: hostname of the netapp filer
+    :type url: str
+    :param username: username to connect to the Netapp API.
+    :type username: str
+    :param password: password of the provided user
+    :type password: str
+    :param verify: check SSL certificate
+    :type verify: bool
+    :param pool_maxsize: number of concurrent connections to the filer
+    :type pool_maxsize: int
+    :param http: transport class, default is :class:`AsyncNidhoggHttp`
+    :type http: class
+    :param mode_cache: cache of the detected modes, None to detect the mode on every call
+    :type mode_cache: :class:`~nidhogg.cache.ModeCache`
+    :return: Nidhogg instance
+    :rtype: :class:`AsyncSevenMode` (if the filer is a seven-mode filer)
+    :rtype: :class:`AsyncClusterMode` (if the filer is a cluster-mode filer)
+    """
+    # prepend https if not specified
+    if not url.startswith("https://"):
+        url = "https://" + url
+    http = http or AsyncNidhoggHttp
+    clustered = mode_cache.get(url) if mode_cache is not None else None
+    if clustered is None:
+        nidhogg = AsyncSevenMode(url, username, password, 1, 15, verify, http=http, pool_maxsize=pool_maxsize)
+        clustered = nidhogg._clustered_reply((await nidhogg.system_get_version())['netapp']['results'])
+        if mode_cache is not None:
+            mode_cache.set(url, clustered)
+        if not clustered:
+            return nidhogg
+        # reuse the connection of the probe
+        http = nidhogg.http
+    if clustered:
+        return AsyncClusterMode(url, username, password, 1, 21, verify, http=http, pool_maxsize=pool_maxsize)
+    return AsyncSevenMode(url, username, password, 1, 15, verify, http=http, pool_maxsize=pool_maxsize)
+
+
+class AsyncNidhoggHttp(object):
+    """Requests the Netapp API asynchronously with :mod:`aiohttp` (optional dependency).
+
+    Other transports can be plugged in with the *http* param of the connection objects. They must
+    provide the coroutines :py:meth:`invoke_request` and :py:meth:`close` and the method
+    :py:meth:`parse_xml_reply`.
+    """
+
+    def __init__(self, url, username, password, verify=False, pool_maxsize=POOL_MAXSIZE):
+        """Init object."""
+        if aiohttp is None:     # pragma: no cover
+            raise NidhoggException("Package aiohttp is required for the asynchronous transport.")
+        self.url = url + FILER_URL
+        self.username = username
+        self.password = password
+        self.verify = verify
+        self.pool_maxsize = pool_maxsize
+        # created on first use, a session must be created inside the event loop
+        self.session = None
+
+    def _create_session(self):
+        connector = aiohttp.TCPConnector(limit_per_host=self.pool_maxsize, ssl=None if self.verify else False)
+        return aiohttp.ClientSession(
+            connector=connector,
+            auth=aiohttp.BasicAuth(self.username, self.password),
+            headers={'Content-Type': 'text/xml; charset="UTF-8"'},
+        )
+
+    def parse_xml_reply(self, xmlresponse):
+        """Convert XML reply into a dictionary.
+
+        :param xmlresponse: Response from Netapp API.
+        :type xmlresponse: str
+        :return: response
+        :rtype: dict
+        """
+        return xmltodict.parse(xmlresponse)
+
+    async def invoke_request(self, req):
+        """Request the Netapp API.
+
+        :param req: dictionary of request params
+        :type req: dict
+        :return: Netapp API response
+        :rtype: str
+        """
+        if self.session is None:
+            self.session = self._create_session()
+        async with self.session.post(self.url, data=req) as r:
+            return await r.text()
+
+    async def close(self):
+        """Close all connections to the filer."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class AsyncQuotaResize(QuotaResize):
+    """Handle of a quota resize, see :py:meth:`AsyncNidhogg.resize_quotas`.
+
+    Like :class:`~nidhogg.core.QuotaResize`, but :py:meth:`done` and :py:meth:`wait` are coroutines.
+    """
+
+    async def _poll(self):
+        return self._is_finished((await self.nidhogg.quota_status(volume=self.volume))["netapp"]["results"]["status"])
+
+    async def done(self):
+        """See :py:meth:`.QuotaResize.done`."""
+        if self.finished:
+            return True
+        return self._finish(await self._poll())
+
+    async def wait(self):
+        """See :py:meth:`.QuotaResize.wait`, other coroutines run while waiting."""
+        while not self.finished:
+            await asyncio.sleep(max(0, min(self.interval, self.deadline - default_timer())))
+            if await self.done():
+                return
+            self.interval = min(self.interval * 2, nidhogg.core.QUOTA_RESIZE_WAIT_TIME)
+
+
+class AsyncQuotaResizeJob(AsyncQuotaResize, QuotaResizeJob):
+    """Handle of a quota resize job, see :class:`~nidhogg.clustermode.QuotaResizeJob` and :class:`AsyncQuotaResize`."""
+
+    async def _poll(self):
+        items = [item async for item in self.nidhogg._get_iter(
+            "job_get_iter", "job-info", **self.nidhogg._jobs_opts([self.job_id]))]
+        if not items:
+            # finished jobs are removed after a while
+            return await super(AsyncQuotaResizeJob, self)._poll()
+        return self._update(items[0])
+
+
+async def _collect(records, name):
+    items = [record async for record in records]
+    if not items:
+        logger.warning("{0}: no entries found".format(name))
+    return items
+
+
+async def _error_of(call):
+    """Await the call, return the exception it raised or None."""
+    try:
+        await call()
+    except Exception as e:
+        return e
+    return None
+
+
+async def _gather(calls, max_workers):
+    """Await the calls, up to *max_workers* at the same time, return their results in the order of the calls."""
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    return await asyncio.gather(*[run(call) for call in calls])
+
+
+class AsyncNidhogg(object):
+    """Mixin making the API calls of :class:`~nidhogg.core.Nidhogg` awaitable.
+
+    The requests are built and the replies are converted by the methods of the synchronous API, i.e.
+    ``_*_opts`` and ``_*_reply``, only the I/O is done here. Methods not calling the filer are inherited
+    as they are, i.e. :py:meth:`~.Nidhogg.invalidate_cache` or :py:meth:`~.ClusterMode.add_desired_attributes`.
+
+    Subclasses:
+
+    * :class:`~nidhogg.aio.AsyncSevenMode`
+    * :class:`~nidhogg.aio.AsyncClusterMode`
+    """
+
+    def __getattr__(self, api):
+        """Try to invoke unimplemented API calls directly."""
+        async def _api_wrapper(**kwargs):
+            return await self._do(api, **kwargs)
+        return _api_wrapper
+
+    def __enter__(self):
+        """Not supported, use ``async with``."""
+        raise TypeError("Use async with instead.")
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Not supported, use ``async with``."""
+        pass    # pragma: no cover
+
+    async def __aenter__(self):
+        """Use the connection as asynchronous context manager, see :py:meth:`close`."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Close the connection when leaving the context."""
+        await self.close()
+
+    async def close(self):
+        """Close all HTTP connections to the filer."""
+        await self.http.close()
+
+    async def _do(self, api, **kwargs):
+        """Invoke wrapper, returns a xmldict."""
+        start = default_timer()
+        req = self._create_request(api, kwargs)
+        sent = default_timer()
+        status, received, r, records = "error", None, None, None
+        sampled = nidhogg.core._sample_wire()
+        try:
+            nidhogg.core.log_wire("request", req, sampled)
+            r = await self.http.invoke_request(req)
+            received = default_timer()
+            xmldict = self._parse_xml(r, sampled)
+            records = xmldict["netapp"]["results"].get("num-records")
+            status = "failed"
+            self._check_reply(api, kwargs, xmldict)
+            status = "passed"
+            return xmldict
+        finally:
+            self._emit(api, status, start, sent, received, req, r, records)
+
+    #
+    # PROPERTIES of the synchronous API
+    #
+    async def ontapi_version(self):
+        """ONTAPI version of the connected filer, see :py:attr:`.Nidhogg.ontapi_version`."""
+        return self._ontapi_version_reply((await self.system_get_ontapi_version())['netapp']['results'])
+
+    async def apis(self):
+        """List of API commands available with the current credentials, see :py:attr:`.Nidhogg.apis`."""
+        try:
+            return self._apis_reply((await self.system_api_list())["netapp"]["results"])
+        except NidhoggException:
+            return []
+
+    async def has_forcegroup(self):
+        """Check if this cifs share feature is available, see :py:attr:`.Nidhogg.has_forcegroup`."""
+        # sevenmode supports force group
+        if not self.clustered:
+            return True
+        if "_has_forcegroup" not in self.__dict__:
+            self.__dict__["_has_forcegroup"] = self._has_forcegroup_reply(
+                (await self.system_get_ontapi_version())['netapp']['results'])
+        return self.__dict__["_has_forcegroup"]
+
+    #
+    # COMMON API FUNCTIONS
+    #
+    async def list_snapable_volumes(self):
+        """See :py:meth:`.Nidhogg.list_snapable_volumes`."""
+        return [vol for vol in await self.list_volumes() if vol['state'] == 'online' and vol['snapable']]
+
+    async def delete_snapshot(self, volume, name):
+        """See :py:meth:`.Nidhogg.delete_snapshot`."""
+        return await self.snapshot_delete(volume=volume, snapshot=name)
+
+    async def create_qtree(self, volume, qtree, mode="007"):
+        """See :py:meth:`.Nidhogg.create_qtree`."""
+        await self.qtree_create(volume=volume, qtree=qtree, mode=mode)
+
+    async def delete_qtree(self, volume, qtree, force=False):
+        """See :py:meth:`.Nidhogg.delete_qtree`."""
+        await self.qtree_delete(**self._delete_qtree_opts(volume, qtree, force))
+
+    async def delete_cifs_share(self, share_name):
+        """See :py:meth:`.Nidhogg.delete_cifs_share`."""
+        await self.cifs_share_delete(share_name=share_name)
+
+    async def exists_qtree(self, volume, qtree):
+        """See :py:meth:`.Nidhogg.exists_qtree`."""
+        return (await self.get_qtree(volume, qtree)) is not None
+
+    async def get_allocated_quota_size(self, volume):
+        """See :py:meth:`.Nidhogg.get_allocated_quota_size`."""
+        return self._allocated_quota_size(await self.list_quotas(volume))
+
+    async def get_allocated_quota_ratio(self, volume, volume_size_total=None):
+        """See :py:meth:`.Nidhogg.get_allocated_quota_ratio`."""
+        if not volume_size_total:
+            volume_size_total = (await self.volume_info(volume))["size_total"]
+        return await self.get_allocated_quota_size(volume) / volume_size_total
+
+    async def get_allocated_quota_sizes(self):
+        """See :py:meth:`.Nidhogg.get_allocated_quota_sizes`, the result is not cached."""
+        sizes = dict()
+        async for item in self._get_quota_items():
+            self._add_allocated_quota(sizes, item)
+        return sizes
+
+    async def get_volumes_with_quota_info(self, filter_volume_names=[], single_quota_report=False):
+        """See :py:meth:`.Nidhogg.get_volumes_with_quota_info`.
+
+        Without *single_quota_report*, the quota reports of the volumes are requested concurrently.
+        """
+        volumes = self._filter_volumes(await self.list_snapable_volumes(), filter_volume_names)
+        if single_quota_report:
+            sizes = await self.get_allocated_quota_sizes()
+            quota_sizes = [sizes.get(v["name"], 0) for v in volumes]
+        else:
+            quota_sizes = await asyncio.gather(*[self.get_allocated_quota_size(v["name"]) for v in volumes])
+        return [
+            self._data_class(VolumeWithQuotaRatio)(
+                quota_size=quota_size,
+                quota_ratio=nidhogg.core._quota_ratio(quota_size, v["size_total"]),
+                **v
+            )
+            for v, quota_size in zip(volumes, quota_sizes)
+        ]
+
+    async def get_volumes(self, filter_volume_names=[]):
+        """See :py:meth:`.Nidhogg.get_volumes`."""
+        return [
+            self._data_class(Volume)(**v)
+            for v in self._filter_volumes(await self.list_snapable_volumes(), filter_volume_names)
+        ]
+
+    async def resize_quotas(self, volume, timeout=None, qtrees=None):
+        """See :py:meth:`.Nidhogg.resize_quotas`.
+
+        :return: handle to wait for the resize
+        :rtype: :class:`AsyncQuotaResize`
+        """
+        await self.quota_resize(volume=volume)
+        return AsyncQuotaResize(self, volume, timeout=timeout, qtrees=qtrees)
+
+    async def _poll_quota_resizes(self, resizes):
+        for resize in resizes:
+            await resize.done()
+
+    async def wait_for_quota_resizes(self, resizes):
+        """See :py:meth:`.Nidhogg.wait_for_quota_resizes`, other coroutines run while waiting."""
+        interval = nidhogg.core.QUOTA_RESIZE_POLL_INTERVAL
+        pending = [resize for resize in resizes if not resize.finished]
+        while pending:
+            deadline = min(resize.deadline for resize in pending)
+            await asyncio.sleep(max(0, min(interval, deadline - default_timer())))
+            await self._poll_quota_resizes(pending)
+            pending = [resize for resize in pending if not resize.finished]
+            interval = min(interval * 2, nidhogg.core.QUOTA_RESIZE_WAIT_TIME)
+
+    async def set_quota(self, volume, qtree, quota_in_mb=1024, wait_til_finished=True, timeout=None):
+        """See :py:meth:`.SevenMode.set_quota` and :py:meth:`.ClusterMode.set_quota`.
+
+        Other coroutines run while waiting, use :py:func:`asyncio.gather` to resize several volumes at the same time.
+        """
+        await self._set_quota_entry(volume, qtree, quota_in_mb)
+        resize = await self.resize_quotas(volume, timeout=timeout, qtrees=[qtree])
+        if wait_til_finished:
+            await resize.wait()
+        return resize
+
+    async def set_quotas(self, volume, quotas, wait_til_finished=True, timeout=None):
+        """See :py:meth:`.Nidhogg.set_quotas`."""
+        results = dict()
+        for qtree, quota_in_mb in quotas.items():
+            try:
+                await self._set_quota_entry(volume, qtree, quota_in_mb)
+                results[qtree] = None
+            except NidhoggException as e:
+                results[qtree] = e
+        qtrees = [qtree for qtree, error in results.items() if error is None]
+        if qtrees:
+            resize = await self.resize_quotas(volume, timeout=timeout, qtrees=qtrees)
+            if wait_til_finished:
+                await resize.wait()
+        return results
+
+    async def _set_quota_entry(self, volume, qtree, quota_in_mb):
+        await self.quota_set_entry(**self._set_quota_entry_opts(volume, qtree, quota_in_mb))
+
+    async def delete_quota(self, volume, qtree):
+        """See :py:meth:`.SevenMode.delete_quota` and :py:meth:`.ClusterMode.delete_quota`."""
+        await self.quota_delete_entry(**self._quota_entry_opts(volume, qtree))
+
+    async def list_all_cifs_acls(self):
+        """See :py:meth:`.Nidhogg.list_all_cifs_acls`."""
+        acls = dict()
+        async for ace in self.iter_all_cifs_acls():
+            acls.setdefault(ace["share_name"], []).append(ace)
+        return acls
+
+    async def sync_cifs_acls(self, share_name, desired_aces, max_workers=ACL_SYNC_WORKERS):
+        """See :py:meth:`.Nidhogg.sync_cifs_acls`, *max_workers* limits the concurrent API calls."""
+        changes = self._cifs_acl_changes([ace async for ace in self.iter_cifs_acls(share_name)], desired_aces)
+        calls = self._cifs_acl_calls(share_name, changes)
+        errors = await _gather([functools.partial(_error_of, call) for _, _, call in calls], max_workers)
+        return nidhogg.core._acl_outcome(calls, errors)
+
+    async def _create_cifs_ace(self, share_name, ace):
+        await self.set_cifs_acl(
+            share_name, user=ace["user_or_group"], right=ace["permission"], set_group_rights=ace.get("is_group")
+        )
+
+    async def _modify_cifs_ace(self, share_name, ace):
+        await self._create_cifs_ace(share_name, ace)
+
+    async def _delete_cifs_ace(self, share_name, ace):
+        await self.delete_cifs_acl(share_name, ace["user_or_group"], is_group=ace["is_group"])
+
+    async def provision_homes(self, homes, max_workers=PROVISION_WORKERS, timeout=None):
+        """See :py:meth:`.Nidhogg.provision_homes`, *max_workers* limits the homes provisioned concurrently."""
+        results = await _gather([functools.partial(self._provision_home, home) for home in homes], max_workers)
+        # roll back first, the resize would activate the quota entries of the failed homes
+        failed = [result for result in results if result["error"] is not None and result["steps"]]
+        await _gather([functools.partial(self._rollback_home, result) for result in failed], max_workers)
+        # one resize per volume for the quota entries of all its homes
+        volumes = nidhogg.core._quota_homes_by_volume(result for result in results if result["error"] is None)
+        failed = nidhogg.core._set_resize_errors(volumes, await self._resize_provisioned_quotas(volumes, timeout))
+        if failed:
+            await _gather([functools.partial(self._rollback_home, result) for result in failed], max_workers)
+            # resize again to deactivate the deleted quota entries
+            volumes = nidhogg.core._quota_homes_by_volume(failed)
+            nidhogg.core._set_rollback_errors(volumes, await self._resize_provisioned_quotas(volumes, timeout))
+        for volume in set(home["volume"] for home in homes):
+            self.invalidate_volume(volume)
+        return results
+
+    async def _provision_home(self, home):
+        result = ProvisionResult(home=home, steps=[], error=None, rollback_error=None)
+        try:
+            volume, qtree, share_name = home["volume"], home["qtree"], home.get("share_name")
+            await self.create_qtree(volume, qtree, mode=home.get("mode", "007"))
+            result["steps"].append("qtree")
+            if home.get("quota_in_mb") is not None:
+                await self._set_quota_entry(volume, qtree, home["quota_in_mb"])
+                result["steps"].append("quota")
+            if share_name:
+                await self.create_cifs_share(volume, qtree, share_name, **home.get("share_options", {}))
+                result["steps"].append("share")
+                for ace in home.get("aces", []):
+                    await self.set_cifs_acl(
+                        share_name, user=ace["user_or_group"], right=ace["permission"],
+                        set_group_rights=ace.get("is_group")
+                    )
+                result["steps"].append("acl")
+        except Exception as e:
+            # also transport errors or an invalid home, the other homes go on
+            result["error"] = e
+        return result
+
+    async def _resize_provisioned_quotas(self, volumes, timeout):
+        errors, resizes = dict(), dict()
+        for volume, results in volumes.items():
+            try:
+                qtrees = [result["home"]["qtree"] for result in results]
+                resizes[volume] = await self.resize_quotas(volume, timeout=timeout, qtrees=qtrees)
+            except Exception as e:
+                errors[volume] = e
+        # the resizes are polled at the same time, a failed resize does not stop the others
+        waited = await asyncio.gather(*[resize.wait() for resize in resizes.values()], return_exceptions=True)
+        for volume, error in zip(resizes, waited):
+            if error is not None:
+                errors[volume] = error
+        return errors
+
+    async def _rollback_home(self, result):
+        for call in self._rollback_calls(result):
+            try:
+                await call()
+            except Exception as e:
+                # go on, but report the first failed step
+                if result["rollback_error"] is None:
+                    result["rollback_error"] = e
+
+    async def delete_cifs_acls(self, share_name):
+        """See :py:meth:`.SevenMode.delete_cifs_acls` and :py:meth:`.ClusterMode.delete_cifs_acls`."""
+        for ace in await self.list_cifs_acls(share_name):
+            await self.delete_cifs_acl(
+                share_name=ace["share_name"],
+                user_or_group=ace["user_or_group"],
+                is_group=ace["is_group"]
+            )
+
+
+class AsyncSevenMode(AsyncNidhogg, SevenMode):
+    """Asynchronous version of :class:`~nidhogg.sevenmode.SevenMode`."""
+
+    clustered = False
+
+    async def _iter_tag(self, api, tag, element, item_element):
+        """See :py:meth:`.SevenMode._iter_tag`."""
+        try:
+            while True:
+                results = (await self._do(api + "_next", tag=tag, maximum=self.batch_size))["netapp"]["results"]
+                items = self._batch_items(results, element, item_element)
+                for item in items:
+                    yield item
+                num_records = int(results["records"]) if "records" in results else len(items)
+                if num_records == 0:
+                    return
+        finally:
+            await self._do(api + "_end", tag=tag)
+
+    async def iter_qtrees(self, volume):
+        """See :py:meth:`.SevenMode.iter_qtrees`."""
+        for qtree in self._qtrees_reply((await self.qtree_list(volume=volume))["netapp"]["results"]):
+            yield qtree
+
+    async def list_qtrees(self, volume):
+        """See :py:meth:`.SevenMode.list_qtrees`."""
+        return await _collect(self.iter_qtrees(volume), "list_qtrees")
+
+    async def get_qtree(self, volume, qtree):
+        """See :py:meth:`.SevenMode.get_qtree`, the qtrees are not cached."""
+        async for item in self.iter_qtrees(volume):
+            if item["qtree"] == qtree:
+                return item
+        return None
+
+    async def iter_volumes(self):
+        """See :py:meth:`.SevenMode.iter_volumes`."""
+        for volume in self._volumes_reply((await self.volume_list_info())["netapp"]["results"]):
+            yield volume
+
+    async def list_volumes(self):
+        """See :py:meth:`.SevenMode.list_volumes`."""
+        return await _collect(self.iter_volumes(), "list_volumes")
+
+    async def volume_info(self, volume):
+        """See :py:meth:`.SevenMode.volume_info`."""
+        return self._volume_info_reply((await self.volume_list_info(volume=volume))["netapp"]["results"])
+
+    async def iter_snapshots(self, target_name, target_type="volume"):
+        """See :py:meth:`.SevenMode.iter_snapshots`."""
+        results = (await self.snapshot_list_info(target_name=target_name, target_type=target_type))["netapp"]["results"]
+        for snapshot in self._snapshots_reply(results):
+            yield snapshot
+
+    async def list_snapshots(self, target_name, target_type="volume"):
+        """See :py:meth:`.SevenMode.list_snapshots`."""
+        return await _collect(self.iter_snapshots(target_name, target_type), "list_snapshots")
+
+    async def get_quota(self, volume, qtree):
+        """See :py:meth:`.SevenMode.get_quota`."""
+        results = (await self.quota_get_entry(**self._get_quota_opts(volume, qtree)))["netapp"]["results"]
+        return self._item_to_quota(results)
+
+    async def iter_quotas(self, volume):
+        """See :py:meth:`.SevenMode.iter_quotas`."""
+        async for item in self._get_quota_items(volume):
+            yield self._item_to_quota_report(item)
+
+    async def _get_quota_items(self, volume=None):
+        # quota report of all volumes if no volume is specified
+        opts = dict(volume=volume) if volume else dict()
+        for item in self._quota_report_reply((await self.quota_report(**opts))["netapp"]["results"]):
+            yield item
+
+    async def list_quotas(self, volume):
+        """See :py:meth:`.SevenMode.list_quotas`."""
+        return await _collect(self.iter_quotas(volume), "list_quotas")
+
+    async def iter_cifs_shares(self):
+        """See :py:meth:`.SevenMode.iter_cifs_shares`."""
+        tag = (await self._start_cifs_shares())["netapp"]["results"]["tag"]
+        async for item in self._iter_tag("cifs_share_list_iter", tag, "cifs-shares", "cifs-share-info"):
+            yield self._item_to_cifs_share(item)
+
+    async def _start_cifs_shares(self):
+        return await self.cifs_share_list_iter_start()
+
+    async def list_cifs_shares(self):
+        """See :py:meth:`.SevenMode.list_cifs_shares`."""
+        return await _collect(self.iter_cifs_shares(), "list_cifs_shares")
+
+    async def create_cifs_share(self, volume, qtree, share_name, group_name=None, comment=None, umask="007"):
+        """See :py:meth:`.SevenMode.create_cifs_share`."""
+        await self.cifs_share_add(**self._cifs_share_opts(volume, qtree, share_name, group_name, comment, umask))
+
+    async def set_cifs_acl(self, share_name, user="everyone", right=SevenMode.ACL_READ, set_group_rights=False):
+        """See :py:meth:`.SevenMode.set_cifs_acl`."""
+        await self.cifs_share_ace_set(**self._cifs_acl_opts(share_name, user, right, set_group_rights))
+
+    async def iter_cifs_acls(self, share_name):
+        """See :py:meth:`.SevenMode.iter_cifs_acls`."""
+        tag = (await self._start_cifs_acls(share_name=share_name))["netapp"]["results"]["tag"]
+        async for ace in self._iter_cifs_acls(tag):
+            yield ace
+
+    async def iter_all_cifs_acls(self):
+        """See :py:meth:`.SevenMode.iter_all_cifs_acls`."""
+        tag = (await self._start_cifs_acls())["netapp"]["results"]["tag"]
+        async for ace in self._iter_cifs_acls(tag):
+            yield ace
+
+    async def _start_cifs_acls(self, share_name=None):
+        return await self.cifs_share_acl_list_iter_start(**self._start_cifs_acls_opts(share_name))
+
+    async def _iter_cifs_acls(self, tag):
+        async for acl_info in self._iter_tag("cifs_share_acl_list_iter", tag, "cifs-share-acls", "cifs-share-acl-info"):
+            for ace in self._acl_info_to_aces(acl_info):
+                yield ace
+
+    async def list_cifs_acls(self, share_name):
+        """See :py:meth:`.SevenMode.list_cifs_acls`."""
+        return await _collect(self.iter_cifs_acls(share_name), "list_cifs_acls")
+
+    async def delete_cifs_acl(self, share_name, user_or_group, is_group=False):
+        """See :py:meth:`.SevenMode.delete_cifs_acl`."""
+        await self.cifs_share_ace_delete(**self._delete_cifs_acl_opts(share_name, user_or_group, is_group))
+
+    async def update_snapmirror(self, destination_volume, destination_qtree=None, source_filer=None, source_volume=None, source_qtree=None):
+        """See :py:meth:`.SevenMode.update_snapmirror`."""
+        await self.snapmirror_update(**self._snapmirror_update_opts(
+            destination_volume, destination_qtree, source_filer, source_volume, source_qtree))
+
+    async def update_snapmirror_with_snapshot(self, name, destination_volume, destination_qtree=None, source_filer=None, source_volume=None, source_qtree=None):
+        """See :py:meth:`.SevenMode.update_snapmirror_with_snapshot`."""
+        await self.snapmirror_update(
+            source_snapshot=name,
+            destination_snapshot=name,
+            **self._snapmirror_update_opts(
+                destination_volume, destination_qtree, source_filer, source_volume, source_qtree)
+        )
+
+    async def iter_snapmirror_status(self, volume=None, qtree=None):
+        """See :py:meth:`.SevenMode.iter_snapmirror_status`."""
+        results = (await self.snapmirror_get_status(**self._snapmirror_status_opts(volume, qtree)))["netapp"]["results"]
+        for status in self._snapmirror_status_reply(results):
+            yield status
+
+    async def get_snapmirror_status(self, volume=None, qtree=None):
+        """See :py:meth:`.SevenMode.get_snapmirror_status`."""
+        return await _collect(self.iter_snapmirror_status(volume, qtree), "get_snapmirror_status")
+
+    async def get_snapmirror_volume_status(self, volume):
+        """See :py:meth:`.SevenMode.get_snapmirror_volume_status`."""
+        return self._item_to_snapmirrorvolumestatus(
+            (await self.snapmirror_get_volume_status(volume=volume))["netapp"]["results"])
+
+    async def create_snapshot(self, volume, name):
+        """See :py:meth:`.SevenMode.create_snapshot`."""
+        await self.snapshot_create(volume=volume, snapshot=name)
+
+    async def list_snapmirror_destinations(self, volume=None, qtree=None):
+        """Not implemented yet for seven mode."""
+        raise NotImplementedError()     # pragma: no cover
+
+
+class AsyncClusterMode(AsyncNidhogg, ClusterMode):
+    """Asynchronous version of :class:`~nidhogg.clustermode.ClusterMode`.
+
+    Replies are always parsed as a whole, :py:attr:`~.ClusterMode.stream_replies` is not supported.
+    """
+
+    clustered = True
+
+    async def _get_iter(self, api, element, max_records=MAX_RECORDS, **opts):
+        """See :py:meth:`.ClusterMode._get_iter`."""
+        if api in self.desired_attributes:
+            opts['desired_attributes'] = self.desired_attributes[api]
+        remaining = max_records
+        while remaining > 0:
+            opts['max_records'] = min(self.page_size, remaining)
+            results = (await self._do(api, **opts))["netapp"]["results"]
+            items = self._page_items(results, element)
+            for item in items[:remaining]:
+                yield item
+            remaining -= len(items)
+            if not items or "next-tag" not in results:
+                return
+            opts['tag'] = results["next-tag"]
+
+    async def iter_qtrees(self, volume, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.iter_qtrees`."""
+        async for item in self._get_iter("qtree_list_iter", "qtree-info", **self._qtrees_opts(volume, max_records)):
+            yield self._item_to_qtree(item)
+
+    async def list_qtrees(self, volume, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.list_qtrees`."""
+        return await _collect(self.iter_qtrees(volume, max_records), "list_qtrees")
+
+    async def get_qtree(self, volume, qtree):
+        """See :py:meth:`.ClusterMode.get_qtree`."""
+        async for item in self._get_iter("qtree_list_iter", "qtree-info", **self._get_qtree_opts(volume, qtree)):
+            if item["qtree"] == qtree:
+                return self._item_to_qtree(item)
+        return None
+
+    async def iter_volumes(self, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.iter_volumes`."""
+        async for item in self._get_iter("volume_get_iter", "volume-attributes", max_records=max_records):
+            yield self._item_to_volume(item)
+
+    async def list_volumes(self, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.list_volumes`."""
+        return await _collect(self.iter_volumes(max_records), "list_volumes")
+
+    async def volume_info(self, volume):
+        """See :py:meth:`.ClusterMode.volume_info`."""
+        results = (await self.volume_get_iter(**self._volume_info_opts(volume)))["netapp"]["results"]
+        return self._volume_info_reply(results)
+
+    async def iter_snapshots(self, target_name, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.iter_snapshots`."""
+        opts = self._snapshots_opts(target_name, max_records)
+        async for item in self._get_iter("snapshot_get_iter", "snapshot-info", **opts):
+            yield self._item_to_snapshot(item)
+
+    async def list_snapshots(self, target_name, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.list_snapshots`."""
+        return await _collect(self.iter_snapshots(target_name, max_records), "list_snapshots")
+
+    async def get_quota(self, volume, qtree, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.get_quota`."""
+        opts = self._get_quota_opts(volume, qtree, max_records)
+        return self._get_quota_reply((await self.quota_list_entries_iter(**opts))["netapp"]["results"])
+
+    async def iter_quotas(self, volume, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.iter_quotas`."""
+        async for item in self._get_quota_items(volume, max_records):
+            yield self._item_to_quota_report(item)
+
+    async def _get_quota_items(self, volume=None, max_records=MAX_RECORDS):
+        async for item in self._get_iter("quota_report_iter", "quota", **self._quota_report_opts(volume, max_records)):
+            yield item
+
+    async def list_quotas(self, volume, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.list_quotas`."""
+        return await _collect(self.iter_quotas(volume, max_records), "list_quotas")
+
+    async def resize_quotas(self, volume, timeout=None, qtrees=None):
+        """See :py:meth:`.ClusterMode.resize_quotas`.
+
+        :return: handle to wait for the resize
+        :rtype: :class:`AsyncQuotaResizeJob` or :class:`AsyncQuotaResize`
+        """
+        results = (await self.quota_resize(volume=volume))["netapp"]["results"]
+        job_id = results.get("result-jobid")
+        if not job_id:
+            return AsyncQuotaResize(self, volume, timeout=timeout, qtrees=qtrees)
+        return AsyncQuotaResizeJob(self, volume, job_id, timeout=timeout, qtrees=qtrees)
+
+    async def _poll_quota_resizes(self, resizes):
+        """See :py:meth:`.ClusterMode._poll_quota_resizes`."""
+        jobs = dict((resize.job_id, resize) for resize in resizes if isinstance(resize, QuotaResizeJob))
+        if jobs:
+            async for item in self._get_iter("job_get_iter", "job-info", **self._jobs_opts(jobs)):
+                resize = jobs.pop(item["job-id"], None)
+                if resize is not None:
+                    resize._finish(resize._update(item))
+        for resize in resizes:
+            if resize.finished:
+                continue
+            if isinstance(resize, QuotaResizeJob):
+                # finished jobs are removed after a while
+                if resize.job_id in jobs:
+                    resize._finish(await AsyncQuotaResize._poll(resize))
+            else:
+                await resize.done()
+
+    async def iter_cifs_shares(self, max_records=2 ** 32 - 1):
+        """See :py:meth:`.ClusterMode.iter_cifs_shares`."""
+        async for item in self._get_iter("cifs_share_get_iter", "cifs-share", max_records=max_records):
+            yield self._item_to_cifs_share(item)
+
+    async def list_cifs_shares(self, max_records=2 ** 32 - 1):
+        """See :py:meth:`.ClusterMode.list_cifs_shares`."""
+        return await _collect(self.iter_cifs_shares(max_records), "list_cifs_shares")
+
+    async def create_cifs_share(self, volume, qtree, share_name, group_name=None, comment=None, umask="007", vscan_fileop_profile="standard", share_properties=None):
+        """See :py:meth:`.ClusterMode.create_cifs_share`."""
+        has_forcegroup = bool(group_name) and await self.has_forcegroup()
+        await self.cifs_share_create(**self._cifs_share_opts(
+            volume, qtree, share_name, group_name if has_forcegroup else None, comment, umask, vscan_fileop_profile,
+            share_properties
+        ))
+
+    async def set_cifs_acl(self, share_name, user="everyone", right=ClusterMode.ACL_READ, set_group_rights=None):
+        """See :py:meth:`.ClusterMode.set_cifs_acl`."""
+        await self.cifs_share_access_control_create(**self._cifs_acl_opts(share_name, user, right, set_group_rights))
+
+    async def iter_cifs_acls(self, share_name, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.iter_cifs_acls`."""
+        opts = self._cifs_acls_opts(share_name, max_records)
+        async for item in self._get_iter("cifs_share_access_control_get_iter", "cifs-share-access-control", **opts):
+            yield self._item_to_ace(item)
+
+    async def list_cifs_acls(self, share_name, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.list_cifs_acls`."""
+        return await _collect(self.iter_cifs_acls(share_name, max_records), "list_cifs_acls")
+
+    async def iter_all_cifs_acls(self, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.iter_all_cifs_acls`."""
+        async for item in self._get_iter("cifs_share_access_control_get_iter", "cifs-share-access-control",
+                                         max_records=max_records):
+            yield self._item_to_ace(item)
+
+    async def delete_cifs_acl(self, share_name, user_or_group, is_group=None):
+        """See :py:meth:`.ClusterMode.delete_cifs_acl`."""
+        await self.cifs_share_access_control_delete(share=share_name, user_or_group=user_or_group)
+
+    async def _create_cifs_ace(self, share_name, ace):
+        await self.cifs_share_access_control_create(**self._cifs_ace_opts(share_name, ace))
+
+    async def _modify_cifs_ace(self, share_name, ace):
+        await self.cifs_share_access_control_modify(**self._cifs_ace_opts(share_name, ace))
+
+    async def _delete_cifs_ace(self, share_name, ace):
+        await self.cifs_share_access_control_delete(**self._delete_cifs_ace_opts(share_name, ace))
+
+    async def update_snapmirror(self, volume):
+        """See :py:meth:`.ClusterMode.update_snapmirror`."""
+        await self.snapmirror_update(**self._snapmirror_update_opts(volume))
+
+    async def update_snapmirror_with_snapshot(self, name, volume):
+        """See :py:meth:`.ClusterMode.update_snapmirror_with_snapshot`."""
+        await self.snapmirror_update(**self._snapmirror_update_opts(volume, name))
+
+    async def iter_snapmirror_status(self, volume=None, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.iter_snapmirror_status`."""
+        opts = self._snapmirror_status_opts(volume, max_records)
+        async for item in self._get_iter("snapmirror_get_iter", "snapmirror-info", **opts):
+            yield self._item_to_snapmirrorstatus(item)
+
+    async def get_snapmirror_status(self, volume=None, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.get_snapmirror_status`."""
+        return await _collect(self.iter_snapmirror_status(volume, max_records), "get_snapmirror_status")
+
+    async def create_snapshot(self, volume, name, label=None):
+        """See :py:meth:`.ClusterMode.create_snapshot`."""
+        await self.snapshot_create(**self._create_snapshot_opts(volume, name, label))
+
+    async def get_snapmirror_volume_status(self, *args, **kwargs):
+        """Not available for cluster mode."""
+        raise NotImplementedError()     # pragma: no cover
+
+    async def list_snapmirror_destinations(self, volume=None, max_records=MAX_RECORDS):
+        """See :py:meth:`.ClusterMode.list_snapmirror_destinations`."""
+        opts = self._snapmirror_destinations_opts(volume, max_records)
+        return await _collect(self._iter_snapmirror_destinations(**opts), "list_snapmirror_destinations")
+
+    async def _iter_snapmirror_destinations(self, **opts):
+        async for item in self._get_iter("snapmirror_get_destination_iter", "snapmirror-destination-info", **opts):
+            yield self._item_to_snapmirrordestinationinfo(item)
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import functools
+import inspect
+import io
+import json
+import logging
+import os
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+#: default time in seconds the detected mode of a filer is valid
+MODE_CACHE_TTL = 24 * 60 * 60
+
+#: default time in seconds the results of cached methods are valid
+CACHE_TTL = 60
+
+#: default maximal number of cached results per method and connection object
+CACHE_MAXSIZE = 100
+
+_MISSING = object()
+
+
+class ModeCache(object):
+    """Cache of the detected mode (seven-mode or cluster-mode) per filer URL, see :py:func:`~nidhogg.get_netapp`.
+
+    Entries expire after *ttl* seconds. If *filename* is specified, the entries are also stored in this JSON file
+    and shared between processes (i.e. short-lived command line jobs).
+
+    Example:
+
+    .. code-block:: python
+
+        import os
+        import nidhogg
+        from nidhogg.cache import ModeCache
+
+        cache = ModeCache(filename=os.path.expanduser("~/.cache/nidhogg-modes.json"))
+        filer = nidhogg.get_netapp("filer99.example.com", "<username>", "<password>", mode_cache=cache)
+    """
+
+    def __init__(self, ttl=MODE_CACHE_TTL, filename=None):
+        """Init cache.
+
+        :param ttl: time in seconds an entry is valid
+        :type ttl: int
+        :param filename: path of the JSON file storing the entries
+        :type filename: str
+        """
+        self.ttl = ttl
+        self.filename = filename
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _read(self):
+        if self.filename and os.path.exists(self.filename):
+            try:
+                with io.open(self.filename, encoding="utf-8") as f:
+                    return json.load(f)
+            except (IOError, ValueError):
+                logger.warning("mode cache {0} is not readable, ignored".format(self.filename))
+        return {}
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def _save(self):
+        if not self.filename:
+            return
+        tmp = "{0}.{1}.tmp".format(self.filename, os.getpid())
+        try:
+            with io.open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps(self._entries, ensure_ascii=False))
+            # atomic, readers never see a partly written file
+            getattr(os, "replace", os.rename)(tmp, self.filename)
+        except (IOError, OSError):
+            logger.warning("mode cache {0} is not writable, ignored".format(self.filename))
+
+    def get(self, url):
+        """Return the cached mode of the filer.
+
+        :param url: url of the filer
+        :type url: str
+        :return: true, if the filer is a cluster-mode filer; None, if unknown or expired
+        :rtype: bool or None
+        """
+        with self._lock:
+            entry = self._load().get(url)
+            if entry is None:
+                return None
+            clustered, timestamp = entry
+            if time.time() - timestamp > self.ttl:
+                return None
+            return clustered
+
+    def set(self, url, clustered):
+        """Cache the mode of the filer.
+
+        :param url: url of the filer
+        :type url: str
+        :param clustered: true, if the filer is a cluster-mode filer
+        :type clustered: bool
+        """
+        with self._lock:
+            entries = self._load()
+            # merge the entries written by other processes since the file was read, the newest entry wins
+            for key, entry in self._read().items():
+                if key not in entries or entry[1] > entries[key][1]:
+                    entries[key] = entry
+            entries[url] = [clustered, time.time()]
+            self._save()
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+
+#: cache used by :py:func:`~nidhogg.get_netapp` by default, entries are kept in memory only
+MODE_CACHE = ModeCache()
+
+
+#: aspect of the cached results depending on the quotas of a volume
+QUOTA = "quota"
+#: aspect of the cached results depending on the used space of a volume
+SPACE = "space"
+
+
+def depends_on_volume(*aspects):
+    """Return a dependency function for methods whose first argument is a volume name.
+
+    See :class:`cached_method` and :py:func:`invalidates`.
+
+    :param aspects: aspects of the volume, :py:const:`QUOTA` and/or :py:const:`SPACE`
+    :type aspects: str
+    :return: function returning the tags *(aspect, volume)* of a call
+    :rtype: function
+    """
+    def depends(volume, *args, **kwargs):
+        return [(aspect, volume) for aspect in aspects]
+    return depends
+
+
+def depends_on_all_volumes(*aspects):
+    """Return a dependency function for methods depending on all volumes, see :py:func:`depends_on_volume`."""
+    def depends(*args, **kwargs):
+        return [(aspect, None) for aspect in aspects]
+    return depends
+
+
+def _tag_matches(tag, other):
+    # volume None matches all volumes
+    return tag[0] == other[0] and (tag[1] is None or other[1] is None or tag[1] == other[1])
+
+
+def invalidates(depends):
+    """Decorator for methods changing the filer, removes the cached results depending on the changed volume.
+
+    .. code-block:: python
+
+        @invalidates(depends_on_volume(QUOTA))
+        def set_quota(self, volume, qtree, quota_in_mb=1024, wait_til_finished=True):
+            ...
+
+    :param depends: dependency function, see :py:func:`depends_on_volume`
+    :type depends: function
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                # invalidate also on errors, the filer might be changed partially
+                self.invalidate_cache(*depends(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+class TTLCache(object):
+    """Size limited cache, entries expire after *ttl* seconds.
+
+    If the cache is full, the least recently used entry is removed.
+    """
+
+    def __init__(self, maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL):
+        """Init cache.
+
+        :param maxsize: maximal number of entries
+        :type maxsize: int
+        :param ttl: time in seconds an entry is valid
+        :type ttl: int
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of entries, including expired ones."""
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return the value of the key, *default* if not cached or expired."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or time.time() - entry[1] > self.ttl:
+                return default
+            # re-insert, most recently used entries are at the end
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, value, tags=()):
+        """Cache the value of the key.
+
+        :param tags: tags *(aspect, volume)* the value depends on, see :py:meth:`invalidate_tags`
+        :type tags: list of tuple
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.time(), tags)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=_MISSING):
+        """Remove the entry of the key, all entries if no key is given."""
+        with self._lock:
+            if key is _MISSING:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def invalidate_tags(self, tags):
+        """Remove the entries depending on one of the tags *(aspect, volume)*, volume None matches all volumes."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if any(_tag_matches(tag, other) for tag in entry[2] for other in tags):
+                    del self._entries[key]
+
+
+class cached_method(object):
+    """Decorator caching the results of a method per connection object in a :class:`TTLCache`.
+
+    Size and ttl of the caches are read from the attributes *cache_maxsize* and *cache_ttl* of the object,
+    see :py:attr:`.Nidhogg.cache_ttl`. The dependency function *depends* returns the volumes a result depends on,
+    methods decorated with :py:func:`invalidates` remove them if they change the volume. Cached results are also
+    removed by :py:meth:`.Nidhogg.invalidate_cache` or by the *invalidate* method of the decorated method:
+
+    .. code-block:: python
+
+        filer.volume_info("vol1")
+        # remove the cached result of volume_info("vol1")
+        filer.volume_info.invalidate("vol1")
+        # remove all cached results of volume_info
+        filer.volume_info.invalidate()
+    """
+
+    def __init__(self, func=None, depends=None):
+        """Init decorator, use it with or without arguments."""
+        self.depends = depends
+        if func is not None:
+            self(func)
+
+    def __call__(self, func):
+        """Decorate the method."""
+        self.func = func
+        self.key = _key_function(func)
+        functools.update_wrapper(self, func)
+        return self
+
+    def __get__(self, instance, owner):
+        """Return the method bound to the object."""
+        if instance is None:
+            return self
+        return _BoundCachedMethod(self, instance)
+
+    def cache(self, instance):
+        """Return the cache of the decorated method of the object."""
+        caches = instance.__dict__.setdefault("_caches", {})
+        cache = caches.get(self.func.__name__)
+        if cache is None:
+            cache = caches.setdefault(self.func.__name__, TTLCache(instance.cache_maxsize, instance.cache_ttl))
+        return cache
+
+
+def _key_function(func):
+    # the signature is inspected once per method, f(v), f(volume=v) and f(v, default) use the same key
+    try:
+        signature = inspect.signature(func)
+    except AttributeError:
+        # Python 2
+        spec = inspect.getargspec(func)
+        names = spec.args[1:]
+        defaults = dict(zip(reversed(spec.args), reversed(spec.defaults or ())))
+
+        def key(args, kwargs):
+            if len(args) > len(names) or set(kwargs) - set(names):
+                raise TypeError("{0}() got unexpected arguments".format(func.__name__))
+            callargs = dict(defaults)
+            callargs.update(zip(names, args))
+            callargs.update(kwargs)
+            return tuple(sorted(callargs.items()))
+        return key
+
+    parameters = list(signature.parameters.values())
+    defaults = dict((param.name, param.default) for param in parameters[1:] if param.default is not param.empty)
+
+    def key(args, kwargs):
+        callargs = dict(defaults)
+        callargs.update(signature.bind(None, *args, **kwargs).arguments)
+        del callargs[parameters[0].name]
+        return tuple(sorted(callargs.items()))
+    return key
+
+
+class _BoundCachedMethod(object):
+
+    def __init__(self, method, instance):
+        self._method = method
+        self._instance = instance
+        self.__doc__ = method.__doc__
+
+    def __call__(self, *args, **kwargs):
+        cache = self._method.cache(self._instance)
+        key = self._method.key(args, kwargs)
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._method.func(self._instance, *args, **kwargs)
+            depends = self._method.depends
+            cache.set(key, value, depends(*args, **kwargs) if depends else ())
+        return value
+
+    def invalidate(self, *args, **kwargs):
+        """Remove the cached result of the call with the given arguments, all cached results if none are given."""
+        cache = self._method.cache(self._instance)
+        if args or kwargs:
+            cache.invalidate(self._method.key(args, kwargs))
+        else:
+            cache.invalidate()
@@ -1,21 +1,14 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import copy
 import logging
-from time import sleep
-
-import nidhogg.core  # this style needed for patching
-
-from .compatible import ACE, CifsShare, SnapmirrorDestinationInfo, Snapshot, Volume
-from .core import Nidhogg, NidhoggException
-
-try:
-    # py2
-    from backports.functools_lru_cache import lru_cache
-except ImportError:     # pragma: no cover
-    # py3
-    from functools import lru_cache
 
+from .cache import QUOTA, SPACE, cached_method, depends_on_all_volumes, depends_on_volume, invalidates
+from .compatible import ACE, CifsShare, SnapmirrorDestinationInfo, Volume
+from .converter import Converter, to_float
+from .core import Nidhogg, NidhoggException, QuotaResize
+from .utils import as_list
 
 
 logger = logging.getLogger(__name__)
@@ -23,6 +16,167 @@ logger = logging.getLogger(__name__)
 
 #: maximum records that can be retrieved via NETAPP API
 MAX_RECORDS = 2 ** 16
+#: number of records requested per page of a ``*-get-iter`` call
+PAGE_SIZE = 1000
+
+#: attributes requested by the list methods, only the fields read by the converters
+DESIRED_ATTRIBUTES = {
+    "volume_get_iter": dict(
+        volume_attributes=dict(
+            volume_id_attributes=dict.fromkeys(["name", "type"]),
+            volume_state_attributes=dict.fromkeys(["state"]),
+            volume_space_attributes=dict.fromkeys(["size_total", "size_used", "size_available"]),
+            volume_inode_attributes=dict.fromkeys(["files_used", "files_total"]),
+        )
+    ),
+    "qtree_list_iter": dict(
+        qtree_info=dict.fromkeys(["qtree", "status", "security_style"])
+    ),
+    "snapshot_get_iter": dict(
+        snapshot_info=dict.fromkeys(["name"])
+    ),
+    "quota_report_iter": dict(
+        quota=dict.fromkeys([
+            "disk_used", "disk_limit", "soft_disk_limit", "threshold", "files_used", "file_limit",
+            "soft_file_limit", "quota_target", "tree", "volume"
+        ])
+    ),
+    "cifs_share_get_iter": dict(
+        cifs_share=dict.fromkeys(["path", "share_name"])
+    ),
+    "cifs_share_access_control_get_iter": dict(
+        cifs_share_access_control=dict.fromkeys(["share", "user_or_group", "permission", "user_group_type"])
+    ),
+    "snapmirror_get_iter": dict(
+        snapmirror_info=dict.fromkeys([
+            "source_location", "destination_location", "lag_time", "last_transfer_from", "last_transfer_size",
+            "last_transfer_duration", "last_transfer_type", "current_transfer_error", "current_transfer_type",
+            "break_failed_count", "break_successful_count", "destination_volume", "destination_volume_node",
+            "destination_vserver", "destination_vserver_uuid", "exported_snapshot", "exported_snapshot_timestamp",
+            "is_constituent", "is_healthy", "last_transfer_end_timestamp", "last_transfer_network_compression_ratio",
+            "max_transfer_rate", "mirror_state", "newest_snapshot", "newest_snapshot_timestamp", "opmask", "policy",
+            "policy_type", "relationship_control_plane", "relationship_group_type", "relationship_id",
+            "relationship_status", "relationship_type", "resync_failed_count", "resync_successful_count",
+            "source_volume", "source_vserver", "source_vserver_uuid", "total_transfer_bytes",
+            "total_transfer_time_secs", "update_failed_count", "update_successful_count", "vserver",
+        ])
+    ),
+    "job_get_iter": dict(
+        job_info=dict.fromkeys(["job_id", "job_state", "job_progress", "job_completion"])
+    ),
+    "snapmirror_get_destination_iter": dict(
+        snapmirror_destination_info=dict.fromkeys([
+            "destination_location", "destination_volume", "destination_vserver", "is_constituent", "policy_type",
+            "relationship_group_type", "relationship_id", "relationship_status", "relationship_type",
+            "source_location", "source_volume", "source_volume_node", "source_vserver"
+        ])
+    ),
+}
+
+#: converters of the API records, see :class:`~nidhogg.converter.Converter`
+TO_VOLUME = Converter({
+    "volume-id-attributes": Converter({
+        "name": "name",
+        # RW for read-write, DP for data-protection, DC for data-cache, LS for load-sharing
+        "type": ("snapable", lambda value: value == "rw"),
+    }, required=["name", "type"]),
+    "volume-state-attributes": Converter({
+        "state": "state",
+    }),
+    "volume-space-attributes": Converter({
+        "size-total": ("size_total", to_float),
+        "size-used": ("size_used", to_float),
+        "size-available": ("size_available", to_float),
+    }),
+    "volume-inode-attributes": Converter({
+        "files-used": ("files_used", to_float),
+        "files-total": ("files_total", to_float),
+    }),
+}, extra=["filer"])
+
+TO_ACE = Converter({
+    "share": "share_name",
+    "user-or-group": "user_or_group",
+    "permission": "permission",
+    "user-group-type": "user_group_type",
+}, defaults=dict(is_group=None), required=["share", "user-or-group", "permission"])  # is_group not used
+
+TO_SNAPMIRROR_DESTINATION_INFO = Converter(
+    dict((key.replace("_", "-"), key) for key in SnapmirrorDestinationInfo.required_arguments),
+    required=[key.replace("_", "-") for key in SnapmirrorDestinationInfo.required_arguments]
+)
+
+
+def _user_group_type(is_group):
+    # unix group, unix user or windows user or group, see set_group_rights of ClusterMode.set_cifs_acl
+    if is_group is None:
+        return "windows"
+    elif is_group is True:
+        return "unix_group"
+    return "unix_user"
+
+
+#: states of a finished job that did not succeed
+JOB_FAILED_STATES = ["failure", "error", "quit", "dead"]
+
+
+def _merge(d, other):
+    # merge nested dictionaries in place
+    for k, v in other.items():
+        if isinstance(v, dict) and isinstance(d.get(k), dict):
+            _merge(d[k], v)
+        else:
+            d[k] = v
+
+
+class QuotaResizeJob(QuotaResize):
+    """Handle of a quota resize running as job on a cluster-mode filer, see :py:meth:`ClusterMode.resize_quotas`.
+
+    The status of the resize is requested by ``job-get-iter``. The progress reported by the job is stored in
+    :py:attr:`progress`.
+    """
+
+    def __init__(self, nidhogg, volume, job_id, timeout=None, qtrees=None):
+        """Init handle.
+
+        :param nidhogg: connection object
+        :type nidhogg: :class:`ClusterMode`
+        :param volume: name of the volume
+        :type volume: str
+        :param job_id: id of the job returned by ``quota-resize``
+        :type job_id: str
+        :param timeout: max. time in seconds to wait for the resize, see :class:`~nidhogg.core.QuotaResize`
+        :type timeout: float
+        :param qtrees: names of the changed qtrees, used for logging
+        :type qtrees: list of str
+        """
+        super(QuotaResizeJob, self).__init__(nidhogg, volume, timeout, qtrees)
+        self.job_id = job_id
+
+    def _poll(self):
+        items = list(self.nidhogg._get_iter(
+            "job_get_iter",
+            "job-info",
+            query=dict(
+                job_info=dict(
+                    job_id=self.job_id
+                )
+            )
+        ))
+        if not items:
+            # finished jobs are removed after a while
+            return super(QuotaResizeJob, self)._poll()
+        return self._update(items[0])
+
+    def _update(self, item):
+        """Update the handle by a job-info record, return true if the job is finished."""
+        self.progress = item.get("job-progress")
+        state = item["job-state"]
+        if state == "success":
+            return True
+        if state in JOB_FAILED_STATES:
+            raise NidhoggException("Quota resize of {0} failed: {1}".format(self.volume, item.get("job-completion")))
+        return False
 
 
 class ClusterMode(Nidhogg):
@@ -39,45 +193,95 @@ class ClusterMode(Nidhogg):
         ACL_NO_ACCESS
     ]                                       #: list of all permission constants
 
+    page_size = PAGE_SIZE                   #: number of records requested per page of a ``*-get-iter`` call
+    stream_replies = False                  #: parse replies of ``*-get-iter`` calls while reading them
+    desired_attributes = DESIRED_ATTRIBUTES  #: attributes requested per ``*-get-iter`` call
+
+    def add_desired_attributes(self, api, attributes):
+        """Request additional attributes in the ``*-get-iter`` calls of this object.
+
+        By default only the fields read by the converters are requested. Use this, i.e. in a subclass
+        that overrides a converter and needs more fields.
+
+        Example:
+
+        .. code-block:: python
+
+            filer.add_desired_attributes("volume_get_iter", dict(
+                volume_attributes=dict(
+                    volume_autosize_attributes=dict(mode=None)
+                )
+            ))
+
+        :param api: name of the ``*-get-iter`` API call
+        :type api: str
+        :param attributes: nested dictionary of the attribute names, leaves are None
+        :type attributes: dict
+        """
+        desired_attributes = copy.deepcopy(self.desired_attributes)
+        _merge(desired_attributes.setdefault(api, {}), attributes)
+        self.desired_attributes = desired_attributes
+
+    def _get_iter(self, api, element, max_records=MAX_RECORDS, **opts):
+        """Yield the records of a ``*-get-iter`` API call page by page.
+
+        Requests pages of :py:attr:`page_size` records and follows the *next-tag* returned by the
+        filer until all records, but not more than *max_records*, are retrieved.
+        If :py:attr:`stream_replies` is set, every record is yielded as soon as it is received.
+
+        :param api: name of the ``*-get-iter`` API call
+        :type api: str
+        :param element: name of the record element in the attributes-list
+        :type element: str
+        :param max_records: limit returned records
+        :type max_records: int
+        :return: generator of records
+        :rtype: generator of dict
+        :raises NidhoggException: if an error occurs
+        """
+        if api in self.desired_attributes:
+            opts['desired_attributes'] = self.desired_attributes[api]
+        remaining = max_records
+        while remaining > 0:
+            opts['max_records'] = min(self.page_size, remaining)
+            if self.stream_replies:
+                results = {}
+                items = self._do_iter(api, element, results, **opts)
+            else:
+                results = self._do(api, **opts)["netapp"]["results"]
+                items = self._page_items(results, element)
+            num_records = 0
+            # consume the whole page, the next-tag follows the records
+            for item in items:
+                if num_records < remaining:
+                    yield item
+                num_records += 1
+            remaining -= num_records
+            if num_records == 0 or "next-tag" not in results:
+                return
+            opts['tag'] = results["next-tag"]
+
+    def _page_items(self, results, element):
+        """Return the records of a page of a ``*-get-iter`` API call, see :py:meth:`_get_iter`."""
+        return as_list(results["attributes-list"][element]) if int(results["num-records"]) > 0 else []
+
     def _item_to_volume(self, item):
-        return Volume(
-            name=item['volume-id-attributes']['name'],
-            # RW for read-write, DP for data-protection, DC for data-cache, LS for load-sharing
-            snapable=item['volume-id-attributes']['type'] == "rw",
-            state=item['volume-state-attributes']['state'] if 'volume-state-attributes' in item and 'state' in item['volume-state-attributes'] else None,
-            size_total=float(item['volume-space-attributes']['size-total']) if 'volume-space-attributes' in item and 'size-total' in item['volume-space-attributes'] else None,
-            size_used=float(item['volume-space-attributes']['size-used']) if 'volume-space-attributes' in item and 'size-used' in item['volume-space-attributes'] else None,
-            size_available=float(item['volume-space-attributes']['size-available']) if 'volume-space-attributes' in item and 'size-available' in item['volume-space-attributes'] else None,
-            files_used=float(item['volume-inode-attributes']['files-used']) if 'volume-inode-attributes' in item and 'files-used' in item['volume-inode-attributes'] else None,
-            files_total=float(item['volume-inode-attributes']['files-total']) if 'volume-inode-attributes' in item and 'files-total' in item['volume-inode-attributes'] else None,
-            filer=self.vserver_fqdn,
-        )
+        return TO_VOLUME.build(self._data_class(Volume), item, filer=self.vserver_fqdn)
+
+    def _item_to_cifs_share(self, item):
+        return self._data_class(CifsShare)(path=item['path'], share_name=item['share-name'])
+
+    def _quota_entry_opts(self, volume, qtree):
+        opts = super(ClusterMode, self)._quota_entry_opts(volume, qtree)
+        # policy "default" must be specified for cluster-mode filers
+        opts['policy'] = "default"
+        return opts
 
     def _item_to_ace(self, item):
-        return ACE(
-            share_name=item['share'],
-            user_or_group=item['user-or-group'],
-            permission=item['permission'],
-            is_group=None,      # not used
-            user_group_type=item['user-group-type'] if "user-group-type" in item else None
-        )
+        return TO_ACE.build(self._data_class(ACE), item)
 
     def _item_to_snapmirrordestinationinfo(self, item):
-        return SnapmirrorDestinationInfo(
-            destination_location=item["destination-location"],
-            destination_volume=item['destination-volume'],
-            destination_vserver=item['destination-vserver'],
-            is_constituent=item['is-constituent'],
-            policy_type=item['policy-type'],
-            relationship_group_type=item['relationship-group-type'],
-            relationship_id=item['relationship-id'],
-            relationship_status=item['relationship-status'],
-            relationship_type=item['relationship-type'],
-            source_location=item["source-location"],
-            source_volume=item['source-volume'],
-            source_volume_node=item['source-volume-node'],
-            source_vserver=item['source-vserver']
-        )
+        return TO_SNAPMIRROR_DESTINATION_INFO.build(self._data_class(SnapmirrorDestinationInfo), item)
 
     #
     # API FUNCTIONS
@@ -93,7 +297,29 @@ class ClusterMode(Nidhogg):
         :rtype: list of :class:`~nidhogg.compatible.QTree` or empty list
         :raises NidhoggException: if an error occurs
         """
-        opts = dict(
+        qtrees = list(self.iter_qtrees(volume, max_records))
+        if not qtrees:
+            logger.warning("list_qtrees: no entries found")
+        return qtrees
+
+    def iter_qtrees(self, volume, max_records=MAX_RECORDS):
+        """Return a generator of qtrees, see :py:meth:`list_qtrees`.
+
+        Records are retrieved page by page while iterating.
+
+        :param volume: name of the volume
+        :type volume: str
+        :param max_records: limit returned records
+        :type max_records: int
+        :return: generator of qtrees
+        :rtype: generator of :class:`~nidhogg.compatible.QTree`
+        :raises NidhoggException: if an error occurs
+        """
+        for item in self._get_iter("qtree_list_iter", "qtree-info", **self._qtrees_opts(volume, max_records)):
+            yield self._item_to_qtree(item)
+
+    def _qtrees_opts(self, volume, max_records):
+        return dict(
             query=dict(
                 qtree_info=dict(
                     volume=volume
@@ -101,20 +327,35 @@ class ClusterMode(Nidhogg):
             ),
             max_records=max_records
         )
-        results = self.qtree_list_iter(**opts)["netapp"]["results"]
-        if int(results["num-records"]) > 1:
-            return [
-                self._item_to_qtree(item)
-                for item in results["attributes-list"]["qtree-info"]
-            ]
-        elif int(results["num-records"]) == 1:
-            return [
-                self._item_to_qtree(results["attributes-list"]["qtree-info"])
-            ]
-        logger.warning("list_qtrees: no entries found")
-        return []
-
-    @lru_cache(maxsize=100)
+
+    def get_qtree(self, volume, qtree):
+        """Return the specified qtree, queried by volume and qtree name.
+
+        :param volume: name of the volume
+        :type volume: str
+        :param qtree: name of the qtree
+        :type qtree: str
+        :return: the qtree or None if it does not exist
+        :rtype: :class:`~nidhogg.compatible.QTree`
+        :raises NidhoggException: if an error occurs
+        """
+        for item in self._get_iter("qtree_list_iter", "qtree-info", **self._get_qtree_opts(volume, qtree)):
+            # the query matches patterns, i.e. "*", other qtrees may match before the specified one
+            if item["qtree"] == qtree:
+                return self._item_to_qtree(item)
+        return None
+
+    def _get_qtree_opts(self, volume, qtree):
+        return dict(
+            query=dict(
+                qtree_info=dict(
+                    volume=volume,
+                    qtree=qtree
+                )
+            )
+        )
+
+    @cached_method(depends=depends_on_all_volumes(SPACE))
     def list_volumes(self, max_records=MAX_RECORDS):
         """Return a list of volumes of type :class:`~nidhogg.compatible.Volume`.
 
@@ -124,23 +365,29 @@ class ClusterMode(Nidhogg):
         :rtype: list of :class:`~nidhogg.compatible.Volume` or empty list
         :raises NidhoggException: if an error occurs
         """
+        volumes = list(self.iter_volumes(max_records))
+        if not volumes:
+            logger.warning("list_volumes: no entries found")
+        return volumes
+
+    def iter_volumes(self, max_records=MAX_RECORDS):
+        """Return a generator of volumes, see :py:meth:`list_volumes`.
+
+        Records are retrieved page by page while iterating.
+
+        :param max_records: limit returned records
+        :type max_records: int
+        :return: generator of volumes
+        :rtype: generator of :class:`~nidhogg.compatible.Volume`
+        :raises NidhoggException: if an error occurs
+        """
         opts = dict(
             max_records=max_records
         )
-        results = self.volume_get_iter(**opts)["netapp"]["results"]
-        if int(results["num-records"]) > 1:
-            return [
-                self._item_to_volume(item)
-                for item in results["attributes-list"]["volume-attributes"]
-            ]
-        elif int(results["num-records"]) == 1:
-            return [
-                self._item_to_volume(results["attributes-list"]["volume-attributes"])
-            ]
-        logger.warning("list_volumes: no entries found")
-        return []
-
-    @lru_cache(maxsize=100)
+        for item in self._get_iter("volume_get_iter", "volume-attributes", **opts):
+            yield self._item_to_volume(item)
+
+    @cached_method(depends=depends_on_volume(SPACE))
     def volume_info(self, volume):
         """Return basic information about the volume.
 
@@ -150,15 +397,20 @@ class ClusterMode(Nidhogg):
         :rtype: :class:`~nidhogg.compatible.Volume`
         :raises NidhoggException: if an error occurs
         """
-        opts = dict(
+        return self._volume_info_reply(self.volume_get_iter(**self._volume_info_opts(volume))["netapp"]["results"])
+
+    def _volume_info_opts(self, volume):
+        return dict(
             query=dict(
                 volume_id_attributes=dict(
                     name=volume
                 )
-            )
+            ),
+            desired_attributes=self.desired_attributes["volume_get_iter"]
         )
-        return self._item_to_volume(
-            self.volume_get_iter(**opts)["netapp"]["results"]["attributes-list"]["volume-attributes"])
+
+    def _volume_info_reply(self, results):
+        return self._item_to_volume(results["attributes-list"]["volume-attributes"])
 
     def list_snapshots(self, target_name, max_records=MAX_RECORDS):
         """Return list of snapshots for given volume.
@@ -171,7 +423,30 @@ class ClusterMode(Nidhogg):
         :rtype: list of :class:`~nidhogg.compatible.Snapshot` or empty list
         :raises NidhoggException: if an error occurs
         """
-        opts = dict(
+        snapshots = list(self.iter_snapshots(target_name, max_records))
+        if not snapshots:
+            logger.warning("list_snapshots: no entries found")
+        return snapshots
+
+    def iter_snapshots(self, target_name, max_records=MAX_RECORDS):
+        """Return a generator of snapshots, see :py:meth:`list_snapshots`.
+
+        Records are retrieved page by page while iterating.
+
+        :param target_name: name of the volume
+        :type target_name: str
+        :param max_records: limit returned records
+        :type max_records: int
+        :return: generator of snapshots
+        :rtype: generator of :class:`~nidhogg.compatible.Snapshot`
+        :raises NidhoggException: if an error occurs
+        """
+        opts = self._snapshots_opts(target_name, max_records)
+        for item in self._get_iter("snapshot_get_iter", "snapshot-info", **opts):
+            yield self._item_to_snapshot(item)
+
+    def _snapshots_opts(self, target_name, max_records):
+        return dict(
             query=dict(
                 snapshot_info=dict(
                     volume=target_name
@@ -179,18 +454,6 @@ class ClusterMode(Nidhogg):
             ),
             max_records=max_records
         )
-        results = self.snapshot_get_iter(**opts)["netapp"]["results"]
-        if int(results["num-records"]) > 1:
-            return [
-                Snapshot(name=item['name'])
-                for item in results["attributes-list"]["snapshot-info"]
-            ]
-        elif int(results["num-records"]) == 1:
-            return [
-                Snapshot(name=results["attributes-list"]["snapshot-info"]['name'])
-            ]
-        logger.warning("list_snapshots: no entries found")
-        return []
 
     def get_quota(self, volume, qtree, max_records=MAX_RECORDS):
         """Return the quota of the specified qtree on the given volume.
@@ -205,7 +468,11 @@ class ClusterMode(Nidhogg):
         :rtype: :class:`~nidhogg.compatible.Quota` or empty dict
         :raises NidhoggException: if an error occurs
         """
-        opts = dict(
+        results = self.quota_list_entries_iter(**self._get_quota_opts(volume, qtree, max_records))["netapp"]["results"]
+        return self._get_quota_reply(results)
+
+    def _get_quota_opts(self, volume, qtree, max_records):
+        return dict(
             query=dict(
                 quota_entry=dict(
                     quota_target="/vol/{0}/{1}".format(volume, qtree)
@@ -213,7 +480,8 @@ class ClusterMode(Nidhogg):
             ),
             max_records=max_records
         )
-        results = self.quota_list_entries_iter(**opts)["netapp"]["results"]
+
+    def _get_quota_reply(self, results):
         if int(results["num-records"]) == 1:
             return self._item_to_quota(results['attributes-list']['quota-entry'])
         logger.warning("get_quota: no entries found")
@@ -230,51 +498,73 @@ class ClusterMode(Nidhogg):
         :rtype: :class:`~nidhogg.compatible.QuotaReport` or empty list
         :raises NidhoggException: if an error occurs
         """
+        quotas = list(self.iter_quotas(volume, max_records))
+        if not quotas:
+            logger.warning("list_quotas: no entries found")
+        return quotas
+
+    def iter_quotas(self, volume, max_records=MAX_RECORDS):
+        """Return a generator of quota reports, see :py:meth:`list_quotas`.
+
+        Records are retrieved page by page while iterating.
+
+        :param volume: name of the volume
+        :type volume: str
+        :param max_records: limit returned records
+        :type max_records: int
+        :return: generator of quota reports
+        :rtype: generator of :class:`~nidhogg.compatible.QuotaReport`
+        :raises NidhoggException: if an error occurs
+        """
+        for item in self._get_quota_items(volume, max_records):
+            yield self._item_to_quota_report(item)
+
+    def _get_quota_items(self, volume=None, max_records=MAX_RECORDS):
+        return self._get_iter("quota_report_iter", "quota", **self._quota_report_opts(volume, max_records))
+
+    def _quota_report_opts(self, volume, max_records):
+        # quota report of all volumes if no volume is specified
         opts = dict(
-            query=dict(
+            max_records=max_records
+        )
+        if volume:
+            opts['query'] = dict(
                 quota=dict(
                     volume=volume
                 )
-            ),
-            max_records=max_records
-        )
-        results = self.quota_report_iter(**opts)["netapp"]["results"]
-        if int(results["num-records"]) > 1:
-            return [
-                self._item_to_quota_report(item)
-                for item in results['attributes-list']['quota']
-            ]
-        elif int(results["num-records"]) == 1:
-            return [
-                self._item_to_quota_report(results['attributes-list']['quota'])
-            ]
-        logger.warning("list_quotas: no entries found")
-        return []
-
-    def list_cifs_shares(self):
+            )
+        return opts
+
+    def list_cifs_shares(self, max_records=2 ** 32 - 1):
         """List all cifs shares.
 
+        :param max_records: limit returned records
+        :type max_records: int
         :return: list of cifs shares
         :rtype: list of :class:`~nidhogg.compatible.CifsShare` or empty list
         :raises NidhoggException: if an error occurs
         """
-        opts = dict(
-            max_records=2 ** 32 - 1
-        )
+        shares = list(self.iter_cifs_shares(max_records))
+        if not shares:
+            logger.warning("list_cifs_shares: no cifs shares found")
+        return shares
+
+    def iter_cifs_shares(self, max_records=2 ** 32 - 1):
+        """Return a generator of cifs shares, see :py:meth:`list_cifs_shares`.
 
-        results = self.cifs_share_get_iter(**opts)['netapp']['results']
+        Records are retrieved page by page while iterating.
 
-        if int(results['num-records']) > 1:
-            return [
-                CifsShare(path=item['path'], share_name=item['share-name'])
-                for item in results['attributes-list']['cifs-share']
-            ]
-        elif int(results['num-records']) == 1:
-            return [
-                CifsShare(path=results['attributes-list']['cifs-share']['path'], share_name=results['attributes-list']['cifs-share']['share-name'])
-            ]
-        logger.warning("list_cifs_shares: cifs shares found")
-        return []
+        :param max_records: limit returned records
+        :type max_records: int
+        :return: generator of cifs shares
+        :rtype: generator of :class:`~nidhogg.compatible.CifsShare`
+        :raises NidhoggException: if an error occurs
+        """
+        opts = dict(
+            max_records=max_records
+        )
+        for item in self._get_iter("cifs_share_get_iter", "cifs-share", **opts):
+            yield self._item_to_cifs_share(item)
 
     def create_cifs_share(self, volume, qtree, share_name, group_name=None, comment=None, umask="007", vscan_fileop_profile="standard", share_properties=None):
         """Create a cifs share.
@@ -297,6 +587,15 @@ class ClusterMode(Nidhogg):
         :type share_properties: list of strings
         :raises NidhoggException: if an error occurs
         """
+        # the API call is only sent if a force group is requested
+        has_forcegroup = bool(group_name) and self.has_forcegroup
+        self.cifs_share_create(**self._cifs_share_opts(
+            volume, qtree, share_name, group_name if has_forcegroup else None, comment, umask, vscan_fileop_profile,
+            share_properties
+        ))
+
+    def _cifs_share_opts(self, volume, qtree, share_name, group_name, comment, umask, vscan_fileop_profile,
+                         share_properties):
         opts = dict(
             dir_umask=umask,
             file_umask=umask,
@@ -304,13 +603,13 @@ class ClusterMode(Nidhogg):
             share_name=share_name,
             vscan_fileop_profile=vscan_fileop_profile
         )
-        if group_name and self.has_forcegroup:
+        if group_name:
             opts['force_group_for_create'] = group_name
         if comment:
             opts['comment'] = comment
         if share_properties:
             opts['share_properties'] = share_properties
-        self.cifs_share_create(**opts)
+        return opts
 
     def set_cifs_acl(self, share_name, user="everyone", right=ACL_READ, set_group_rights=None):
         """Set a single ACL for the specifed share.
@@ -327,24 +626,51 @@ class ClusterMode(Nidhogg):
         :raises NidhoggException: if an error occurs
         :raises NidhoggException: if wrong right was set
         """
+        self.cifs_share_access_control_create(**self._cifs_acl_opts(share_name, user, right, set_group_rights))
+
+    def _cifs_acl_opts(self, share_name, user, right, set_group_rights):
         # check permissions
         if right not in self.ACL_PERMISSIONS:
             raise NidhoggException("Permission {0} not in {1}.".format(right, self.ACL_PERMISSIONS))
 
-        # set user_group_type
-        if set_group_rights is None:
-            user_group_type = "windows"
-        elif set_group_rights is True:
-            user_group_type = "unix_group"
-        else:
-            user_group_type = "unix_user"
-        opts = dict(
+        return dict(
             permission=right,
             share=share_name,
             user_or_group=user,
-            user_group_type=user_group_type
+            user_group_type=_user_group_type(set_group_rights)
         )
-        self.cifs_share_access_control_create(**opts)
+
+    def _ace_user_group_type(self, ace):
+        """Return the user group type of an ACE, sent by the filer or derived from *is_group*."""
+        return ace.get("user_group_type") or _user_group_type(ace.get("is_group"))
+
+    def _ace_key(self, ace):
+        """Return the identity of an ACE, a windows and a unix user with the same name are different ACEs."""
+        return ace["user_or_group"], self._ace_user_group_type(ace)
+
+    def _cifs_ace_opts(self, share_name, ace):
+        opts = self._cifs_acl_opts(share_name, ace["user_or_group"], ace["permission"], ace.get("is_group"))
+        opts["user_group_type"] = self._ace_user_group_type(ace)
+        return opts
+
+    def _create_cifs_ace(self, share_name, ace):
+        return self.cifs_share_access_control_create(**self._cifs_ace_opts(share_name, ace))
+
+    def _modify_cifs_ace(self, share_name, ace):
+        return self.cifs_share_access_control_modify(**self._cifs_ace_opts(share_name, ace))
+
+    def _delete_cifs_ace(self, share_name, ace):
+        return self.cifs_share_access_control_delete(**self._delete_cifs_ace_opts(share_name, ace))
+
+    def _delete_cifs_ace_opts(self, share_name, ace):
+        opts = dict(
+            share=share_name,
+            user_or_group=ace["user_or_group"]
+        )
+        if ace.get("user_group_type"):
+            # the entry of this type only, the name may be used by an entry of another type
+            opts['user_group_type'] = ace["user_group_type"]
+        return opts
 
     def list_cifs_acls(self, share_name, max_records=MAX_RECORDS):
         """Return ACL of the specified share.
@@ -357,7 +683,30 @@ class ClusterMode(Nidhogg):
         :rtype: :class:`~nidhogg.compatible.ACE` or empty list
         :raises NidhoggException: if an error occurs
         """
-        opts = dict(
+        acls = list(self.iter_cifs_acls(share_name, max_records))
+        if not acls:
+            logger.warning("get_cifs_acl: no acls found")
+        return acls
+
+    def iter_cifs_acls(self, share_name, max_records=MAX_RECORDS):
+        """Return a generator of ACEs (access control entries), see :py:meth:`list_cifs_acls`.
+
+        Records are retrieved page by page while iterating.
+
+        :param share_name: name of the share
+        :type share_name: str
+        :param max_records: limit returned records
+        :type max_records: int
+        :return: generator of ACEs (access control entries)
+        :rtype: generator of :class:`~nidhogg.compatible.ACE`
+        :raises NidhoggException: if an error occurs
+        """
+        opts = self._cifs_acls_opts(share_name, max_records)
+        for item in self._get_iter("cifs_share_access_control_get_iter", "cifs-share-access-control", **opts):
+            yield self._item_to_ace(item)
+
+    def _cifs_acls_opts(self, share_name, max_records):
+        return dict(
             query=dict(
                 cifs_share_access_control=dict(
                     share=share_name
@@ -365,18 +714,22 @@ class ClusterMode(Nidhogg):
             ),
             max_records=max_records
         )
-        results = self.cifs_share_access_control_get_iter(**opts)["netapp"]["results"]
-        if int(results["num-records"]) > 1:
-            return [
-                self._item_to_ace(item)
-                for item in results['attributes-list']['cifs-share-access-control']
-            ]
-        elif int(results["num-records"]) == 1:
-            return [
-                self._item_to_ace(results['attributes-list']['cifs-share-access-control'])
-            ]
-        logger.warning("get_cifs_acl: no acls found")
-        return []
+
+    def iter_all_cifs_acls(self, max_records=MAX_RECORDS):
+        """Return a generator of the ACEs (access control entries) of all cifs shares, see
+        :py:meth:`~.Nidhogg.list_all_cifs_acls`.
+
+        Records are retrieved page by page while iterating, without a query for a share.
+
+        :param max_records: limit returned records
+        :type max_records: int
+        :return: generator of ACEs (access control entries)
+        :rtype: generator of :class:`~nidhogg.compatible.ACE`
+        :raises NidhoggException: if an error occurs
+        """
+        for item in self._get_iter("cifs_share_access_control_get_iter", "cifs-share-access-control",
+                                   max_records=max_records):
+            yield self._item_to_ace(item)
 
     def delete_cifs_acl(self, share_name, user_or_group, is_group=None):
         """Delete cifs ACL of the specified user or group.
@@ -410,7 +763,8 @@ class ClusterMode(Nidhogg):
                 user_or_group=ace["user_or_group"]
             )
 
-    def set_quota(self, volume, qtree, quota_in_mb=1024, wait_til_finished=True):
+    @invalidates(depends_on_volume(QUOTA))
+    def set_quota(self, volume, qtree, quota_in_mb=1024, wait_til_finished=True, timeout=None):
         """Set a quota in MiB (default = 1GiB) for the specified volume and qtree.
 
         :param volume: name of the volume
@@ -421,41 +775,69 @@ class ClusterMode(Nidhogg):
         :type quota_in_mb: int
         :param wait_til_finished: if false, do not wait for resize operation
         :type wait_til_finished: bool
+        :param timeout: max. time in seconds to wait for the resize, see :class:`~nidhogg.core.QuotaResize`
+        :type timeout: float
+        :return: handle of the resize
+        :rtype: :class:`~nidhogg.core.QuotaResize`
         :raises NidhoggException: if an error occurs
         :raises NidhoggException: if resize did not finish in time and we were waiting for it
         :raises NidhoggException: if quotas are not enabled
         """
-        quota_target = "/vol/{0}/{1}".format(volume, qtree)
-        quota_type = "tree"
-        quota_in_kb = int(round(quota_in_mb * 1024))
-        # policy "default" must be specified for cluster-mode filers
-        self.quota_set_entry(
-            volume=volume,
-            qtree="",
-            disk_limit=quota_in_kb,
-            soft_disk_limit=int(round(quota_in_kb * 0.8)),  # use 80% of the given quota as warn-limit
-            quota_target=quota_target,
-            quota_type=quota_type,
-            policy="default"
-        )
-        self.quota_resize(volume=volume)
+        self._set_quota_entry(volume, qtree, quota_in_mb)
+        resize = self.resize_quotas(volume, timeout=timeout, qtrees=[qtree])
         if wait_til_finished:
-            for i in range(0, nidhogg.core.QUOTA_RESIZE_WAIT_CYCLES):
-                sleep(nidhogg.core.QUOTA_RESIZE_WAIT_TIME)
-                status = self.quota_status(volume=volume)["netapp"]["results"]["status"]
-                if status.lower() == "on":
-                    return
-                # check if quotas are turned on at all
-                if status.lower() == "off":
-                    raise NidhoggException("Quotas are not enabled.")
-            # waiting for quote resize exceeded
-            logger.debug("resize of {0}:/vol/{1} after setting quota for {2} did not finish".format(
-                self.vserver_fqdn,
-                volume,
-                qtree
-            ))
-            raise NidhoggException("Quota resize did not finish in time.")
+            resize.wait()
+        return resize
 
+    def resize_quotas(self, volume, timeout=None, qtrees=None):
+        """Start a resize of the quotas of the specified volume, see :py:meth:`.Nidhogg.resize_quotas`.
+
+        The resize is tracked by its job, if the filer returns a job id.
+
+        :param volume: name of the volume
+        :type volume: str
+        :param timeout: max. time in seconds to wait for the resize, see :class:`~nidhogg.core.QuotaResize`
+        :type timeout: float
+        :param qtrees: names of the changed qtrees, used for logging
+        :type qtrees: list of str
+        :return: handle to wait for the resize
+        :rtype: :class:`QuotaResizeJob` or :class:`~nidhogg.core.QuotaResize`
+        :raises NidhoggException: if an error occurs
+        """
+        results = self.quota_resize(volume=volume)["netapp"]["results"]
+        job_id = results.get("result-jobid")
+        if not job_id:
+            return QuotaResize(self, volume, timeout=timeout, qtrees=qtrees)
+        return QuotaResizeJob(self, volume, job_id, timeout=timeout, qtrees=qtrees)
+
+    def _poll_quota_resizes(self, resizes):
+        """Request the status of all resize jobs by a single ``job-get-iter`` call."""
+        jobs = dict((resize.job_id, resize) for resize in resizes if isinstance(resize, QuotaResizeJob))
+        if jobs:
+            for item in self._get_iter("job_get_iter", "job-info", **self._jobs_opts(jobs)):
+                resize = jobs.pop(item["job-id"], None)
+                if resize is not None:
+                    resize._finish(resize._update(item))
+        for resize in resizes:
+            if resize.finished:
+                continue
+            if isinstance(resize, QuotaResizeJob):
+                # finished jobs are removed after a while
+                if resize.job_id in jobs:
+                    resize._finish(QuotaResize._poll(resize))
+            else:
+                resize.done()
+
+    def _jobs_opts(self, job_ids):
+        return dict(
+            query=dict(
+                job_info=dict(
+                    job_id="|".join(sorted(job_ids))
+                )
+            )
+        )
+
+    @invalidates(depends_on_volume(QUOTA))
     def delete_quota(self, volume, qtree):
         """Delete the quota of the specified volume and qtree.
 
@@ -465,16 +847,7 @@ class ClusterMode(Nidhogg):
         :type qtree: str
         :raises NidhoggException: if an error occurs
         """
-        quota_target = "/vol/{0}/{1}".format(volume, qtree)
-        quota_type = "tree"
-        # policy "default" must be specified for cluster-mode filers
-        self.quota_delete_entry(
-            volume=volume,
-            qtree="",
-            quota_target=quota_target,
-            quota_type=quota_type,
-            policy="default"
-        )
+        self.quota_delete_entry(**self._quota_entry_opts(volume, qtree))
 
     def update_snapmirror(self, volume):
         """Trigger the snapmirror replication. You have to be connected on the destination server.
@@ -483,9 +856,15 @@ class ClusterMode(Nidhogg):
         :type volume: str
         :raises NidhoggException: if an error occurs
         """
-        self.snapmirror_update(
+        self.snapmirror_update(**self._snapmirror_update_opts(volume))
+
+    def _snapmirror_update_opts(self, volume, name=None):
+        opts = dict(
             destination_location="{}:{}".format(self.vserver, volume)
         )
+        if name:
+            opts['source_snapshot'] = name
+        return opts
 
     def update_snapmirror_with_snapshot(self, name, volume):
         """Trigger the snapmirror replication. You have to be connected on the destination server.
@@ -496,10 +875,7 @@ class ClusterMode(Nidhogg):
         :type volume: str
         :raises NidhoggException: if an error occurs
         """
-        self.snapmirror_update(
-            destination_location="{}:{}".format(self.vserver, volume),
-            source_snapshot=name
-        )
+        self.snapmirror_update(**self._snapmirror_update_opts(volume, name))
 
     def get_snapmirror_status(self, volume=None, max_records=MAX_RECORDS):
         """Get status of snapmirror replication pairs. You have to be connected on the destination server.
@@ -508,35 +884,52 @@ class ClusterMode(Nidhogg):
 
         :param volume: name of destination volume
         :type volume: str
+        :param max_records: limit returned records
+        :type max_records: int
         :return: list of all snapmirror pair status
         :rtype: list of :class:`~nidhogg.compatible.SnapmirrorStatus` or empty list
         :raises NidhoggException: if an error occurs
         """
-        opts = dict()
+        status = list(self.iter_snapmirror_status(volume, max_records))
+        if not status:
+            logger.warning("get_snapmirror_status: no entries found")
+        return status
+
+    def iter_snapmirror_status(self, volume=None, max_records=MAX_RECORDS):
+        """Return a generator of snapmirror pair status, see :py:meth:`get_snapmirror_status`.
+
+        Records are retrieved page by page while iterating.
+        If no params are provided, yield all snapmirror status pairs.
+
+        :param volume: name of destination volume
+        :type volume: str
+        :param max_records: limit returned records
+        :type max_records: int
+        :return: generator of snapmirror pair status
+        :rtype: generator of :class:`~nidhogg.compatible.SnapmirrorStatus`
+        :raises NidhoggException: if an error occurs
+        """
+        opts = self._snapmirror_status_opts(volume, max_records)
+        for item in self._get_iter("snapmirror_get_iter", "snapmirror-info", **opts):
+            yield self._item_to_snapmirrorstatus(item)
+
+    def _snapmirror_status_opts(self, volume, max_records):
+        opts = dict(
+            max_records=max_records
+        )
         if volume:
             opts['query'] = dict(
                 snapmirror_info=dict(
                     destination_location="{}:{}".format(self.vserver, volume)
                 )
             )
-            opts['max_records'] = max_records
-        results = self.snapmirror_get_iter(**opts)["netapp"]["results"]
-        if int(results["num-records"]) > 1:
-            return [
-                self._item_to_snapmirrorstatus(item)
-                for item in results["attributes-list"]["snapmirror-info"]
-            ]
-        elif int(results["num-records"]) == 1:
-            return [
-                self._item_to_snapmirrorstatus(results["attributes-list"]["snapmirror-info"])
-            ]
-        logger.warning("get_snapmirror_status: no entries found")
-        return []
+        return opts
 
     def get_snapmirror_volume_status(self, *args, **kwargs):
         """Not available for cluster mode."""
         raise NotImplementedError()     # pragma: no cover
 
+    @invalidates(depends_on_volume(SPACE))
     def create_snapshot(self, volume, name, label=None):
         """Create a snapshot with an optional label.
 
@@ -548,12 +941,15 @@ class ClusterMode(Nidhogg):
         :type label: str
         :raises NidhoggException: if an error occurs
         """
+        self.snapshot_create(**self._create_snapshot_opts(volume, name, label))
+
+    def _create_snapshot_opts(self, volume, name, label):
         opts = dict()
         if label:
             opts['snapmirror_label'] = label
         opts['volume'] = volume
         opts['snapshot'] = name
-        self.snapshot_create(**opts)
+        return opts
 
     def list_snapmirror_destinations(self, volume=None, max_records=MAX_RECORDS):
         """List all snapmirror destinations. You have to be connected on the source server.
@@ -562,27 +958,29 @@ class ClusterMode(Nidhogg):
 
         :param volume: name of source volume
         :type volume: str
+        :param max_records: limit returned records
+        :type max_records: int
         :return: list of all snapmirror destinations
         :rtype: list of :class:`~nidhogg.compatible.SnapmirrorDestinationInfo` or empty list
         :raises NidhoggException: if an error occurs
         """
-        opts = dict()
+        opts = self._snapmirror_destinations_opts(volume, max_records)
+        destinations = [
+            self._item_to_snapmirrordestinationinfo(item)
+            for item in self._get_iter("snapmirror_get_destination_iter", "snapmirror-destination-info", **opts)
+        ]
+        if not destinations:
+            logger.warning("list_snapmirror_destinations: no entries found")
+        return destinations
+
+    def _snapmirror_destinations_opts(self, volume, max_records):
+        opts = dict(
+            max_records=max_records
+        )
         if volume:
             opts['query'] = dict(
                 snapmirror_destination_info=dict(
                     source_location="{}:{}".format(self.vserver, volume)
                 )
             )
-            opts['max_records'] = max_records
-        results = self.snapmirror_get_destination_iter(**opts)["netapp"]["results"]
-        if int(results["num-records"]) > 1:
-            return [
-                self._item_to_snapmirrordestinationinfo(item)
-                for item in results["attributes-list"]["snapmirror-destination-info"]
-            ]
-        elif int(results["num-records"]) == 1:
-            return [
-                self._item_to_snapmirrordestinationinfo(results["attributes-list"]["snapmirror-destination-info"])
-            ]
-        logger.warning("list_snapmirror_destinations: no entries found")
-        return []
+        return opts
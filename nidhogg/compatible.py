@@ -5,20 +5,30 @@ import logging
 
 # Python 2/3 support
 import sys
+from six import viewkeys
 if sys.version_info[0] >= 3:    # pragma: no cover
     unicode = str
 
 logger = logging.getLogger(__name__)
 
 
+def _required(cls):
+    # set of the required keys, built once per class
+    required = cls.__dict__.get("_required_set")
+    if required is None:
+        required = frozenset(cls.required_arguments)
+        setattr(cls, "_required_set", required)
+    return required
+
+
 class InitDict(dict):
     """Base class of the data object classes to enforce required keys in the dict."""
 
     def __init__(self, **kwargs):
         """Check required keys."""
-        if set(self.required_arguments).symmetric_difference(set(kwargs.keys())):
+        if viewkeys(kwargs) != _required(type(self)):
             raise AttributeError("required arguments: {}".format(self.required_arguments))
-        super(InitDict, self).__init__(**kwargs)
+        super(InitDict, self).__init__(kwargs)
 
     def __eq__(self, other):
         """Compare value of first key with specified unicode."""
@@ -135,3 +145,212 @@ class SnapmirrorDestinationInfo(InitDict):
         "relationship_group_type", "relationship_id", "relationship_status", "relationship_type",
         "source_location", "source_volume", "source_volume_node", "source_vserver"
     ]
+
+
+class FilerResult(InitDict):
+    """Data object representing the result of a call on one filer of a :class:`~nidhogg.fleet.Fleet`.
+
+    *error* is the raised exception (*result* is None then) and *duration* the time of the call in seconds.
+    """
+
+    required_arguments = [
+        "filer", "result", "error", "duration"
+    ]
+
+
+class AclChanges(InitDict):
+    """Data object representing the ACEs created, modified and deleted by :py:meth:`~.Nidhogg.sync_cifs_acls`.
+
+    *created*, *modified* and *deleted* contain the applied changes only. *failed* contains a tuple
+    *(change, ace, exception)* per failed change, *change* is "created", "modified" or "deleted".
+    """
+
+    required_arguments = [
+        "created", "modified", "deleted", "failed"
+    ]
+
+
+class ProvisionResult(InitDict):
+    """Data object representing the result of one home provisioned by :py:meth:`~.Nidhogg.provision_homes`.
+
+    *steps* are the completed steps ("qtree", "quota", "share", "acl", "resize") and *error* the exception of the
+    failed step (None if all steps succeeded). The completed steps of a failed home are rolled back,
+    *rollback_error* is the exception if the rollback failed too.
+    """
+
+    required_arguments = [
+        "home", "steps", "error", "rollback_error"
+    ]
+
+
+class ApiCallEvent(InitDict):
+    """Data object representing a finished API call, emitted to the instruments, see :py:mod:`nidhogg.metrics`.
+
+    *status* is "passed", "failed" (the filer returned an error), "error" (i.e. a network or parse error) or
+    "closed" (the caller stopped iterating a streamed reply).
+    *duration*, *network_time* and *parse_time* are in seconds, *bytes_out* and *bytes_in* the size of the request
+    and the response in byte and *records* the number of returned records (None if the call does not return records).
+    The *duration* of a streamed reply includes the time of the caller between the records, *network_time* and
+    *parse_time* do not.
+    """
+
+    required_arguments = [
+        "api", "filer", "status", "duration", "network_time", "parse_time", "bytes_out", "bytes_in", "records"
+    ]
+
+
+class Record(object):
+    """Base class of the compact data object classes, see :py:func:`compact_class`.
+
+    The values are stored in slots instead of a dictionary. The records can be used like the dictionaries of the
+    data object classes (``record["name"]``, ``record.get("name")``, ``dict(record)``, ``**record``), but keys can
+    not be added.
+    """
+
+    __slots__ = ()
+    required_arguments = []
+    data_class = None       #: data object class of the compact class
+
+    def __init__(self, **kwargs):
+        """Check required keys."""
+        if set(kwargs) != _required(type(self)):
+            raise AttributeError("required arguments: {}".format(self.required_arguments))
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def __getitem__(self, key):
+        """Return the value of the key."""
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        """Set the value of an existing key."""
+        if key not in _required(type(self)):
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        """True if the record has the key."""
+        return key in _required(type(self))
+
+    def __iter__(self):
+        """Iterate over the keys."""
+        return iter(self.required_arguments)
+
+    def __len__(self):
+        """Number of keys."""
+        return len(self.required_arguments)
+
+    def __eq__(self, other):
+        """Compare like :class:`InitDict`, also with dictionaries."""
+        if isinstance(other, unicode):
+            return other == getattr(self, self.required_arguments[0])
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        """Negation of :py:meth:`__eq__`."""
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        """Representation like a dictionary."""
+        return "{0}({1})".format(type(self).__name__, self.to_dict())
+
+    def __reduce__(self):
+        """Pickle the record by its data object class, the compact classes are created at runtime."""
+        return _unpickle_record, (self.data_class, self.values())
+
+    def get(self, key, default=None):
+        """Return the value of the key, *default* if the record has no such key."""
+        if key in _required(type(self)):
+            return getattr(self, key)
+        return default
+
+    def keys(self):
+        """Return the keys."""
+        return list(self.required_arguments)
+
+    def values(self):
+        """Return the values, ordered like the keys."""
+        return [getattr(self, key) for key in self.required_arguments]
+
+    def items(self):
+        """Return the tuples *(key, value)*."""
+        return [(key, getattr(self, key)) for key in self.required_arguments]
+
+    def to_dict(self):
+        """Return the record as dictionary.
+
+        :rtype: dict
+        """
+        return dict(self.items())
+
+
+_COMPACT_CLASSES = {}
+
+_MISSING = object()
+
+_INIT_TEMPLATE = """def __init__(self, {arguments}, **unknown):
+    if unknown or {missing}:
+        raise AttributeError("required arguments: {{}}".format(self.required_arguments))
+    {assignments}
+"""
+
+
+def _compile_init(keys):
+    # like namedtuple: a generated __init__ with one argument per key is much faster than setattr in a loop
+    source = _INIT_TEMPLATE.format(
+        arguments=", ".join("{0}=_MISSING".format(key) for key in keys),
+        missing=" or ".join("{0} is _MISSING".format(key) for key in keys),
+        assignments="\n    ".join("self.{0} = {0}".format(key) for key in keys),
+    )
+    namespace = dict(_MISSING=_MISSING)
+    exec(source, namespace)
+    return namespace["__init__"]
+
+
+def _unpickle_record(cls, values):
+    return compact_class(cls)(**dict(zip(cls.required_arguments, values)))
+
+
+def compact_class(cls):
+    """Return the compact :class:`Record` class of a data object class, i.e. for many records.
+
+    The compact class has the same keys and ordering (i.e. of :class:`Volume`) as the data object class, the values
+    are stored in slots. Records need a fraction of the memory of the dictionaries and are created faster.
+
+    Example:
+
+    .. code-block:: python
+
+        VolumeRecord = compact_class(Volume)
+        volume = VolumeRecord(name="vol1", ...)
+        volume["name"]
+
+    See :py:attr:`.Nidhogg.compact_records` to return compact records by the methods of a connection object.
+
+    :param cls: data object class
+    :type cls: class derived from :class:`InitDict`
+    :return: compact class
+    :rtype: class derived from :class:`Record`
+    """
+    compact = _COMPACT_CLASSES.get(cls)
+    if compact is None:
+        namespace = dict(
+            __slots__=tuple(str(key) for key in cls.required_arguments),
+            __init__=_compile_init(cls.required_arguments),
+            __doc__="Compact version of :class:`{0}`, see :py:func:`compact_class`.".format(cls.__name__),
+            __module__=cls.__module__,
+            required_arguments=list(cls.required_arguments),
+            data_class=cls,
+        )
+        if "__lt__" in cls.__dict__:
+            namespace["__lt__"] = cls.__dict__["__lt__"]
+        compact = _COMPACT_CLASSES.setdefault(cls, type(str(cls.__name__ + "Record"), (Record,), namespace))
+    return compact
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+
+class Converter(object):
+    """Convert the records of the Netapp API into the keyword arguments of a data object class.
+
+    The converter is built once per record type from a field map. The field map maps the keys of the API record to
+
+    * the name of the data object key, the value is taken as it is,
+    * a tuple *(name, function)*, the value is converted by the function or
+    * another :class:`Converter` for nested elements, its keys are added to the same data object.
+
+    The field map is checked and flattened into a table once, a record is then converted by a single loop over the
+    table. Calling the converter returns a dictionary, ``build(cls, item, **extra)`` passes the values as keyword
+    arguments to the data object class *cls*, together with the values of the extra keys.
+
+    Example:
+
+    .. code-block:: python
+
+        TO_QTREE = Converter({
+            "qtree": "qtree",
+            "status": "status",
+            "security-style": "security_style",
+        })
+        TO_QTREE.build(QTree, item)
+
+    :param fields: field map
+    :type fields: dict
+    :param defaults: values of the data object keys missing in the record (default None), also of keys not in the
+        field map
+    :type defaults: dict
+    :param required: keys of the API record that must be sent, a :class:`KeyError` is raised otherwise
+    :type required: list of str
+    :param extra: data object keys not taken from the record, passed to ``build`` by the caller
+    :type extra: list of str
+    :raises ValueError: if a required key is not in the field map or a data object key is mapped twice
+    """
+
+    def __init__(self, fields, defaults=None, required=(), extra=()):
+        """Check the field map and build the conversion table."""
+        self.fields = fields
+        self.defaults = defaults or {}
+        self.required = frozenset(required)
+        self.extra = tuple(extra)
+        missing = self.required - set(fields)
+        if missing:
+            raise ValueError("required keys not in field map: {0}".format(sorted(missing)))
+        self._table = self._build_table({}, set(self.extra))
+
+    def _build_table(self, defaults, names):
+        # one row (key, name, function, required, default, nested table) per key of the field map and the
+        # constant values of the data object keys not in the field map
+        defaults = dict(defaults, **self.defaults)
+        rows = []
+        for key, spec in self.fields.items():
+            if isinstance(spec, Converter):
+                rows.append((key, None, None, False, None, spec._build_table(defaults, names)))
+                continue
+            name, func = spec if isinstance(spec, tuple) else (spec, None)
+            if name in names:
+                raise ValueError("key mapped twice: {0}".format(name))
+            names.add(name)
+            rows.append((key, name, func, key in self.required, defaults.get(name), None))
+        constants = []
+        for name, default in self.defaults.items():
+            if name not in names:
+                names.add(name)
+                constants.append((name, default))
+        return rows, constants
+
+    def __call__(self, item):
+        """Convert the API record.
+
+        :param item: API record
+        :type item: dict
+        :return: keyword arguments of the data object class, without the extra keys
+        :rtype: dict
+        :raises KeyError: if a required key is missing
+        """
+        values = {}
+        _convert(self._table, item, values)
+        return values
+
+    def build(self, cls, item, **extra):
+        """Convert the API record into a data object.
+
+        :param cls: data object class
+        :type cls: type
+        :param item: API record
+        :type item: dict
+        :param extra: values of the extra keys
+        :return: data object
+        :raises KeyError: if a required key is missing
+        :raises TypeError: if the extra keys do not match
+        """
+        if len(extra) != len(self.extra) or not all(name in extra for name in self.extra):
+            raise TypeError("extra keys {0} expected, got {1}".format(list(self.extra), sorted(extra)))
+        values = self(item)
+        values.update(extra)
+        return cls(**values)
+
+
+_EMPTY = {}
+
+
+def _convert(table, item, values):
+    rows, constants = table
+    for key, name, func, required, default, nested in rows:
+        if nested is not None:
+            # nested element, empty elements are parsed as None
+            _convert(nested, item.get(key) or _EMPTY, values)
+        elif key in item:
+            values[name] = item[key] if func is None else func(item[key])
+        elif required:
+            raise KeyError(key)
+        else:
+            values[name] = default
+    values.update(constants)
+
+
+def to_float(value):
+    """Convert a number sent by the API."""
+    return float(value)
+
+
+def to_bool(value):
+    """Convert a boolean sent by the API."""
+    return value == "true"
+
+
+def kbytes_or_unlimited(value):
+    """Convert a size in kbyte sent by the API to byte, -1 if unlimited ("-")."""
+    return float(value) * 1024 if value.isdigit() else -1
+
+
+def number_or_unlimited(value):
+    """Convert a number sent by the API, -1 if unlimited ("-")."""
+    return float(value) if value.isdigit() else -1
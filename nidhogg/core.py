@@ -2,33 +2,43 @@
 from __future__ import unicode_literals
 
 import collections
+import functools
+import itertools
 import logging
 import xml
+from multiprocessing.pool import ThreadPool
+from time import sleep
+from timeit import default_timer
 from abc import ABCMeta, abstractmethod
+from xml.etree import ElementTree
 
-import dicttoxml
 from cached_property import cached_property
 # Python 2 and 3
 from six import with_metaclass
 
-from .compatible import QTree, Quota, QuotaReport, SnapmirrorStatus, Volume, VolumeWithQuotaRatio
-from .http import NidhoggHttp
-from .utils import underline_to_dash
+from .cache import (CACHE_MAXSIZE, CACHE_TTL, QUOTA, SPACE, cached_method, depends_on_all_volumes,
+                    depends_on_volume, invalidates)
+from . import metrics
+from .converter import Converter, kbytes_or_unlimited, number_or_unlimited
+from .compatible import (AclChanges, ApiCallEvent, ProvisionResult, QTree, Quota, QuotaReport, SnapmirrorStatus,
+                         Snapshot, Volume, VolumeWithQuotaRatio, compact_class)
+from .http import POOL_MAXSIZE, NidhoggHttp
+from .request import ENVELOPE, RequestEncoder
 
 try:
     # py2
     from urlparse import urlparse
-    from backports.functools_lru_cache import lru_cache
 except ImportError:     # pragma: no cover
     # py3
     from urllib.parse import urlparse
-    from functools import lru_cache
 
 
 
 # used the capture urllib3 wannings
 logging.captureWarnings(True)
 logger = logging.getLogger(__name__)
+# request and response bodies are logged on DEBUG level by this logger only
+wire_logger = logging.getLogger("nidhogg.wire")
 
 try:
     import pkg_resources
@@ -41,6 +51,169 @@ except:  # pragma: no cover
 # max wait time is QUOTA_RESIZE_WAIT_TIME * QUOTA_RESIZE_WAIT_CYCLES
 QUOTA_RESIZE_WAIT_TIME = 6
 QUOTA_RESIZE_WAIT_CYCLES = 20
+# the status of a quota resize is polled after 0.25s, 0.5s, 1s, ... but at least every QUOTA_RESIZE_WAIT_TIME seconds
+QUOTA_RESIZE_POLL_INTERVAL = 0.25
+
+# bodies logged by the wire logger are truncated after WIRE_LOG_LIMIT bytes, None logs them completely
+WIRE_LOG_LIMIT = 4096
+# the wire logger logs the bodies of every WIRE_LOG_SAMPLE_RATE-th API call only
+WIRE_LOG_SAMPLE_RATE = 1
+
+_wire_log_counter = itertools.count()
+
+# max. number of concurrent API calls of sync_cifs_acls
+ACL_SYNC_WORKERS = 4
+# max. number of homes provisioned concurrently by provision_homes
+PROVISION_WORKERS = 8
+
+
+class _Body(object):
+    """Request or response body converted to a string only when the log record is formatted."""
+
+    def __init__(self, body, limit):
+        self.body = body
+        self.limit = limit
+
+    def __str__(self):
+        body = self.body
+        if not isinstance(body, bytes):
+            body = body.encode("utf-8")
+        if self.limit is None or len(body) <= self.limit:
+            return body.decode("utf-8", "replace")
+        return "{0}... ({1} bytes)".format(body[:self.limit].decode("utf-8", "replace"), len(body))
+
+    __unicode__ = __str__
+
+
+def _sample_wire():
+    """Decide if the bodies of an API call are logged, see *WIRE_LOG_SAMPLE_RATE*."""
+    if not wire_logger.isEnabledFor(logging.DEBUG):
+        return False
+    return not next(_wire_log_counter) % WIRE_LOG_SAMPLE_RATE
+
+
+def log_wire(kind, body, sampled=None):
+    """Log a request or response body by the logger *nidhogg.wire*, if it is enabled on DEBUG level.
+
+    See *WIRE_LOG_LIMIT* and *WIRE_LOG_SAMPLE_RATE*.
+
+    :param kind: "request" or "response"
+    :type kind: str
+    :param body: body of the request or response
+    :type body: bytes or str
+    :param sampled: if the bodies of the API call are logged, decided once per call so that the request and the
+        response of a sampled call are logged both; decided for this body only if None
+    :type sampled: bool
+    """
+    if sampled is None:
+        sampled = _sample_wire()
+    if not sampled:
+        return
+    wire_logger.debug("%s: %s", kind, _Body(body, WIRE_LOG_LIMIT))
+
+
+def _call(func):
+    return func()
+
+
+def _error_of(func):
+    """Call the function, return the exception it raised or None."""
+    try:
+        func()
+    except Exception as e:
+        return e
+    return None
+
+
+def _acl_outcome(calls, errors):
+    """Return the applied and the failed ACL changes, see :py:meth:`Nidhogg.sync_cifs_acls`."""
+    outcome = AclChanges(created=[], modified=[], deleted=[], failed=[])
+    for (change, ace, _), error in zip(calls, errors):
+        if error is None:
+            outcome[change].append(ace)
+        else:
+            outcome["failed"].append((change, ace, error))
+    return outcome
+
+
+def _quota_homes_by_volume(results):
+    """Group the results of the homes with a quota entry by volume."""
+    volumes = collections.OrderedDict()
+    for result in results:
+        if "quota" in result["steps"]:
+            volumes.setdefault(result["home"]["volume"], []).append(result)
+    return volumes
+
+
+def _set_resize_errors(volumes, errors):
+    """Mark the homes of the volumes as resized or failed, return the results of the failed homes."""
+    failed = []
+    for volume, results in volumes.items():
+        for result in results:
+            if volume in errors:
+                result["error"] = errors[volume]
+                failed.append(result)
+            else:
+                result["steps"].append("resize")
+    return failed
+
+
+def _quota_ratio(quota_size, size_total):
+    """Return the quota ratio of a volume, None if the size of the volume is unknown (missing or 0)."""
+    return quota_size / size_total if size_total else None
+
+
+def _set_rollback_errors(volumes, errors):
+    """Report the failed resizes after a rollback, unless a rollback step failed before."""
+    for volume, error in errors.items():
+        for result in volumes[volume]:
+            if result["rollback_error"] is None:
+                result["rollback_error"] = error
+
+
+#: converters of the API records, see :class:`~nidhogg.converter.Converter`
+TO_QUOTA = Converter({
+    "disk-limit": ("disk_limit", kbytes_or_unlimited),
+    "soft-disk-limit": ("soft_disk_limit", kbytes_or_unlimited),
+    "threshold": ("threshold", kbytes_or_unlimited),
+    "file-limit": ("file_limit", number_or_unlimited),
+    "soft-file-limit": ("soft_file_limit", number_or_unlimited),
+}, required=["disk-limit", "soft-disk-limit", "threshold", "file-limit", "soft-file-limit"])
+
+TO_QUOTA_REPORT = Converter({
+    "disk-used": ("disk_used", kbytes_or_unlimited),
+    "disk-limit": ("disk_limit", kbytes_or_unlimited),
+    "soft-disk-limit": ("soft_disk_limit", kbytes_or_unlimited),
+    "threshold": ("threshold", kbytes_or_unlimited),
+    "files-used": ("files_used", number_or_unlimited),
+    "file-limit": ("file_limit", number_or_unlimited),
+    "soft-file-limit": ("soft_file_limit", number_or_unlimited),
+    "quota-target": "quota_target",
+    "tree": "tree",
+}, required=[
+    "disk-used", "disk-limit", "soft-disk-limit", "threshold", "files-used", "file-limit", "soft-file-limit",
+    "quota-target", "tree"
+])
+
+TO_QTREE = Converter({
+    "qtree": "qtree",
+    "status": "status",
+    "security-style": "security_style",
+}, required=["qtree", "status", "security-style"])
+
+# all keys except snapmirror_status, the key is the data object key with "-" instead of "_"
+TO_SNAPMIRROR_STATUS = Converter(
+    dict(
+        (key.replace("_", "-"), key)
+        for key in SnapmirrorStatus.required_arguments if key != "snapmirror_status"
+    ),
+    # 7mode and cluster mode
+    required=[
+        "source-location", "destination-location", "lag-time", "last-transfer-from", "last-transfer-size",
+        "last-transfer-duration"
+    ],
+    extra=["snapmirror_status"]
+)
 
 
 class NidhoggException(Exception):
@@ -49,6 +222,93 @@ class NidhoggException(Exception):
     pass
 
 
+class QuotaResize(object):
+    """Handle of a quota resize of a volume, see :py:meth:`Nidhogg.resize_quotas`.
+
+    Example, resize the quotas of several volumes at the same time:
+
+    .. code-block:: python
+
+        resizes = [filer.resize_quotas(volume) for volume in ["vol1", "vol2"]]
+        filer.wait_for_quota_resizes(resizes)
+    """
+
+    def __init__(self, nidhogg, volume, timeout=None, qtrees=None):
+        """Init handle.
+
+        :param nidhogg: connection object
+        :type nidhogg: :class:`Nidhogg`
+        :param volume: name of the volume
+        :type volume: str
+        :param timeout: max. time in seconds to wait for the resize,
+            default is *QUOTA_RESIZE_WAIT_TIME* * *QUOTA_RESIZE_WAIT_CYCLES*
+        :type timeout: float
+        :param qtrees: names of the changed qtrees, used for logging
+        :type qtrees: list of str
+        """
+        self.nidhogg = nidhogg
+        self.volume = volume
+        self.qtrees = qtrees or []
+        if timeout is None:
+            timeout = QUOTA_RESIZE_WAIT_TIME * QUOTA_RESIZE_WAIT_CYCLES
+        self.deadline = default_timer() + timeout
+        self.interval = QUOTA_RESIZE_POLL_INTERVAL
+        self.finished = False
+        self.progress = None
+
+    def _poll(self):
+        """Request the status of the resize once, return true if it is finished."""
+        return self._is_finished(self.nidhogg.quota_status(volume=self.volume)["netapp"]["results"]["status"])
+
+    def _is_finished(self, status):
+        """Check the quota status of the volume, return true if the resize is finished."""
+        if status.lower() == "on":
+            return True
+        # check if quotas are turned on at all
+        if status.lower() == "off":
+            raise NidhoggException("Quotas are not enabled.")
+        return False
+
+    def _finish(self, finished):
+        """Store the polled status, raise if the resize is not finished in time."""
+        self.finished = finished
+        if not finished and default_timer() >= self.deadline:
+            # waiting for quote resize exceeded
+            logger.debug("resize of {0}:/vol/{1} after setting quota for {2} did not finish".format(
+                self.nidhogg.vserver_fqdn,
+                self.volume,
+                ", ".join(self.qtrees)
+            ))
+            raise NidhoggException("Quota resize did not finish in time.")
+        return finished
+
+    def done(self):
+        """Check once if the resize is finished, does not block.
+
+        :return: true, if the resize is finished
+        :rtype: bool
+        :raises NidhoggException: if an error occurs
+        :raises NidhoggException: if resize did not finish in time
+        :raises NidhoggException: if quotas are not enabled
+        """
+        if self.finished:
+            return True
+        return self._finish(self._poll())
+
+    def wait(self):
+        """Wait until the resize is finished, poll the status with increasing intervals.
+
+        :raises NidhoggException: if an error occurs
+        :raises NidhoggException: if resize did not finish in time
+        :raises NidhoggException: if quotas are not enabled
+        """
+        while not self.finished:
+            sleep(max(0, min(self.interval, self.deadline - default_timer())))
+            if self.done():
+                return
+            self.interval = min(self.interval * 2, QUOTA_RESIZE_WAIT_TIME)
+
+
 class Nidhogg(with_metaclass(ABCMeta)):
     """This is the base class for connecting to a NETAPP filer.
 
@@ -60,16 +320,64 @@ class Nidhogg(with_metaclass(ABCMeta)):
     * :class:`~nidhogg.clustermode.ClusterMode`
     """
 
-    def __init__(self, url, username, password, major, minor, verify, http=NidhoggHttp):
+    cache_ttl = CACHE_TTL               #: time in seconds the results of cached methods are valid
+    cache_maxsize = CACHE_MAXSIZE       #: maximal number of cached results per method
+    compact_records = False             #: return compact records, see :py:func:`~nidhogg.compatible.compact_class`
+
+    def __init__(self, url, username, password, major, minor, verify, http=NidhoggHttp, pool_maxsize=POOL_MAXSIZE):
         """Init conncetion to filer."""
         self.url = url
         self.major = major
         self.minor = minor
-        self.http = http(url, username, password, verify)
+        if callable(http):
+            # custom transports may not accept pool_maxsize, it is passed only if it is not the default
+            kwargs = dict(pool_maxsize=pool_maxsize) if pool_maxsize != POOL_MAXSIZE else dict()
+            self.http = http(url, username, password, verify, **kwargs)
+        else:
+            # transport object shared with another connection object
+            self.http = http
         self.xmlns = "http://www.netapp.com/filer/admin"
         self.nmsdk_version = version
         self.nmsdk_language = "python"
         self.nmsdk_app = "Nidhogg"
+        #: functions called with an :class:`~nidhogg.compatible.ApiCallEvent` after every API call of this object
+        self.instruments = []
+
+    def __enter__(self):
+        """Use the connection as context manager, see :py:meth:`close`."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the connection when leaving the context."""
+        self.close()
+
+    def close(self):
+        """Close all pooled HTTP connections to the filer.
+
+        The object must not be used afterwards.
+        """
+        self.http.close()
+
+    def invalidate_cache(self, *tags):
+        """Remove cached results of this object, see :class:`~nidhogg.cache.cached_method`.
+
+        :param tags: remove only the results depending on one of these tags *(aspect, volume)*,
+            i.e. ``(QUOTA, "vol1")``; all results if no tags are given
+        :type tags: tuple
+        """
+        for cache in list(self.__dict__.get("_caches", {}).values()):
+            if tags:
+                cache.invalidate_tags(tags)
+            else:
+                cache.invalidate()
+
+    def invalidate_volume(self, volume):
+        """Remove the cached results depending on the volume, i.e. after it was changed by another client.
+
+        :param volume: name of the volume
+        :type volume: str
+        """
+        self.invalidate_cache((QUOTA, volume), (SPACE, volume))
 
     def __getattr__(self, api):
         """Try to invoke unimplemented API calls directly."""
@@ -79,132 +387,241 @@ class Nidhogg(with_metaclass(ABCMeta)):
 
     def _do(self, api, **kwargs):
         """Invoke wrapper, returns a xmldict."""
-        # replace _ -> -
-        params = underline_to_dash(kwargs)
-        req = self._create_request(**{api.replace("_", "-"): params})
-        logger.debug("request: {0}".format(req))
-        r = self.http.invoke_request(req)
-        logger.debug("response: {0}".format(r))
+        start = default_timer()
+        req = self._create_request(api, kwargs)
+        sent = default_timer()
+        status, received, r, records = "error", None, None, None
+        sampled = _sample_wire()
         try:
-            self.xmldict = self.http.parse_xml_reply(r)
+            log_wire("request", req, sampled)
+            r = self.http.invoke_request(req)
+            received = default_timer()
+            xmldict = self._parse_xml(r, sampled)
+            records = xmldict["netapp"]["results"].get("num-records")
+            status = "failed"
+            self._check_reply(api, kwargs, xmldict)
+            status = "passed"
+            return xmldict
+        finally:
+            self._emit(api, status, start, sent, received, req, r, records)
+
+    def _parse_reply(self, api, params, r):
+        """Convert the reply of an API call into a xmldict and check its status."""
+        xmldict = self._parse_xml(r)
+        self._check_reply(api, params, xmldict)
+        return xmldict
+
+    def _parse_xml(self, r, sampled=None):
+        """Convert the reply of an API call into a xmldict, *sampled* see :py:func:`log_wire`."""
+        log_wire("response", r, sampled)
+        try:
+            # not stored on the object, the connection may be used by several threads
+            return self.http.parse_xml_reply(r)
         except xml.parsers.expat.ExpatError:
             logger.exception("exception on {}".format(self.vserver))
             raise NidhoggException(r + " (host: {})".format(self.vserver))
 
-        if self.xmldict["netapp"]["results"]['@status'] == "failed":
+    def _check_reply(self, api, params, xmldict):
+        """Raise if the status of the reply is failed."""
+        if xmldict["netapp"]["results"]['@status'] == "failed":
             logger.error("exception on {}".format(self.vserver))
-            logger.error(self.xmldict["netapp"]["results"]['@reason'])
+            logger.error(xmldict["netapp"]["results"]['@reason'])
             logger.error("{0} failed with params {1}".format(api, params))
-            raise NidhoggException(self.xmldict["netapp"]["results"]['@reason'] + " (host: {})".format(self.vserver))
-        return self.xmldict
+            raise NidhoggException(xmldict["netapp"]["results"]['@reason'] + " (host: {})".format(self.vserver))
+
+    def _do_iter(self, api, element, results, **kwargs):
+        """Invoke wrapper for ``*-iter`` calls, yields the records of the attributes-list one by one.
+
+        The reply is parsed while it is read from the network, see :py:meth:`.NidhoggHttp.iter_xml_reply`.
+        The remaining results (i.e. *num-records*, *next-tag*) are stored in *results*.
+        """
+        start = default_timer()
+        req = self._create_request(api, kwargs)
+        sent = default_timer()
+        status, received, records, stats = "error", None, 0, dict()
+        sampled = _sample_wire()
+        try:
+            log_wire("request", req, sampled)
+            r = self.http.invoke_request_stream(req)
+            received = default_timer()
+            try:
+                for item in self.http.iter_xml_reply(r, element, results, stats, keep_body=sampled):
+                    records += 1
+                    yield item
+            except ElementTree.ParseError:
+                logger.exception("exception on {}".format(self.vserver))
+                raise NidhoggException("invalid reply to {0} (host: {1})".format(api, self.vserver))
+
+            status = "failed"
+            if results.get('@status') != "passed":
+                logger.error("exception on {}".format(self.vserver))
+                logger.error(results.get('@reason'))
+                logger.error("{0} failed with params {1}".format(api, kwargs))
+                raise NidhoggException("{0} (host: {1})".format(results.get('@reason'), self.vserver))
+            status = "passed"
+        except GeneratorExit:
+            # the caller stopped iterating, the reply is not read to the end
+            status = "closed"
+            raise
+        finally:
+            if "body" in stats:
+                log_wire("response", stats["body"], sampled)
+            self._emit(api, status, start, sent, received, req, None, records, stats)
+
+    def _emit(self, api, status, start, sent, received, req, r, records, stream=None):
+        """Emit the event of a finished API call to the instruments, see :py:mod:`nidhogg.metrics`.
+
+        The size of a streamed reply and the time spent reading and parsing it are taken from *stream*, see
+        :py:meth:`.NidhoggHttp.iter_xml_reply`.
+        """
+        instruments = metrics.INSTRUMENTS + self.instruments
+        if not instruments:
+            return
+        finished = default_timer()
+        network_time = (received or finished) - sent
+        parse_time = finished - received if received else 0.0
+        bytes_in = None
+        if r is not None:
+            # the size in byte, not of the decoded text
+            bytes_in = len(r) if isinstance(r, bytes) else len(r.encode("utf-8"))
+        if stream:
+            network_time += stream["network_time"]
+            parse_time = stream["parse_time"]
+            bytes_in = stream["bytes"]
+        event = ApiCallEvent(
+            api=api.replace("_", "-"),
+            filer=self.vserver,
+            status=status,
+            duration=finished - start,
+            network_time=network_time,
+            parse_time=parse_time,
+            bytes_out=len(req),
+            bytes_in=bytes_in,
+            records=int(records) if records is not None else None
+        )
+        for instrument in instruments:
+            try:
+                instrument(event)
+            except Exception:
+                # never break the API call
+                logger.exception("instrument {0} failed".format(instrument))
+
+    def _quota_entry_opts(self, volume, qtree):
+        """Return the params identifying the tree quota of the specified qtree."""
+        return dict(
+            volume=volume,
+            qtree="",
+            quota_target="/vol/{0}/{1}".format(volume, qtree),
+            quota_type="tree"
+        )
+
+    def _set_quota_entry_opts(self, volume, qtree, quota_in_mb):
+        quota_in_kb = int(round(quota_in_mb * 1024))
+        opts = dict(
+            disk_limit=quota_in_kb,
+            soft_disk_limit=int(round(quota_in_kb * 0.8)),  # use 80% of the given quota as warn-limit
+        )
+        opts.update(self._quota_entry_opts(volume, qtree))
+        return opts
+
+    def _set_quota_entry(self, volume, qtree, quota_in_mb):
+        return self.quota_set_entry(**self._set_quota_entry_opts(volume, qtree, quota_in_mb))
+
+    def _delete_qtree_opts(self, volume, qtree, force):
+        return dict(force=str(bool(force)), qtree="/vol/{0}/{1}".format(volume, qtree))
+
+    #
+    # conversion of the API results, shared with the asynchronous API (see :mod:`nidhogg.aio`)
+    #
+    def _clustered_reply(self, results):
+        """Return true if the results of *system-get-version* are sent by a cluster-mode filer."""
+        return 'is-clustered' in results and results['is-clustered'] == "true"
+
+    def _ontapi_version_reply(self, results):
+        """Return the ONTAPI version from the results of *system-get-ontapi-version*."""
+        return "{0}.{1}".format(results['major-version'], results['minor-version'])
+
+    def _has_forcegroup_reply(self, results):
+        """Return true if the results of *system-get-ontapi-version* are sent by ontapi 1.30 and onwards."""
+        return int(results['major-version']) >= 1 and int(results['minor-version']) >= 30
+
+    def _apis_reply(self, results):
+        """Return the API names from the results of *system-api-list*."""
+        return [item["name"] for item in results["apis"]["system-api-info"]]
+
+    def _allocated_quota_size(self, quotas):
+        # only use those where a tree is specified
+        return sum(quota['disk_limit'] for quota in quotas if quota['tree'])
+
+    def _add_allocated_quota(self, sizes, item):
+        """Add the quota of a record of a quota report of all volumes to the sizes per volume."""
+        quota = self._item_to_quota_report(item)
+        # only use those where a tree is specified
+        if quota['tree']:
+            sizes[item['volume']] = sizes.get(item['volume'], 0) + quota['disk_limit']
+
+    def _filter_volumes(self, volumes, filter_volume_names):
+        """Return the volumes with matching volume names, all volumes if no names are specified."""
+        if not filter_volume_names:
+            return list(volumes)
+        matching = []
+        for v in volumes:
+            if v["name"] not in filter_volume_names:
+                logger.debug("filer: {0}, skipped volume '{1}' because not in filter".format(
+                    self.vserver_fqdn,
+                    v["name"])
+                )
+                continue
+            matching.append(v)
+        return matching
+
+    def _data_class(self, cls):
+        """Return the class of the returned data objects, see :py:attr:`compact_records`."""
+        if self.compact_records:
+            return compact_class(cls)
+        return cls
 
     def _item_func(self, key):
-        """dicttoxml list item function."""
+        """Tag name of list items, see :class:`~nidhogg.request.RequestEncoder`."""
         if key == "share-properties":
             return "cifs-share-properties"
         return "item"
 
-    def _create_request(self, **kwargs):
-        xml_request = dicttoxml.dicttoxml(collections.OrderedDict(**kwargs), root=False, attr_type=False, item_func=self._item_func)
-        return """
-            <?xml version='1.0' encoding='utf-8'?>
-            <netapp version='{0.major}.{0.minor}'
-                    xmlns='{0.xmlns}'
-                    nmsdk_version='{0.nmsdk_version}'
-                    nmsdk_language='{0.nmsdk_language}'
-                    nmsdk_app='{0.nmsdk_app}'>
-                {1}
-            </netapp>""".strip().replace("            ", "").format(self, xml_request.decode("utf-8"))
+    @cached_property
+    def _encoder(self):
+        """Request encoder of this object, the envelope is rendered on first use."""
+        envelope = ENVELOPE.format(
+            major=self.major,
+            minor=self.minor,
+            xmlns=self.xmlns,
+            nmsdk_version=self.nmsdk_version,
+            nmsdk_language=self.nmsdk_language,
+            nmsdk_app=self.nmsdk_app
+        )
+        return RequestEncoder(envelope, item_func=self._item_func)
+
+    def _create_request(self, api, params):
+        """Encode the API call with its parameters into an XML request, see :class:`~nidhogg.request.RequestEncoder`."""
+        return self._encoder.encode(api, params)
 
     def _item_to_quota(self, item):
         """Convert to byte (API returns sizes in kbyte) to be consistent with other sizes (i.e. volume info)."""
-        return Quota(
-            disk_limit=float(item['disk-limit']) * 1024 if item['disk-limit'].isdigit() else -1,
-            soft_disk_limit=float(item['soft-disk-limit']) * 1024 if item['soft-disk-limit'].isdigit() else -1,
-            threshold=float(item['threshold']) * 1024 if item['threshold'].isdigit() else -1,
-            file_limit=float(item['file-limit']) if item['file-limit'].isdigit() else -1,
-            soft_file_limit=float(item['soft-file-limit']) if item['soft-file-limit'].isdigit() else -1,
-        )
+        return TO_QUOTA.build(self._data_class(Quota), item)
 
     def _item_to_quota_report(self, item):
-        return QuotaReport(
-            disk_used=float(item['disk-used']) * 1024 if item['disk-used'].isdigit() else -1,
-            disk_limit=float(item['disk-limit']) * 1024 if item['disk-limit'].isdigit() else -1,
-            soft_disk_limit=float(item['soft-disk-limit']) * 1024 if item['soft-disk-limit'].isdigit() else -1,
-            threshold=float(item['threshold']) * 1024 if item['threshold'].isdigit() else -1,
-            files_used=float(item['files-used']) if item['files-used'].isdigit() else -1,
-            file_limit=float(item['file-limit']) if item['file-limit'].isdigit() else -1,
-            soft_file_limit=float(item['soft-file-limit']) if item['soft-file-limit'].isdigit() else -1,
-            quota_target=item['quota-target'],
-            tree=item['tree'],
-        )
+        return TO_QUOTA_REPORT.build(self._data_class(QuotaReport), item)
 
     def _item_to_qtree(self, item):
-        return QTree(
-            qtree=item['qtree'],
-            status=item['status'],
-            security_style=item['security-style'],
-        )
+        return TO_QTREE.build(self._data_class(QTree), item)
+
+    def _item_to_snapshot(self, item):
+        return self._data_class(Snapshot)(name=item['name'])
 
     def _item_to_snapmirrorstatus(self, item):
-        return SnapmirrorStatus(
-            # 7mode and cluster mode
-            source_location=item["source-location"],
-            destination_location=item["destination-location"],
-            lag_time=item["lag-time"],
-            last_transfer_from=item["last-transfer-from"],
-            last_transfer_size=item["last-transfer-size"],
-            last_transfer_duration=item["last-transfer-duration"],
-            last_transfer_type=item['last-transfer-type'] if 'last-transfer-type' in item else None,
-            # sevenmode
-            status=item["status"] if 'status' in item else None,
-            transfer_progress=item["transfer-progress"] if 'transfer-progress' in item else None,
-            mirror_timestamp=item["mirror-timestamp"] if 'mirror-timestamp' in item else None,
-            contents=item["contents"] if 'contents' in item else None,
-            state=item["state"] if 'state' in item else None,
-            # sevenmode optional
-            base_snapshot=item['base-snapshot'] if 'base-snapshot' in item else None,
-            current_transfer_error=item['current-transfer-error'] if 'current-transfer-error' in item else None,
-            current_transfer_type=item['current-transfer-type'] if 'current-transfer-type' in item else None,
-            inodes_replicated=item['inodes-replicated'] if 'inodes-replicated' in item else None,
-            replication_ops=item['replication-ops'] if 'replication-ops' in item else None,
-            # cluster mode
-            break_failed_count=item['break-failed-count'] if 'break-failed-count' in item else None,
-            break_successful_count=item['break-successful-count'] if 'break-successful-count' in item else None,
-            destination_volume=item['destination-volume'] if 'destination-volume' in item else None,
-            destination_volume_node=item['destination-volume-node'] if 'destination-volume-node' in item else None,
-            destination_vserver=item['destination-vserver'] if 'destination-vserver' in item else None,
-            destination_vserver_uuid=item['destination-vserver-uuid'] if 'destination-vserver-uuid' in item else None,
-            exported_snapshot=item['exported-snapshot'] if 'exported-snapshot' in item else None,
-            exported_snapshot_timestamp=item['exported-snapshot-timestamp'] if 'exported-snapshot-timestamp' in item else None,
-            is_constituent=item['is-constituent'] if 'is-constituent' in item else None,
-            is_healthy=item['is-healthy'] if 'is-healthy' in item else None,
-            last_transfer_end_timestamp=item['last-transfer-end-timestamp'] if 'last-transfer-end-timestamp' in item else None,
-            last_transfer_network_compression_ratio=item['last-transfer-network-compression-ratio'] if 'last-transfer-network-compression-ratio' in item else None,
-            max_transfer_rate=item['max-transfer-rate'] if 'max-transfer-rate' in item else None,
-            mirror_state=item['mirror-state'] if 'mirror-state' in item else None,
-            newest_snapshot=item['newest-snapshot'] if 'newest-snapshot' in item else None,
-            newest_snapshot_timestamp=item['newest-snapshot-timestamp'] if 'newest-snapshot-timestamp' in item else None,
-            opmask=item['opmask'] if 'opmask' in item else None,
-            policy=item['policy'] if 'policy' in item else None,
-            policy_type=item['policy-type'] if 'policy-type' in item else None,
-            relationship_control_plane=item['relationship-control-plane'] if 'relationship-control-plane' in item else None,
-            relationship_group_type=item['relationship-group-type'] if 'relationship-group-type' in item else None,
-            relationship_id=item['relationship-id'] if 'relationship-id' in item else None,
-            relationship_status=item['relationship-status'] if 'relationship-status' in item else None,
-            relationship_type=item['relationship-type'] if 'relationship-type' in item else None,
-            resync_failed_count=item['resync-failed-count'] if 'resync-failed-count' in item else None,
-            resync_successful_count=item['resync-successful-count'] if 'resync-successful-count' in item else None,
-            source_volume=item['source-volume'] if 'source-volume' in item else None,
-            source_vserver=item['source-vserver'] if 'source-vserver' in item else None,
-            source_vserver_uuid=item['source-vserver-uuid'] if 'source-vserver-uuid' in item else None,
-            total_transfer_bytes=item['total-transfer-bytes'] if 'total-transfer-bytes' in item else None,
-            total_transfer_time_secs=item['total-transfer-time-secs'] if 'total-transfer-time-secs' in item else None,
-            update_failed_count=item['update-failed-count'] if 'update-failed-count' in item else None,
-            update_successful_count=item['update-successful-count'] if 'update-successful-count' in item else None,
-            vserver=item['vserver'] if 'vserver' in item else None,
-            # helper state, mapping relationship-status (cluster mode) and status (7mode) to snapmirror-status
-            snapmirror_status=item['relationship-status'].lower() if self.clustered else item["status"].lower(),
+        # helper state, mapping relationship-status (cluster mode) and status (7mode) to snapmirror-status
+        return TO_SNAPMIRROR_STATUS.build(
+            self._data_class(SnapmirrorStatus), item,
+            snapmirror_status=item['relationship-status'].lower() if self.clustered else item["status"].lower()
         )
 
     #
@@ -234,8 +651,7 @@ class Nidhogg(with_metaclass(ABCMeta)):
 
         :rtype: boolean
         """
-        results = self.system_get_version()['netapp']['results']
-        return 'is-clustered' in results and results['is-clustered'] == "true"
+        return self._clustered_reply(self.system_get_version()['netapp']['results'])
 
     @cached_property
     def ontapi_version(self):
@@ -244,10 +660,7 @@ class Nidhogg(with_metaclass(ABCMeta)):
         :return: ontapi version
         :rtype: str
         """
-        # get result
-        result = self.system_get_ontapi_version()['netapp']['results']
-        # split afterwards, does not work the short way ?:|
-        return "{0}.{1}".format(result['major-version'], result['minor-version'])
+        return self._ontapi_version_reply(self.system_get_ontapi_version()['netapp']['results'])
 
     @cached_property
     def has_forcegroup(self):
@@ -260,8 +673,7 @@ class Nidhogg(with_metaclass(ABCMeta)):
         if not self.clustered:
             return True
         # clustermode with ontapi 1.30 and onwards
-        result = self.system_get_ontapi_version()['netapp']['results']
-        return int(result['major-version']) >= 1 and int(result['minor-version']) >= 30
+        return self._has_forcegroup_reply(self.system_get_ontapi_version()['netapp']['results'])
 
     @cached_property
     def apis(self):
@@ -271,10 +683,7 @@ class Nidhogg(with_metaclass(ABCMeta)):
         :rtype: list of str or empty list
         """
         try:
-            return [
-                item["name"]
-                for item in self.system_api_list()["netapp"]["results"]["apis"]["system-api-info"]
-            ]
+            return self._apis_reply(self.system_api_list()["netapp"]["results"])
         except NidhoggException:
             return []
 
@@ -296,6 +705,7 @@ class Nidhogg(with_metaclass(ABCMeta)):
                 vols.append(vol)
         return vols
 
+    @invalidates(depends_on_volume(SPACE))
     def delete_snapshot(self, volume, name):
         """Delete a snapshot.
 
@@ -307,6 +717,7 @@ class Nidhogg(with_metaclass(ABCMeta)):
         """
         return self.snapshot_delete(volume=volume, snapshot=name)
 
+    @invalidates(depends_on_volume(QUOTA))
     def create_qtree(self, volume, qtree, mode="007"):
         """Create a qtree on the specified volume.
 
@@ -320,6 +731,7 @@ class Nidhogg(with_metaclass(ABCMeta)):
         """
         self.qtree_create(volume=volume, qtree=qtree, mode=mode)
 
+    @invalidates(depends_on_volume(QUOTA, SPACE))
     def delete_qtree(self, volume, qtree, force=False):
         """Delete a qtree on the specified volume.
 
@@ -331,7 +743,7 @@ class Nidhogg(with_metaclass(ABCMeta)):
         :type force: bool
         :raises NidhoggException: if an error occurs
         """
-        self.qtree_delete(force=str(bool(force)), qtree="/vol/{0}/{1}".format(volume, qtree))
+        self.qtree_delete(**self._delete_qtree_opts(volume, qtree, force))
 
     def delete_cifs_share(self, share_name):
         """Delete the share with the given name.
@@ -353,12 +765,12 @@ class Nidhogg(with_metaclass(ABCMeta)):
         :rtype: bool
         :raises NidhoggException: if an error occurs
         """
-        return len([qt for qt in self.list_qtrees(volume) if qt['qtree'] == qtree]) > 0
+        return self.get_qtree(volume, qtree) is not None
 
     #
     # cached API functions
     #
-    @lru_cache(maxsize=100)
+    @cached_method(depends=depends_on_volume(QUOTA))
     def get_allocated_quota_size(self, volume):
         """Return the sum of all quotas of the specified volume.
 
@@ -368,10 +780,9 @@ class Nidhogg(with_metaclass(ABCMeta)):
         :rtype: int
         :raises NidhoggException: if an error occurs
         """
-        # only use those where a tree is specified
-        return sum(quota['disk_limit'] for quota in self.list_quotas(volume) if quota['tree'])
+        return self._allocated_quota_size(self.list_quotas(volume))
 
-    @lru_cache(maxsize=100)
+    @cached_method(depends=depends_on_volume(QUOTA, SPACE))
     def get_allocated_quota_ratio(self, volume, volume_size_total=None):
         """Return the ratio *allocated quota size / volume size*.
 
@@ -388,33 +799,322 @@ class Nidhogg(with_metaclass(ABCMeta)):
             return self.get_allocated_quota_size(volume) / volume_size_total
         return self.get_allocated_quota_size(volume) / self.volume_info(volume)["size_total"]
 
-    def get_volumes_with_quota_info(self, filter_volume_names=[]):
+    @cached_method(depends=depends_on_all_volumes(QUOTA))
+    def get_allocated_quota_sizes(self):
+        """Return the sum of all quotas per volume, requested by a single quota report of all volumes.
+
+        :return: sum of all qtree quotas in byte per volume name, volumes without quotas are missing
+        :rtype: dict of str: int
+        :raises NidhoggException: if an error occurs
+        """
+        sizes = dict()
+        for item in self._get_quota_items():
+            self._add_allocated_quota(sizes, item)
+        return sizes
+
+    def list_all_cifs_acls(self):
+        """Return the ACLs of all cifs shares, retrieved by a single iteration instead of one per share.
+
+        :return: list of ACEs (access control entries) per share name, shares without ACEs are missing
+        :rtype: dict of str: list of :class:`~nidhogg.compatible.ACE`
+        :raises NidhoggException: if an error occurs
+        """
+        acls = dict()
+        for ace in self.iter_all_cifs_acls():
+            acls.setdefault(ace["share_name"], []).append(ace)
+        return acls
+
+    def sync_cifs_acls(self, share_name, desired_aces, max_workers=ACL_SYNC_WORKERS):
+        """Set the ACL of the specified share to the desired ACEs (access control entries).
+
+        The current ACL is compared with the desired ACEs: only missing ACEs are created, ACEs with another
+        permission are modified and ACEs not desired are deleted. If nothing changed, no further API call is sent.
+        The calls are sent concurrently by up to *max_workers* threads. A failed change does not stop the others,
+        the outcome of every change is returned.
+
+        :param share_name: name of the share
+        :type share_name: str
+        :param desired_aces: desired ACEs, dictionaries with the keys *user_or_group*, *permission* and optionally
+            *is_group* (see param *set_group_rights* of *set_cifs_acl*) or on cluster-mode filers *user_group_type*,
+            i.e. ACEs of another share
+        :type desired_aces: list of dict
+        :param max_workers: max. number of concurrent API calls
+        :type max_workers: int
+        :return: created, modified and deleted ACEs and the failed changes
+        :rtype: :class:`~nidhogg.compatible.AclChanges`
+        :raises NidhoggException: if a desired permission is not valid, before any ACE is changed
+        :raises NidhoggException: if the current ACL can not be read
+        """
+        changes = self._cifs_acl_changes(self.iter_cifs_acls(share_name), desired_aces)
+        calls = self._cifs_acl_calls(share_name, changes)
+        errors = self._run_concurrently([functools.partial(_error_of, call) for _, _, call in calls], max_workers)
+        return _acl_outcome(calls, errors)
+
+    def _run_concurrently(self, calls, max_workers):
+        """Run the calls by up to *max_workers* threads, return their results in the order of the calls."""
+        if len(calls) <= 1 or max_workers <= 1:
+            return [call() for call in calls]
+        pool = ThreadPool(min(max_workers, len(calls)))
+        try:
+            return pool.map(_call, calls)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _ace_key(self, ace):
+        """Return the identity of an ACE within the ACL of a share."""
+        return ace["user_or_group"]
+
+    def _cifs_acl_changes(self, current_aces, desired_aces):
+        desired = collections.OrderedDict()
+        for ace in desired_aces:
+            if ace["permission"] not in self.ACL_PERMISSIONS:
+                raise NidhoggException("Permission {0} not in {1}.".format(ace["permission"], self.ACL_PERMISSIONS))
+            desired[self._ace_key(ace)] = ace
+        current = collections.OrderedDict((self._ace_key(ace), ace) for ace in current_aces)
+        return AclChanges(
+            failed=[],
+            created=[ace for key, ace in desired.items() if key not in current],
+            modified=[
+                ace for key, ace in desired.items()
+                if key in current and current[key]["permission"] != ace["permission"]
+            ],
+            deleted=[ace for key, ace in current.items() if key not in desired],
+        )
+
+    def _cifs_acl_calls(self, share_name, changes):
+        # tuples (change, ace, call), the calls do not depend on each other, they can be sent in any order
+        functions = dict(created=self._create_cifs_ace, modified=self._modify_cifs_ace, deleted=self._delete_cifs_ace)
+        return [
+            (change, ace, functools.partial(functions[change], share_name, ace))
+            for change in ("created", "modified", "deleted") for ace in changes[change]
+        ]
+
+    def _create_cifs_ace(self, share_name, ace):
+        return self.set_cifs_acl(
+            share_name, user=ace["user_or_group"], right=ace["permission"], set_group_rights=ace.get("is_group")
+        )
+
+    def _modify_cifs_ace(self, share_name, ace):
+        return self._create_cifs_ace(share_name, ace)
+
+    def _delete_cifs_ace(self, share_name, ace):
+        return self.delete_cifs_acl(share_name, ace["user_or_group"], is_group=ace["is_group"])
+
+    def resize_quotas(self, volume, timeout=None, qtrees=None):
+        """Start a resize of the quotas of the specified volume, i.e. after changing quota entries.
+
+        :param volume: name of the volume
+        :type volume: str
+        :param timeout: max. time in seconds to wait for the resize, see :class:`QuotaResize`
+        :type timeout: float
+        :param qtrees: names of the changed qtrees, used for logging
+        :type qtrees: list of str
+        :return: handle to wait for the resize
+        :rtype: :class:`QuotaResize`
+        :raises NidhoggException: if an error occurs
+        """
+        self.quota_resize(volume=volume)
+        return QuotaResize(self, volume, timeout=timeout, qtrees=qtrees)
+
+    def _poll_quota_resizes(self, resizes):
+        """Request the status of the unfinished resizes once, see :py:meth:`wait_for_quota_resizes`."""
+        for resize in resizes:
+            resize.done()
+
+    def wait_for_quota_resizes(self, resizes):
+        """Wait until all quota resizes are finished, poll their status with increasing intervals.
+
+        :param resizes: handles of the resizes, see :py:meth:`resize_quotas`
+        :type resizes: list of :class:`QuotaResize`
+        :raises NidhoggException: if an error occurs
+        :raises NidhoggException: if a resize did not finish in time
+        :raises NidhoggException: if quotas are not enabled
+        """
+        interval = QUOTA_RESIZE_POLL_INTERVAL
+        pending = [resize for resize in resizes if not resize.finished]
+        while pending:
+            deadline = min(resize.deadline for resize in pending)
+            sleep(max(0, min(interval, deadline - default_timer())))
+            self._poll_quota_resizes(pending)
+            pending = [resize for resize in pending if not resize.finished]
+            interval = min(interval * 2, QUOTA_RESIZE_WAIT_TIME)
+
+    @invalidates(depends_on_volume(QUOTA))
+    def set_quotas(self, volume, quotas, wait_til_finished=True, timeout=None):
+        """Set the quotas in MiB of many qtrees on the specified volume, see :py:meth:`set_quota`.
+
+        All quota entries are set first, then the quotas of the volume are resized once.
+
+        :param volume: name of the volume
+        :type volume: str
+        :param quotas: quota in MiB per qtree name
+        :type quotas: dict of str: int
+        :param wait_til_finished: if false, do not wait for resize operation,
+            use :class:`QuotaResize` to wait for it later
+        :type wait_til_finished: bool
+        :param timeout: max. time in seconds to wait for the resize, see :class:`QuotaResize`
+        :type timeout: float
+        :return: per qtree name None if the quota was set, otherwise the exception
+        :rtype: dict of str: :class:`NidhoggException` or None
+        :raises NidhoggException: if the resize failed or did not finish in time and we were waiting for it
+        :raises NidhoggException: if quotas are not enabled
+        """
+        results = dict()
+        for qtree, quota_in_mb in quotas.items():
+            try:
+                self._set_quota_entry(volume, qtree, quota_in_mb)
+                results[qtree] = None
+            except NidhoggException as e:
+                results[qtree] = e
+        qtrees = [qtree for qtree, error in results.items() if error is None]
+        if qtrees:
+            resize = self.resize_quotas(volume, timeout=timeout, qtrees=qtrees)
+            if wait_til_finished:
+                resize.wait()
+        return results
+
+    def provision_homes(self, homes, max_workers=PROVISION_WORKERS, timeout=None):
+        """Provision many homes, each a qtree with quota, cifs share and ACL.
+
+        The steps of a home run one after another, the homes are provisioned concurrently by up to *max_workers*
+        threads. The quotas of a volume are resized once, after the quota entries of all its homes are set.
+        If a step of a home fails, the completed steps of this home are rolled back before the resize: the share,
+        the quota entry and the qtree are deleted. The other homes are not affected. If the resize of a volume fails,
+        its homes are rolled back and the volume is resized again to deactivate their deleted quota entries.
+
+        A home is a dictionary with the keys
+
+        * *volume* and *qtree*: name of the volume and of the qtree to be created,
+        * *mode* (optional): initial file system permissions of the qtree, default "007",
+        * *quota_in_mb* (optional): quota of the qtree in MiB, no quota if not specified,
+        * *share_name* (optional): name of the cifs share of the qtree, no share if not specified,
+        * *share_options* (optional): further params of *create_cifs_share*, i.e. *group_name* or *comment*,
+        * *aces* (optional): ACEs set on the share, dictionaries with the keys *user_or_group*, *permission* and
+          optionally *is_group* (see param *set_group_rights* of *set_cifs_acl*).
+
+        :param homes: homes to be provisioned
+        :type homes: list of dict
+        :param max_workers: max. number of homes provisioned concurrently
+        :type max_workers: int
+        :param timeout: max. time in seconds to wait for the resizes, see :class:`QuotaResize`
+        :type timeout: float
+        :return: results in the order of the homes
+        :rtype: list of :class:`~nidhogg.compatible.ProvisionResult`
+        """
+        results = self._run_concurrently(
+            [functools.partial(self._provision_home, home) for home in homes], max_workers
+        )
+        # roll back first, the resize would activate the quota entries of the failed homes
+        failed = [result for result in results if result["error"] is not None and result["steps"]]
+        self._run_concurrently([functools.partial(self._rollback_home, result) for result in failed], max_workers)
+        # one resize per volume for the quota entries of all its homes
+        volumes = _quota_homes_by_volume(result for result in results if result["error"] is None)
+        failed = _set_resize_errors(volumes, self._resize_provisioned_quotas(volumes, timeout))
+        if failed:
+            self._run_concurrently([functools.partial(self._rollback_home, result) for result in failed], max_workers)
+            # resize again to deactivate the deleted quota entries
+            volumes = _quota_homes_by_volume(failed)
+            _set_rollback_errors(volumes, self._resize_provisioned_quotas(volumes, timeout))
+        for volume in set(home["volume"] for home in homes):
+            self.invalidate_volume(volume)
+        return results
+
+    def _provision_home(self, home):
+        result = ProvisionResult(home=home, steps=[], error=None, rollback_error=None)
+        try:
+            volume, qtree, share_name = home["volume"], home["qtree"], home.get("share_name")
+            self.create_qtree(volume, qtree, mode=home.get("mode", "007"))
+            result["steps"].append("qtree")
+            if home.get("quota_in_mb") is not None:
+                self._set_quota_entry(volume, qtree, home["quota_in_mb"])
+                result["steps"].append("quota")
+            if share_name:
+                self.create_cifs_share(volume, qtree, share_name, **home.get("share_options", {}))
+                result["steps"].append("share")
+                for ace in home.get("aces", []):
+                    self.set_cifs_acl(
+                        share_name, user=ace["user_or_group"], right=ace["permission"],
+                        set_group_rights=ace.get("is_group")
+                    )
+                result["steps"].append("acl")
+        except Exception as e:
+            # also transport errors or an invalid home, the other homes go on
+            result["error"] = e
+        return result
+
+    def _resize_provisioned_quotas(self, volumes, timeout):
+        """Resize the quotas of the volumes (results of their homes), return the exception per failed volume."""
+        errors, resizes = dict(), dict()
+        for volume, results in volumes.items():
+            try:
+                qtrees = [result["home"]["qtree"] for result in results]
+                resizes[volume] = self.resize_quotas(volume, timeout=timeout, qtrees=qtrees)
+            except Exception as e:
+                errors[volume] = e
+        try:
+            self.wait_for_quota_resizes(list(resizes.values()))
+        except Exception:
+            # find the failed resizes, finished resizes return immediately
+            for volume, resize in resizes.items():
+                try:
+                    resize.wait()
+                except Exception as e:
+                    errors[volume] = e
+        return errors
+
+    def _rollback_calls(self, result):
+        """Return the calls undoing the completed steps of a failed home in reverse order."""
+        home = result["home"]
+        # the ACL is deleted with the share
+        rollback = dict(
+            share=functools.partial(self.delete_cifs_share, home.get("share_name")),
+            quota=functools.partial(self.delete_quota, home["volume"], home["qtree"]),
+            qtree=functools.partial(self.delete_qtree, home["volume"], home["qtree"], force=True),
+        )
+        return [rollback[step] for step in reversed(result["steps"]) if step in rollback]
+
+    def _rollback_home(self, result):
+        for call in self._rollback_calls(result):
+            try:
+                call()
+            except Exception as e:
+                # go on, but report the first failed step
+                if result["rollback_error"] is None:
+                    result["rollback_error"] = e
+
+    def get_volumes_with_quota_info(self, filter_volume_names=[], single_quota_report=False):
         """Return a list of snapable volumes of type :class:`~nidhogg.compatible.VolumeWithQuotaRatio`.
 
         :param filter_volume_names: consider only volumes that are in this list
         :type filter_volume_names: list of str
+        :param single_quota_report: if true, request the quotas of all volumes by one quota report
+            (see :py:meth:`get_allocated_quota_sizes`) instead of one quota report per volume, the *quota_ratio*
+            of a volume without size is None
+        :type single_quota_report: bool
         :return: list of project home volumes
         :rtype: list of :class:`~nidhogg.compatible.VolumeWithQuotaRatio`
         :raises NidhoggException: if an error occurs
         """
+        quota_sizes = self.get_allocated_quota_sizes() if single_quota_report else None
         volumes = []
         # get all volumes with type "rw"
-        for v in self.list_snapable_volumes():
-            # return only volumes with matching volume names if specified
-            if filter_volume_names:
-                if v["name"] not in filter_volume_names:
-                    logger.debug("filer: {0}, skipped volume '{1}' because not in filter".format(
-                        self.vserver_fqdn,
-                        v["name"])
-                    )
-                    continue
-            project_volume = VolumeWithQuotaRatio(
-                quota_size=self.get_allocated_quota_size(volume=v["name"]),
-                quota_ratio=self.get_allocated_quota_ratio(
-                    volume=v["name"],
-                    volume_size_total=v["size_total"]),
-                **v
-            )
+        for v in self._filter_volumes(self.list_snapable_volumes(), filter_volume_names):
+            if quota_sizes is not None:
+                quota_size = quota_sizes.get(v["name"], 0)
+                project_volume = self._data_class(VolumeWithQuotaRatio)(
+                    quota_size=quota_size,
+                    quota_ratio=_quota_ratio(quota_size, v["size_total"]),
+                    **v
+                )
+            else:
+                project_volume = self._data_class(VolumeWithQuotaRatio)(
+                    quota_size=self.get_allocated_quota_size(volume=v["name"]),
+                    quota_ratio=self.get_allocated_quota_ratio(
+                        volume=v["name"],
+                        volume_size_total=v["size_total"]),
+                    **v
+                )
             volumes.append(project_volume)
         return volumes
 
@@ -427,19 +1127,11 @@ class Nidhogg(with_metaclass(ABCMeta)):
         :rtype: list of :class:`~nidhogg.compatible.Volume`
         :raises NidhoggException: if an error occurs
         """
-        volumes = []
         # get all volumes with type "rw"
-        for v in self.list_snapable_volumes():
-            # return only volumes with matching volume names
-            if filter_volume_names:
-                if v["name"] not in filter_volume_names:
-                    logger.debug("filer: {0}, skipped volume '{1}' because not in filter".format(
-                        self.vserver_fqdn,
-                        v["name"])
-                    )
-                    continue
-            volumes.append(Volume(**v))
-        return volumes
+        return [
+            self._data_class(Volume)(**v)
+            for v in self._filter_volumes(self.list_snapable_volumes(), filter_volume_names)
+        ]
 
     #
     # API FUNCTIONS implemented in subclasses
@@ -453,6 +1145,18 @@ class Nidhogg(with_metaclass(ABCMeta)):
         """
         pass    # pragma: no cover
 
+    def iter_qtrees(self, *args, **kwargs):
+        """Return a generator of qtrees, see :py:meth:`list_qtrees`.
+
+        By default the qtrees of :py:meth:`list_qtrees` are yielded,
+        sub classes retrieve them while iterating.
+
+        * Go to :py:meth:`~.SevenMode.iter_qtrees` (SevenMode)
+        * Go to :py:meth:`~.ClusterMode.iter_qtrees` (ClusterMode)
+        """
+        for item in self.list_qtrees(*args, **kwargs):
+            yield item
+
     @abstractmethod
     def list_volumes(self, *args, **kwargs):
         """See sub classes.
@@ -462,6 +1166,18 @@ class Nidhogg(with_metaclass(ABCMeta)):
         """
         pass    # pragma: no cover
 
+    def iter_volumes(self, *args, **kwargs):
+        """Return a generator of volumes, see :py:meth:`list_volumes`.
+
+        By default the volumes of :py:meth:`list_volumes` are yielded,
+        sub classes retrieve them while iterating.
+
+        * Go to :py:meth:`~.SevenMode.iter_volumes` (SevenMode)
+        * Go to :py:meth:`~.ClusterMode.iter_volumes` (ClusterMode)
+        """
+        for item in self.list_volumes(*args, **kwargs):
+            yield item
+
     @abstractmethod
     def volume_info(self, *args, **kwargs):
         """See sub classes.
@@ -480,6 +1196,18 @@ class Nidhogg(with_metaclass(ABCMeta)):
         """
         pass    # pragma: no cover
 
+    def iter_snapshots(self, *args, **kwargs):
+        """Return a generator of snapshots, see :py:meth:`list_snapshots`.
+
+        By default the snapshots of :py:meth:`list_snapshots` are yielded,
+        sub classes retrieve them while iterating.
+
+        * Go to :py:meth:`~.SevenMode.iter_snapshots` (SevenMode)
+        * Go to :py:meth:`~.ClusterMode.iter_snapshots` (ClusterMode)
+        """
+        for item in self.list_snapshots(*args, **kwargs):
+            yield item
+
     @abstractmethod
     def get_quota(self, *args, **kwargs):
         """See sub classes.
@@ -489,6 +1217,27 @@ class Nidhogg(with_metaclass(ABCMeta)):
         """
         pass    # pragma: no cover
 
+    def get_qtree(self, volume, qtree):
+        """Return the specified qtree.
+
+        By default the qtrees of :py:meth:`list_qtrees` are scanned, sub classes query the qtree or cache the qtrees.
+
+        * Go to :py:meth:`~.SevenMode.get_qtree` (SevenMode)
+        * Go to :py:meth:`~.ClusterMode.get_qtree` (ClusterMode)
+
+        :param volume: name of the volume
+        :type volume: str
+        :param qtree: name of the qtree
+        :type qtree: str
+        :return: the qtree or None if it does not exist
+        :rtype: :class:`~nidhogg.compatible.QTree`
+        :raises NidhoggException: if an error occurs
+        """
+        for item in self.list_qtrees(volume):
+            if item["qtree"] == qtree:
+                return item
+        return None
+
     @abstractmethod
     def list_quotas(self, *args, **kwargs):
         """See sub classes.
@@ -498,6 +1247,18 @@ class Nidhogg(with_metaclass(ABCMeta)):
         """
         pass    # pragma: no cover
 
+    def iter_quotas(self, *args, **kwargs):
+        """Return a generator of quota reports, see :py:meth:`list_quotas`.
+
+        By default the quota reports of :py:meth:`list_quotas` are yielded,
+        sub classes retrieve them while iterating.
+
+        * Go to :py:meth:`~.SevenMode.iter_quotas` (SevenMode)
+        * Go to :py:meth:`~.ClusterMode.iter_quotas` (ClusterMode)
+        """
+        for item in self.list_quotas(*args, **kwargs):
+            yield item
+
     @abstractmethod
     def list_cifs_shares(self, *args, **kwargs):
         """See sub classes.
@@ -507,6 +1268,18 @@ class Nidhogg(with_metaclass(ABCMeta)):
         """
         pass    # pragma: no cover
 
+    def iter_cifs_shares(self, *args, **kwargs):
+        """Return a generator of cifs shares, see :py:meth:`list_cifs_shares`.
+
+        By default the cifs shares of :py:meth:`list_cifs_shares` are yielded,
+        sub classes retrieve them while iterating.
+
+        * Go to :py:meth:`~.SevenMode.iter_cifs_shares` (SevenMode)
+        * Go to :py:meth:`~.ClusterMode.iter_cifs_shares` (ClusterMode)
+        """
+        for item in self.list_cifs_shares(*args, **kwargs):
+            yield item
+
     @abstractmethod
     def create_cifs_share(self, *args, **kwargs):
         """See sub classes.
@@ -534,6 +1307,30 @@ class Nidhogg(with_metaclass(ABCMeta)):
         """
         pass    # pragma: no cover
 
+    def iter_cifs_acls(self, *args, **kwargs):
+        """Return a generator of ACEs (access control entries), see :py:meth:`list_cifs_acls`.
+
+        By default the ACEs (access control entries) of :py:meth:`list_cifs_acls` are yielded,
+        sub classes retrieve them while iterating.
+
+        * Go to :py:meth:`~.SevenMode.iter_cifs_acls` (SevenMode)
+        * Go to :py:meth:`~.ClusterMode.iter_cifs_acls` (ClusterMode)
+        """
+        for item in self.list_cifs_acls(*args, **kwargs):
+            yield item
+
+    def iter_all_cifs_acls(self):
+        """Return a generator of the ACEs of all cifs shares, see :py:meth:`list_all_cifs_acls`.
+
+        By default the ACLs are requested share by share, sub classes retrieve them by a single iteration.
+
+        * Go to :py:meth:`~.SevenMode.iter_all_cifs_acls` (SevenMode)
+        * Go to :py:meth:`~.ClusterMode.iter_all_cifs_acls` (ClusterMode)
+        """
+        for share in self.list_cifs_shares():
+            for ace in self.iter_cifs_acls(share["share_name"]):
+                yield ace
+
     @abstractmethod
     def delete_cifs_acl(self, *args, **kwargs):
         """See sub classes.
@@ -597,6 +1394,18 @@ class Nidhogg(with_metaclass(ABCMeta)):
         """
         pass    # pragma: no cover
 
+    def iter_snapmirror_status(self, *args, **kwargs):
+        """Return a generator of snapmirror pair status, see :py:meth:`get_snapmirror_status`.
+
+        By default the snapmirror pair status of :py:meth:`get_snapmirror_status` are yielded,
+        sub classes retrieve them while iterating.
+
+        * Go to :py:meth:`~.SevenMode.iter_snapmirror_status` (SevenMode)
+        * Go to :py:meth:`~.ClusterMode.iter_snapmirror_status` (ClusterMode)
+        """
+        for item in self.get_snapmirror_status(*args, **kwargs):
+            yield item
+
     @abstractmethod
     def get_snapmirror_volume_status(self, *args, **kwargs):
         """See sub classes.
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import logging
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer
+
+import nidhogg     # this style needed for patching
+
+from .compatible import FilerResult
+from .http import POOL_MAXSIZE
+
+
+logger = logging.getLogger(__name__)
+
+
+#: default number of filers requested concurrently
+MAX_WORKERS = 8
+
+
+class Fleet(object):
+    """Run API calls on many filers concurrently.
+
+    Every call is sent to all filers of the fleet by a bounded pool of worker threads. The results are returned
+    per filer, a failing filer does not abort the call on the other filers.
+
+    Example:
+
+    .. code-block:: python
+
+        from nidhogg.fleet import Fleet
+
+        with Fleet(["filer01.example.com", "filer02.example.com"], "<username>", "<password>") as fleet:
+            for filer, result in fleet.list_volumes().items():
+                if result["error"]:
+                    print("{0} failed after {1:.1f}s: {2}".format(filer, result["duration"], result["error"]))
+                else:
+                    print("{0}: {1} volumes".format(filer, len(result["result"])))
+
+    The connection objects are created on first use and kept open until :py:meth:`close` is called.
+    """
+
+    def __init__(self, filers, username=None, password=None, verify=False, max_workers=MAX_WORKERS, pool_maxsize=POOL_MAXSIZE):
+        """Init fleet.
+
+        :param filers: hostnames of the filers, or tuples *(hostname, username, password)* to use other credentials
+        :type filers: list of str or list of tuple
+        :param username: username to connect to the Netapp API
+        :type username: str
+        :param password: password of the provided user
+        :type password: str
+        :param verify: check SSL certificate
+        :type verify: bool
+        :param max_workers: maximal number of filers requested concurrently
+        :type max_workers: int
+        :param pool_maxsize: number of keep-alive connections per filer
+        :type pool_maxsize: int
+        """
+        self.credentials = collections.OrderedDict()
+        for filer in filers:
+            if isinstance(filer, (tuple, list)):
+                url, filer_username, filer_password = filer
+            else:
+                url, filer_username, filer_password = filer, username, password
+            self.credentials[url] = (filer_username, filer_password)
+        self.verify = verify
+        self.max_workers = max_workers
+        self.pool_maxsize = pool_maxsize
+        self.connections = {}
+
+    def __enter__(self):
+        """Use the fleet as context manager, see :py:meth:`close`."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close all connections when leaving the context."""
+        self.close()
+
+    @property
+    def filers(self):
+        """Hostnames of the filers of the fleet.
+
+        :rtype: list of str
+        """
+        return list(self.credentials)
+
+    def connection(self, filer):
+        """Return the connection object to the filer, connect on first use.
+
+        :param filer: hostname of the filer
+        :type filer: str
+        :return: Nidhogg instance
+        :rtype: :class:`~nidhogg.sevenmode.SevenMode` or :class:`~nidhogg.clustermode.ClusterMode`
+        :raises NidhoggException: if an error occurs
+        """
+        if filer not in self.connections:
+            username, password = self.credentials[filer]
+            self.connections[filer] = nidhogg.get_netapp(
+                filer, username, password, verify=self.verify, pool_maxsize=self.pool_maxsize)
+        return self.connections[filer]
+
+    def close(self):
+        """Close the connections to all filers."""
+        for connection in self.connections.values():
+            connection.close()
+        self.connections = {}
+
+    def _run(self, filer, method, args, kwargs):
+        start = default_timer()
+        result, error = None, None
+        try:
+            connection = self.connection(filer)
+            if callable(method):
+                result = method(connection, *args, **kwargs)
+            else:
+                result = getattr(connection, method)(*args, **kwargs)
+        except Exception as e:
+            logger.warning("{0}: {1} failed: {2}".format(filer, getattr(method, "__name__", method), e))
+            error = e
+        return FilerResult(filer=filer, result=result, error=error, duration=default_timer() - start)
+
+    def call(self, method, *args, **kwargs):
+        """Call a method on all filers concurrently.
+
+        :param method: name of a method of the connection objects (or of an API call), or a function
+            called with the connection object as first argument
+        :type method: str or function
+        :param args: positional arguments of the method
+        :param kwargs: keyword arguments of the method
+        :return: results of all filers, ordered like the filers of the fleet
+        :rtype: ordered dict of hostname: :class:`~nidhogg.compatible.FilerResult`
+        """
+        filers = self.filers
+        pool = ThreadPool(max(1, min(self.max_workers, len(filers))))
+        try:
+            results = pool.map(lambda filer: self._run(filer, method, args, kwargs), filers)
+        finally:
+            pool.close()
+            pool.join()
+        return collections.OrderedDict((result["filer"], result) for result in results)
+
+    def list_volumes(self):
+        """Return the volumes of all filers, see :py:meth:`.SevenMode.list_volumes`.
+
+        :return: list of :class:`~nidhogg.compatible.Volume` per filer
+        :rtype: ordered dict of hostname: :class:`~nidhogg.compatible.FilerResult`
+        """
+        return self.call("list_volumes")
+
+    def get_volumes_with_quota_info(self, filter_volume_names=[]):
+        """Return the snapable volumes with quota info of all filers, see :py:meth:`.Nidhogg.get_volumes_with_quota_info`.
+
+        :param filter_volume_names: consider only volumes that are in this list
+        :type filter_volume_names: list of str
+        :return: list of :class:`~nidhogg.compatible.VolumeWithQuotaRatio` per filer
+        :rtype: ordered dict of hostname: :class:`~nidhogg.compatible.FilerResult`
+        """
+        return self.call("get_volumes_with_quota_info", filter_volume_names=filter_volume_names)
+
+    def get_snapmirror_status(self, volume=None):
+        """Return the snapmirror status of all filers, see :py:meth:`.ClusterMode.get_snapmirror_status`.
+
+        :param volume: name of the volume
+        :type volume: str
+        :return: list of :class:`~nidhogg.compatible.SnapmirrorStatus` per filer
+        :rtype: ordered dict of hostname: :class:`~nidhogg.compatible.FilerResult`
+        """
+        return self.call("get_snapmirror_status", volume=volume)
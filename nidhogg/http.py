@@ -1,21 +1,105 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import threading
+from timeit import default_timer
+from xml.etree import ElementTree
+
 import requests
 import xmltodict
+from requests.adapters import HTTPAdapter
 
 FILER_URL = "/servlets/netapp.servlets.admin.XMLrequest_filer"
 
+#: number of keep-alive connections held open per filer
+POOL_MAXSIZE = 10
+
+
+def _local_name(tag):
+    # strip namespace "{http://www.netapp.com/filer/admin}volume-attributes"
+    return tag.rsplit("}", 1)[-1]
+
+
+def _element_to_dict(element):
+    """Convert an XML element into the same structure xmltodict would return."""
+    children = list(element)
+    if not children:
+        text = element.text.strip() if element.text else None
+        return text or None
+    d = {}
+    for child in children:
+        key = _local_name(child.tag)
+        value = _element_to_dict(child)
+        if key not in d:
+            d[key] = value
+        elif isinstance(d[key], list):
+            d[key].append(value)
+        else:
+            d[key] = [d[key], value]
+    return d
+
+
+class _StreamReader(object):
+    """File-like view of a streamed response body, counts the read bytes and the time spent reading them."""
+
+    def __init__(self, raw, keep_body=False):
+        self.raw = raw
+        self.bytes = 0
+        self.network_time = 0.0
+        self.chunks = [] if keep_body else None
+
+    def read(self, size=-1):
+        start = default_timer()
+        data = self.raw.read(size)
+        self.network_time += default_timer() - start
+        self.bytes += len(data)
+        if self.chunks is not None:
+            self.chunks.append(data)
+        return data
+
 
 class NidhoggHttp(object):
-    """Requests the Netapp API und converts the response into a dictionary."""
+    """Requests the Netapp API und converts the response into a dictionary.
 
-    def __init__(self, url, username, password, verify=False):
+    All requests of a thread share one :class:`requests.Session`, so the TCP connection and the
+    TLS session are reused between API calls (keep-alive). Each thread has its own session, see :py:attr:`session`.
+    """
+
+    def __init__(self, url, username, password, verify=False, pool_maxsize=POOL_MAXSIZE):
         """Init object."""
         self.url = url + FILER_URL
         self.username = username
         self.password = password
         self.verify = verify
+        self.pool_maxsize = pool_maxsize
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Session of the calling thread, created on first use.
+
+        :class:`requests.Session` is not thread-safe, every thread calling the filer (i.e. the workers of
+        :py:meth:`~.Nidhogg.provision_homes`) gets its own session and connection pool.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._create_session()
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _create_session(self):
+        session = requests.Session()
+        session.auth = (self.username, self.password)
+        session.verify = self.verify
+        session.headers.update({'Content-Type': 'text/xml; charset="UTF-8"'})
+        # all requests go to the same host, so one pool with several connections is sufficient
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
 
     def parse_xml_reply(self, xmlresponse):
         """Convert XML reply into a dictionary.
@@ -27,6 +111,77 @@ class NidhoggHttp(object):
         """
         return xmltodict.parse(xmlresponse)
 
+    def iter_xml_reply(self, response, element, results, stats=None, keep_body=False):
+        """Parse a streamed XML reply incrementally.
+
+        Yields every *element* of the *attributes-list* as soon as it is read from the response
+        body. The status attributes (*@status*, *@reason*) and the simple values (i.e. *num-records*,
+        *next-tag*) of the results are stored in *results* while parsing.
+
+        :param response: response of :py:meth:`invoke_request_stream`
+        :type response: :class:`requests.Response`
+        :param element: name of the record elements in the attributes-list
+        :type element: str
+        :param results: dictionary to store the results in
+        :type results: dict
+        :param stats: if given, the size of the body in byte (*bytes*) and the time spent reading it (*network_time*)
+            and parsing it (*parse_time*) are stored in this dictionary, the time of the caller between the records
+            is not included
+        :type stats: dict
+        :param keep_body: if true, the body read so far is stored in *stats* too (*body*), i.e. to log it
+        :type keep_body: bool
+        :return: generator of records
+        :rtype: generator of dict
+        :raises xml.etree.ElementTree.ParseError: if the reply is not valid XML
+        """
+        reader = _StreamReader(response.raw, keep_body)
+        path = []
+        attributes_list = None
+        busy, resumed = 0.0, default_timer()
+        try:
+            for event, elem in ElementTree.iterparse(reader, events=("start", "end")):
+                if event == "start":
+                    path.append(_local_name(elem.tag))
+                    if path == ["netapp", "results"]:
+                        results.update(("@" + k, v) for k, v in elem.attrib.items())
+                    elif path == ["netapp", "results", "attributes-list"]:
+                        attributes_list = elem
+                    continue
+                if path[1:] == ["results", "attributes-list", element]:
+                    record = _element_to_dict(elem)
+                    busy, resumed = busy + default_timer() - resumed, None
+                    yield record
+                    resumed = default_timer()
+                    # free already processed records
+                    attributes_list.remove(elem)
+                elif len(path) == 3 and path[1] == "results" and path[2] != "attributes-list":
+                    results[path[2]] = _element_to_dict(elem)
+                path.pop()
+        finally:
+            if resumed is not None:
+                busy += default_timer() - resumed
+            if stats is not None:
+                stats.update(
+                    bytes=reader.bytes,
+                    network_time=reader.network_time,
+                    parse_time=busy - reader.network_time
+                )
+                if keep_body:
+                    stats["body"] = b"".join(reader.chunks)
+            response.close()
+
+    def invoke_request_stream(self, req):
+        """Request the Netapp API and do not read the response body in advance.
+
+        :param req: dictionary of request params
+        :type req: dict
+        :return: Netapp API response, see :py:meth:`iter_xml_reply`
+        :rtype: :class:`requests.Response`
+        """
+        r = self.session.post(self.url, data=req, stream=True)
+        r.raw.decode_content = True
+        return r
+
     def invoke_request(self, req):
         """Request the Netapp API.
 
@@ -35,10 +190,13 @@ class NidhoggHttp(object):
         :return: Netapp API response
         :rtype: str
         """
-        r = requests.post(
-            self.url, auth=(self.username, self.password),
-            data=req,
-            headers={'Content-Type': 'text/xml; charset="UTF-8"'},
-            verify=self.verify
-        )
+        r = self.session.post(self.url, data=req)
         return r.text
+
+    def close(self):
+        """Close all pooled connections to the filer, of the sessions of all threads."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import bisect
+import threading
+
+
+#: instruments called after every API call of all connection objects, see :py:attr:`.Nidhogg.instruments`
+INSTRUMENTS = []
+
+#: default upper bounds in seconds of the duration buckets of :class:`HistogramCollector`
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def register(instrument):
+    """Call the instrument after every API call of all connection objects.
+
+    An instrument is a function (or callable object) called with an :class:`~nidhogg.compatible.ApiCallEvent`.
+    Use :py:attr:`.Nidhogg.instruments` to instrument a single connection object.
+
+    :param instrument: instrument to add
+    :type instrument: function
+    :return: the instrument
+    :rtype: function
+    """
+    if instrument not in INSTRUMENTS:
+        INSTRUMENTS.append(instrument)
+    return instrument
+
+
+def unregister(instrument):
+    """Remove an instrument added by :py:func:`register`.
+
+    :param instrument: instrument to remove
+    :type instrument: function
+    """
+    if instrument in INSTRUMENTS:
+        INSTRUMENTS.remove(instrument)
+
+
+class Histogram(object):
+    """Cumulative histogram of observed values, the buckets are given by their upper bounds."""
+
+    def __init__(self, buckets=BUCKETS):
+        """Init histogram.
+
+        :param buckets: sorted upper bounds of the buckets
+        :type buckets: tuple of float
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Add a value.
+
+        :param value: observed value
+        :type value: float
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self):
+        """Return the number of values less than or equal to the upper bound per bucket.
+
+        :rtype: list of int
+        """
+        counts, total = [], 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class CallStats(object):
+    """Statistics of the calls of one API call on one filer with the same status, see :class:`HistogramCollector`."""
+
+    def __init__(self, buckets=BUCKETS):
+        """Init statistics."""
+        self.duration = Histogram(buckets)
+        self.network_time = 0.0
+        self.parse_time = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.records = 0
+
+    def add(self, event):
+        """Add the event of an API call."""
+        self.duration.observe(event["duration"])
+        self.network_time += event["network_time"]
+        self.parse_time += event["parse_time"]
+        self.bytes_out += event["bytes_out"]
+        self.bytes_in += event["bytes_in"] or 0
+        self.records += event["records"] or 0
+
+
+class HistogramCollector(object):
+    """Instrument collecting the API calls in memory, per API call, filer and status.
+
+    Example:
+
+    .. code-block:: python
+
+        from nidhogg import metrics
+
+        collector = metrics.register(metrics.HistogramCollector())
+        ...
+        for (api, filer, status), stats in collector.hot_calls(5):
+            print("{0} on {1}: {2} calls, {3:.1f}s".format(api, filer, stats.duration.count, stats.duration.sum))
+        print(metrics.export_prometheus(collector))
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        """Init collector.
+
+        :param buckets: upper bounds in seconds of the duration buckets
+        :type buckets: tuple of float
+        """
+        self.buckets = tuple(buckets)
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        """Add the event of an API call, see :class:`~nidhogg.compatible.ApiCallEvent`."""
+        key = (event["api"], event["filer"], event["status"])
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = CallStats(self.buckets)
+            stats.add(event)
+
+    def hot_calls(self, n=10):
+        """Return the API calls with the biggest total duration.
+
+        :param n: number of API calls
+        :type n: int
+        :return: tuples *((api, filer, status), statistics)*, the slowest first
+        :rtype: list of tuple
+        """
+        with self._lock:
+            items = list(self.stats.items())
+        items.sort(key=lambda item: item[1].duration.sum, reverse=True)
+        return items[:n]
+
+    def clear(self):
+        """Remove all collected statistics."""
+        with self._lock:
+            self.stats = {}
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(key, **extra):
+    labels = [("api", key[0]), ("filer", key[1]), ("status", key[2])] + sorted(extra.items())
+    return "{" + ",".join("{0}=\"{1}\"".format(k, _escape_label(v)) for k, v in labels) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_COUNTERS = [
+    ("network_seconds_total", "network_time", "Time waiting for the replies of Netapp API calls."),
+    ("parse_seconds_total", "parse_time", "Time parsing the replies of Netapp API calls."),
+    ("request_bytes_total", "bytes_out", "Size of the requests of Netapp API calls."),
+    ("response_bytes_total", "bytes_in", "Size of the (not streamed) replies of Netapp API calls."),
+    ("records_total", "records", "Records returned by Netapp API calls."),
+]
+
+
+def export_prometheus(collector, prefix="nidhogg_api"):
+    """Return the statistics of the collector in the Prometheus text format.
+
+    :param collector: collector of the API calls
+    :type collector: :class:`HistogramCollector`
+    :param prefix: prefix of the metric names
+    :type prefix: str
+    :return: metrics in the Prometheus text format
+    :rtype: str
+    """
+    with collector._lock:
+        stats = sorted(collector.stats.items(), key=lambda item: item[0])
+    lines = [
+        "# HELP {0}_duration_seconds Duration of Netapp API calls.".format(prefix),
+        "# TYPE {0}_duration_seconds histogram".format(prefix),
+    ]
+    for key, value in stats:
+        histogram = value.duration
+        for bound, count in zip(histogram.buckets, histogram.cumulative_counts()):
+            lines.append("{0}_duration_seconds_bucket{1} {2}".format(prefix, _labels(key, le=_number(bound)), count))
+        lines.append("{0}_duration_seconds_bucket{1} {2}".format(prefix, _labels(key, le="+Inf"), histogram.count))
+        lines.append("{0}_duration_seconds_sum{1} {2}".format(prefix, _labels(key), _number(histogram.sum)))
+        lines.append("{0}_duration_seconds_count{1} {2}".format(prefix, _labels(key), histogram.count))
+    for name, attribute, description in _COUNTERS:
+        lines.append("# HELP {0}_{1} {2}".format(prefix, name, description))
+        lines.append("# TYPE {0}_{1} counter".format(prefix, name))
+        for key, value in stats:
+            lines.append("{0}_{1}{2} {3}".format(prefix, name, _labels(key), _number(getattr(value, attribute))))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import heapq
+import itertools
+import logging
+
+from .core import NidhoggException
+
+
+logger = logging.getLogger(__name__)
+
+
+BY_QUOTA = "quota"      #: rank volumes by the smallest quota ratio, see :class:`~nidhogg.compatible.VolumeWithQuotaRatio`
+BY_SIZE = "size"        #: rank volumes by the biggest free size, see :class:`~nidhogg.compatible.Volume`
+
+
+class VolumeHeap(object):
+    """Candidate volumes ranked in a heap, the best volume first.
+
+    Use it to place many shares in a row without fetching and sorting the volumes again. After a volume was chosen by
+    :py:meth:`allocate`, the allocated size is added to its quota (:py:const:`BY_QUOTA`) or subtracted from its free
+    size (:py:const:`BY_SIZE`) and the volume is ranked again.
+    """
+
+    def __init__(self, volumes, by=BY_QUOTA):
+        """Init heap.
+
+        :param volumes: candidate volumes
+        :type volumes: list of :class:`~nidhogg.compatible.VolumeWithQuotaRatio` or
+            list of :class:`~nidhogg.compatible.Volume`
+        :param by: ranking, :py:const:`BY_QUOTA` or :py:const:`BY_SIZE`
+        :type by: str
+        :raises NidhoggException: if the ranking is unknown
+        """
+        if by not in (BY_QUOTA, BY_SIZE):
+            raise NidhoggException("Ranking {0} not in {1}.".format(by, [BY_QUOTA, BY_SIZE]))
+        self.by = by
+        # the counter keeps the order of volumes with the same rank stable and avoids comparing the volumes
+        self._counter = itertools.count()
+        self._heap = [self._entry(v) for v in volumes]
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        """Number of candidate volumes."""
+        return len(self._heap)
+
+    def _entry(self, volume):
+        if self.by == BY_QUOTA:
+            return (volume["quota_ratio"], next(self._counter), volume)
+        return (-volume["size_available"], next(self._counter), volume)
+
+    def _pop_best(self, filter_func, kwargs):
+        """Pop the best volume passing the filter function, the skipped volumes stay in the heap."""
+        skipped = []
+        try:
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                if not hasattr(filter_func, '__call__') or filter_func(entry[2], **kwargs):
+                    return entry[2]
+                skipped.append(entry)
+            raise NidhoggException("No volume available.")
+        finally:
+            for entry in skipped:
+                heapq.heappush(self._heap, entry)
+
+    def best(self, filter_func=None, **kwargs):
+        """Return the best volume without allocating space on it.
+
+        :param filter_func: filter function applied before, see :py:func:`~nidhogg.get_best_volume_by_quota`
+        :type filter_func: function
+        :return: best volume
+        :rtype: :class:`~nidhogg.compatible.VolumeWithQuotaRatio` or :class:`~nidhogg.compatible.Volume`
+        :raises NidhoggException: if no volume is available
+        """
+        volume = self._pop_best(filter_func, kwargs)
+        heapq.heappush(self._heap, self._entry(volume))
+        return volume
+
+    def allocate(self, size, filter_func=None, **kwargs):
+        """Return the best volume and allocate the given size on it.
+
+        :param size: allocated size in byte
+        :type size: int
+        :param filter_func: filter function applied before, see :py:func:`~nidhogg.get_best_volume_by_quota`
+        :type filter_func: function
+        :return: best volume, updated with the allocated size
+        :rtype: :class:`~nidhogg.compatible.VolumeWithQuotaRatio` or :class:`~nidhogg.compatible.Volume`
+        :raises NidhoggException: if no volume is available
+        """
+        volume = self._pop_best(filter_func, kwargs)
+        if self.by == BY_QUOTA:
+            volume["quota_size"] += size
+            volume["quota_ratio"] = volume["quota_size"] / volume["size_total"]
+        else:
+            volume["size_available"] -= size
+        heapq.heappush(self._heap, self._entry(volume))
+        return volume
+
+    def top(self, k, filter_func=None, **kwargs):
+        """Return the k best volumes without allocating space on them.
+
+        :param k: number of volumes
+        :type k: int
+        :param filter_func: filter function applied before, see :py:func:`~nidhogg.get_best_volume_by_quota`
+        :type filter_func: function
+        :return: best volumes, the best first
+        :rtype: list of :class:`~nidhogg.compatible.VolumeWithQuotaRatio` or
+            list of :class:`~nidhogg.compatible.Volume`
+        """
+        entries = self._heap
+        if hasattr(filter_func, '__call__'):
+            entries = [entry for entry in entries if filter_func(entry[2], **kwargs)]
+        return [entry[2] for entry in heapq.nsmallest(k, entries)]
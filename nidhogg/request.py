@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+# Python 2 and 3
+from six import text_type
+
+
+#: envelope of every request, filled once per connection object
+ENVELOPE = (
+    "<?xml version='1.0' encoding='utf-8'?>\n"
+    "<netapp version='{major}.{minor}' xmlns='{xmlns}' nmsdk_version='{nmsdk_version}' "
+    "nmsdk_language='{nmsdk_language}' nmsdk_app='{nmsdk_app}'>"
+)
+
+_ESCAPES = [("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&apos;")]
+
+# tag names of all keys seen so far, the same keys are sent again and again
+_TAGS = {}
+
+
+def tag(key):
+    """Return the XML tag name of a parameter name, Netapp API uses "-" instead of "_".
+
+    :param key: name of the API call or parameter
+    :type key: str
+    :return: tag name
+    :rtype: str
+    """
+    name = _TAGS.get(key)
+    if name is None:
+        name = _TAGS.setdefault(key, key.replace("_", "-"))
+    return name
+
+
+def escape(value):
+    """Convert a parameter value to escaped XML text.
+
+    :param value: parameter value
+    :type value: str, int, bool or None
+    :return: XML text
+    :rtype: str
+    """
+    if value is None:
+        return ""
+    if value is True or value is False:
+        return "true" if value else "false"
+    text = text_type(value)
+    for char, entity in _ESCAPES:
+        if char in text:
+            text = text.replace(char, entity)
+    return text
+
+
+def _item_tag(key):
+    return "item"
+
+
+class RequestEncoder(object):
+    """Encode API calls into XML requests.
+
+    The envelope is rendered once and the opening and closing tags are compiled once per API call,
+    only the parameters are serialized per request. Parameter names may use "_" instead of "-".
+    Lists are serialized as elements named by *item_func*, called with the tag name of the list.
+
+    Example:
+
+    .. code-block:: python
+
+        encoder = RequestEncoder(ENVELOPE.format(major=1, minor=21, ...))
+        encoder.encode("volume_get_iter", dict(max_records=100))
+    """
+
+    def __init__(self, envelope, item_func=_item_tag):
+        """Init encoder.
+
+        :param envelope: opening tag of the envelope, see :py:const:`ENVELOPE`
+        :type envelope: str
+        :param item_func: function returning the tag name of list items
+        :type item_func: function
+        """
+        self.envelope = envelope
+        self.item_func = item_func
+        self._templates = {}
+
+    def template(self, api):
+        """Return the compiled opening and closing part of the requests of the API call.
+
+        :param api: name of the API call
+        :type api: str
+        :return: opening and closing part
+        :rtype: tuple of str
+        """
+        template = self._templates.get(api)
+        if template is None:
+            name = tag(api)
+            template = self._templates.setdefault(api, (
+                "{0}<{1}>".format(self.envelope, name),
+                "</{0}></netapp>".format(name)
+            ))
+        return template
+
+    def encode(self, api, params):
+        """Encode an API call.
+
+        :param api: name of the API call
+        :type api: str
+        :param params: parameters of the API call, nested dictionaries and lists
+        :type params: dict
+        :return: UTF-8 encoded XML request
+        :rtype: bytes
+        """
+        head, tail = self.template(api)
+        parts = [head]
+        self._append_dict(parts, params)
+        parts.append(tail)
+        return "".join(parts).encode("utf-8")
+
+    def _append_dict(self, parts, params):
+        for key, value in params.items():
+            name = tag(key)
+            parts.append("<{0}>".format(name))
+            self._append_value(parts, name, value)
+            parts.append("</{0}>".format(name))
+
+    def _append_value(self, parts, name, value):
+        if isinstance(value, dict):
+            self._append_dict(parts, value)
+        elif isinstance(value, (list, tuple)):
+            item = self.item_func(name)
+            for v in value:
+                parts.append("<{0}>".format(item))
+                self._append_value(parts, item, v)
+                parts.append("</{0}>".format(item))
+        else:
+            parts.append(escape(value))
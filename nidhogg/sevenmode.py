@@ -1,22 +1,42 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
-try:
-    # py2
-    from backports.functools_lru_cache import lru_cache
-except ImportError:     # pragma: no cover
-    # py3
-    from functools import lru_cache
-
-from time import sleep
+from .cache import QUOTA, SPACE, cached_method, depends_on_all_volumes, depends_on_volume, invalidates
 from .core import Nidhogg, NidhoggException
-import nidhogg.core     # this style needed for patching
-from .compatible import Volume, Snapshot, ACE, SnapmirrorVolumeStatus, CifsShare
-from .utils import safe_get
+from .compatible import Volume, ACE, SnapmirrorVolumeStatus, CifsShare
+from .converter import Converter, to_bool, to_float
+from .utils import as_list, safe_get
 
 import logging
 logger = logging.getLogger(__name__)
 
+#: number of records requested per ``*-iter-next`` call
+BATCH_SIZE = 1000
+
+#: converters of the API records, see :class:`~nidhogg.converter.Converter`
+TO_VOLUME = Converter({
+    "name": "name",
+    "state": "state",
+    "raid-status": ("snapable", lambda value: "snapmirror" not in value),
+    "size-total": ("size_total", to_float),
+    "size-used": ("size_used", to_float),
+    "size-available": ("size_available", to_float),
+    "files-used": ("files_used", to_float),
+    "files-total": ("files_total", to_float),
+}, defaults=dict(snapable=False), required=["name", "state"], extra=["filer"])
+
+TO_ACE = Converter({
+    "access-rights": "permission",
+}, defaults=dict(user_group_type=None), required=["access-rights"],   # user_group_type not used
+    extra=["share_name", "user_or_group", "is_group"])
+
+TO_SNAPMIRROR_VOLUME_STATUS = Converter({
+    "is-source": ("is_source", to_bool),
+    "is-destination": ("is_destination", to_bool),
+    "is-transfer-in-progress": ("is_transfer_in_progress", to_bool),
+    "is-transfer-broken": ("is_transfer_broken", to_bool),
+}, required=["is-source", "is-destination", "is-transfer-in-progress", "is-transfer-broken"])
+
 
 class SevenMode(Nidhogg):
     """This class implements seven-mode filer specific API calls."""
@@ -37,35 +57,67 @@ class SevenMode(Nidhogg):
         ACL_NO_ACCESS
     ]
 
+    batch_size = BATCH_SIZE     #: number of records requested per ``*-iter-next`` call
+
+    def _iter_tag(self, api, tag, element, item_element):
+        """Yield the records of a ``*-iter-next`` API call batch by batch.
+
+        Requests batches of up to :py:attr:`batch_size` records until the filer returns no records, a batch
+        with less records does not end the iteration because the filer may return less records than requested.
+        The iteration is always ended by ``*-iter-end``, also if an error occurs or the generator is closed.
+
+        :param api: name of the API call without "_next", i.e. "cifs_share_list_iter"
+        :type api: str
+        :param tag: tag returned by the ``*-iter-start`` API call
+        :type tag: str
+        :param element: name of the element containing the records
+        :type element: str
+        :param item_element: name of the record element
+        :type item_element: str
+        :return: generator of records
+        :rtype: generator of dict
+        :raises NidhoggException: if an error occurs
+        """
+        try:
+            while True:
+                results = self._do(api + "_next", tag=tag, maximum=self.batch_size)["netapp"]["results"]
+                items = self._batch_items(results, element, item_element)
+                for item in items:
+                    yield item
+                num_records = int(results["records"]) if "records" in results else len(items)
+                if num_records == 0:
+                    return
+        finally:
+            self._do(api + "_end", tag=tag)
+
+    def _batch_items(self, results, element, item_element):
+        """Return the records of a batch of a ``*-iter-next`` API call, see :py:meth:`_iter_tag`."""
+        return as_list(safe_get(safe_get(results, element), item_element))
+
     def _item_to_volume(self, item):
-        return Volume(
-            name=item['name'],
-            state=item['state'],
-            snapable=True if "raid-status" in item and "snapmirror" not in item['raid-status'] else False,
-            size_total=float(item['size-total']) if "size-total" in item else None,
-            size_used=float(item['size-used']) if "size-used" in item else None,
-            size_available=float(item['size-available']) if "size-available" in item else None,
-            files_used=float(item['files-used']) if "files-used" in item else None,
-            files_total=float(item['files-total']) if "files-total" in item else None,
-            filer=self.vserver_fqdn,
-        )
+        return TO_VOLUME.build(self._data_class(Volume), item, filer=self.vserver_fqdn)
+
+    def _item_to_cifs_share(self, item):
+        return self._data_class(CifsShare)(path=item['mount-point'], share_name=item['share-name'])
+
+    def _acl_info_to_aces(self, acl_info):
+        """Return the ACEs of a record of a ``cifs-share-acl-list-iter-next`` API call."""
+        return [
+            self._item_to_ace(acl_info["share-name"], item)
+            for item in as_list(safe_get(safe_get(acl_info, "user-acl-info"), "access-rights-info"))
+        ]
 
     def _item_to_ace(self, share_name, item):
-        return ACE(
+        is_group = 'user-name' not in item
+        return TO_ACE.build(
+            self._data_class(ACE), item,
             share_name=share_name,
-            user_or_group=item['user-name'] if 'user-name' in item else item['unix-group-name'],
-            permission=item['access-rights'],
-            is_group=False if 'user-name' in item else True,
-            user_group_type=None       # not used
+            user_or_group=item['unix-group-name'] if is_group else item['user-name'],
+            is_group=is_group,
         )
 
     def _item_to_snapmirrorvolumestatus(self, item):
-        return SnapmirrorVolumeStatus(
-            is_source=item["is-source"] == "true",
-            is_destination=item["is-destination"] == "true",
-            is_transfer_in_progress=item["is-transfer-in-progress"] == "true",
-            is_transfer_broken=item["is-transfer-broken"] == "true"
-        )
+        return TO_SNAPMIRROR_VOLUME_STATUS.build(self._data_class(SnapmirrorVolumeStatus), item)
 
     #
     # API FUNCTIONS
@@ -79,21 +131,47 @@ class SevenMode(Nidhogg):
         :rtype: list of :class:`~nidhogg.compatible.QTree` or empty list
         :raises NidhoggException: if an error occurs
         """
-        results = self.qtree_list(volume=volume)["netapp"]["results"]
-        if results.get("qtrees", {}).get("qtree-info", False):
-            if isinstance(results["qtrees"]["qtree-info"], list):
-                return [
-                    self._item_to_qtree(item)
-                    for item in results["qtrees"]["qtree-info"]
-                ]
-            elif isinstance(results["qtrees"]["qtree-info"], dict):
-                return [
-                    self._item_to_qtree(results["qtrees"]["qtree-info"])
-                ]
-        logger.warn("list_qtrees: no entries found")
-        return []
-
-    @lru_cache(maxsize=100)
+        qtrees = list(self.iter_qtrees(volume))
+        if not qtrees:
+            logger.warn("list_qtrees: no entries found")
+        return qtrees
+
+    def iter_qtrees(self, volume):
+        """Return a generator of qtrees, see :py:meth:`list_qtrees`.
+
+        :param volume: name of the volume
+        :type volume: str
+        :return: generator of qtrees
+        :rtype: generator of :class:`~nidhogg.compatible.QTree`
+        :raises NidhoggException: if an error occurs
+        """
+        for qtree in self._qtrees_reply(self.qtree_list(volume=volume)["netapp"]["results"]):
+            yield qtree
+
+    def _qtrees_reply(self, results):
+        return [self._item_to_qtree(item) for item in as_list(results.get("qtrees", {}).get("qtree-info"))]
+
+    def get_qtree(self, volume, qtree):
+        """Return the specified qtree.
+
+        Seven-mode filers can not query a single qtree, the qtrees of the volume are cached per name
+        (see :py:attr:`~.Nidhogg.cache_ttl`) and removed from the cache if a qtree of the volume is created or deleted.
+
+        :param volume: name of the volume
+        :type volume: str
+        :param qtree: name of the qtree
+        :type qtree: str
+        :return: the qtree or None if it does not exist
+        :rtype: :class:`~nidhogg.compatible.QTree`
+        :raises NidhoggException: if an error occurs
+        """
+        return self._qtrees_by_name(volume).get(qtree)
+
+    @cached_method(depends=depends_on_volume(QUOTA))
+    def _qtrees_by_name(self, volume):
+        return dict((qtree["qtree"], qtree) for qtree in self.iter_qtrees(volume))
+
+    @cached_method(depends=depends_on_all_volumes(SPACE))
     def list_volumes(self):
         """Return a list of volumes of type :class:`~nidhogg.compatible.Volume`.
 
@@ -101,21 +179,25 @@ class SevenMode(Nidhogg):
         :rtype: list of :class:`~nidhogg.compatible.Volume` or empty list
         :raises NidhoggException: if an error occurs
         """
-        results = self.volume_list_info()["netapp"]["results"]
-        if results.get("volumes", {}).get("volume-info", False):
-            if isinstance(results['volumes']['volume-info'], list):
-                return [
-                    self._item_to_volume(item)
-                    for item in results['volumes']['volume-info']
-                ]
-            elif isinstance(results['volumes']['volume-info'], dict):
-                return [
-                    self._item_to_volume(results['volumes']['volume-info'])
-                ]
-        logger.warn("list_volumes: no entries found")
-        return []
-
-    @lru_cache(maxsize=100)
+        volumes = list(self.iter_volumes())
+        if not volumes:
+            logger.warn("list_volumes: no entries found")
+        return volumes
+
+    def iter_volumes(self):
+        """Return a generator of volumes, see :py:meth:`list_volumes`.
+
+        :return: generator of volumes
+        :rtype: generator of :class:`~nidhogg.compatible.Volume`
+        :raises NidhoggException: if an error occurs
+        """
+        for volume in self._volumes_reply(self.volume_list_info()["netapp"]["results"]):
+            yield volume
+
+    def _volumes_reply(self, results):
+        return [self._item_to_volume(item) for item in as_list(results.get("volumes", {}).get("volume-info"))]
+
+    @cached_method(depends=depends_on_volume(SPACE))
     def volume_info(self, volume):
         """Return basic information about the volume.
 
@@ -125,7 +207,10 @@ class SevenMode(Nidhogg):
         :rtype: :class:`~nidhogg.compatible.Volume`
         :raises NidhoggException: if an error occurs
         """
-        return self._item_to_volume(self.volume_list_info(volume=volume)["netapp"]["results"]['volumes']['volume-info'])
+        return self._volume_info_reply(self.volume_list_info(volume=volume)["netapp"]["results"])
+
+    def _volume_info_reply(self, results):
+        return self._item_to_volume(results['volumes']['volume-info'])
 
     def list_snapshots(self, target_name, target_type="volume"):
         """Return list of snapshots for given volume.
@@ -138,23 +223,31 @@ class SevenMode(Nidhogg):
         :rtype: list of :class:`~nidhogg.compatible.Snapshot` or empty list
         :raises NidhoggException: if an error occurs
         """
+        snapshots = list(self.iter_snapshots(target_name, target_type))
+        if not snapshots:
+            logger.warn("list_snapshots: no entries found")
+        return snapshots
+
+    def iter_snapshots(self, target_name, target_type="volume"):
+        """Return a generator of snapshots, see :py:meth:`list_snapshots`.
+
+        :param target_name: name of the volume
+        :type target_name: str
+        :param target_type: type of the volume
+        :type target_type: str
+        :return: generator of snapshots
+        :rtype: generator of :class:`~nidhogg.compatible.Snapshot`
+        :raises NidhoggException: if an error occurs
+        """
         opts = dict(
             target_name=target_name,
             target_type=target_type,
         )
-        results = self.snapshot_list_info(**opts)["netapp"]["results"]
-        if results.get("snapshots", {}).get("snapshot-info", False):
-            if isinstance(results['snapshots']['snapshot-info'], list):
-                return [
-                    Snapshot(name=item['name'])
-                    for item in results['snapshots']['snapshot-info']
-                ]
-            elif isinstance(results['snapshots']['snapshot-info'], dict):
-                return [
-                    Snapshot(name=results['snapshots']['snapshot-info']['name'])
-                ]
-        logger.warn("list_snapshots: no entries found")
-        return []
+        for snapshot in self._snapshots_reply(self.snapshot_list_info(**opts)["netapp"]["results"]):
+            yield snapshot
+
+    def _snapshots_reply(self, results):
+        return [self._item_to_snapshot(item) for item in as_list(results.get("snapshots", {}).get("snapshot-info"))]
 
     def get_quota(self, volume, qtree):
         """Return the quota of the specified qtree on the given volume.
@@ -167,13 +260,15 @@ class SevenMode(Nidhogg):
         :rtype: :class:`~nidhogg.compatible.Quota`
         :raises NidhoggException: if an error occurs
         """
-        return self._item_to_quota(
-            self.quota_get_entry(**{
-                'qtree': "",
-                'quota-target': "/vol/{0}/{1}".format(volume, qtree),
-                'quota-type': "tree",
-                'volume': volume})["netapp"]["results"]
-        )
+        return self._item_to_quota(self.quota_get_entry(**self._get_quota_opts(volume, qtree))["netapp"]["results"])
+
+    def _get_quota_opts(self, volume, qtree):
+        return {
+            'qtree': "",
+            'quota-target': "/vol/{0}/{1}".format(volume, qtree),
+            'quota-type': "tree",
+            'volume': volume
+        }
 
     def list_quotas(self, volume):
         """Return a list of quota reports of the specified volume.
@@ -184,34 +279,38 @@ class SevenMode(Nidhogg):
         :rtype: :class:`~nidhogg.compatible.QuotaReport` or empty list
         :raises NidhoggException: if an error occurs
         """
-        results = self.quota_report(volume=volume)["netapp"]["results"]
+        quotas = list(self.iter_quotas(volume))
+        if not quotas:
+            logger.warn("list_quotas: no entries found")
+        return quotas
+
+    def iter_quotas(self, volume):
+        """Return a generator of quota reports, see :py:meth:`list_quotas`.
+
+        :param volume: name of the volume
+        :type volume: str
+        :return: generator of quota reports
+        :rtype: generator of :class:`~nidhogg.compatible.QuotaReport`
+        :raises NidhoggException: if an error occurs
+        """
+        for item in self._get_quota_items(volume):
+            yield self._item_to_quota_report(item)
+
+    def _get_quota_items(self, volume=None):
+        # quota report of all volumes if no volume is specified
+        opts = dict(volume=volume) if volume else dict()
+        return self._quota_report_reply(self.quota_report(**opts)["netapp"]["results"])
+
+    def _quota_report_reply(self, results):
         if "error" in results:
             logger.warn(results["error"]["reason"])
             # TODO: sometimes volume not found, although it exists
             raise NidhoggException(results["error"]["reason"])
-
-        if safe_get(safe_get(results, "quotas"), "quota"):
-            if isinstance(results["quotas"]["quota"], list):
-                return [
-                    self._item_to_quota_report(item)
-                    for item in results["quotas"]["quota"]
-                ]
-            elif isinstance(results["quotas"]["quota"], dict):
-                return [
-                    self._item_to_quota_report(results["quotas"]["quota"])
-                ]
-        logger.warn("list_quotas: no entries found")
-        return []
+        return as_list(safe_get(safe_get(results, "quotas"), "quota"))
 
     def _start_cifs_shares(self):
         return self.cifs_share_list_iter_start()
 
-    def _get_cifs_shares(self, tag):
-        return self.cifs_share_list_iter_next(tag=tag, maximum=1000000)
-
-    def _end_cifs_shares(self, tag):
-        return self.cifs_share_list_iter_end(tag=tag)
-
     def list_cifs_shares(self):
         """List all cifs shares.
 
@@ -219,20 +318,21 @@ class SevenMode(Nidhogg):
         :rtype: list of :class:`~nidhogg.compatible.CifsShare` or empty list
         :raises NidhoggException: if an error occurs
         """
+        shares = list(self.iter_cifs_shares())
+        if not shares:
+            logger.warning("list_cifs_shares: no cifs shares found")
+        return shares
+
+    def iter_cifs_shares(self):
+        """Return a generator of cifs shares, see :py:meth:`list_cifs_shares`.
+
+        :return: generator of cifs shares
+        :rtype: generator of :class:`~nidhogg.compatible.CifsShare`
+        :raises NidhoggException: if an error occurs
+        """
         tag = self._start_cifs_shares()["netapp"]["results"]["tag"]
-        results = self._get_cifs_shares(tag=tag)["netapp"]["results"]
-        self._end_cifs_shares(tag)
-        if int(results['records']) > 1:
-            return [
-                CifsShare(path=item['mount-point'], share_name=item['share-name'])
-                for item in results['cifs-shares']['cifs-share-info']
-            ]
-        elif int(results['records']) == 1:
-            return [
-                CifsShare(path=results['cifs-shares']['cifs-share-info']['mount-point'], share_name=results['cifs-shares']['cifs-share-info']['share-name'])
-            ]
-        logger.warning("list_cifs_shares: cifs shares found")
-        return []
+        for item in self._iter_tag("cifs_share_list_iter", tag, "cifs-shares", "cifs-share-info"):
+            yield self._item_to_cifs_share(item)
 
     def create_cifs_share(self, volume, qtree, share_name, group_name=None, comment=None, umask="007"):
         """Create a cifs share.
@@ -251,6 +351,9 @@ class SevenMode(Nidhogg):
         :type umask: str
         :raises NidhoggException: if an error occurs
         """
+        self.cifs_share_add(**self._cifs_share_opts(volume, qtree, share_name, group_name, comment, umask))
+
+    def _cifs_share_opts(self, volume, qtree, share_name, group_name, comment, umask):
         opts = dict(
             path="/vol/{0}/{1}".format(volume, qtree),
             share_name=share_name,
@@ -260,7 +363,7 @@ class SevenMode(Nidhogg):
             opts['forcegroup'] = group_name
         if comment:
             opts['comment'] = comment
-        self.cifs_share_add(**opts)
+        return opts
 
     def set_cifs_acl(self, share_name, user="everyone", right=ACL_READ, set_group_rights=False):
         """Set a single ACL for the specifed share.
@@ -276,33 +379,43 @@ class SevenMode(Nidhogg):
         :raises NidhoggException: if an error occurs
         :raises NidhoggException: if wrong right was set
         """
+        self.cifs_share_ace_set(**self._cifs_acl_opts(share_name, user, right, set_group_rights))
+
+    def _cifs_acl_opts(self, share_name, user, right, set_group_rights):
         # check permissions
         if right not in self.ACL_PERMISSIONS:
             raise NidhoggException("Permission {0} not in {1}.".format(right, self.ACL_PERMISSIONS))
 
         if set_group_rights:
-            opts = dict(
+            return dict(
                 access_rights=right,
                 share_name=share_name,
                 unix_group_name=user,
                 is_unixgroup="true"
             )
-        else:
-            opts = dict(
-                access_rights=right,
-                share_name=share_name,
-                user_name=user
-            )
-        self.cifs_share_ace_set(**opts)
+        return dict(
+            access_rights=right,
+            share_name=share_name,
+            user_name=user
+        )
+
+    def _ace_key(self, ace):
+        # users and unix groups with the same name are different entries
+        return ace["user_or_group"], bool(ace.get("is_group"))
 
-    def _start_cifs_acls(self, share_name):
-        return self.cifs_share_acl_list_iter_start(share_name=share_name)
+    def _start_cifs_acls(self, share_name=None):
+        return self.cifs_share_acl_list_iter_start(**self._start_cifs_acls_opts(share_name))
 
-    def _get_cifs_acls(self, tag):
-        return self.cifs_share_acl_list_iter_next(tag=tag, maximum="1")
+    def _start_cifs_acls_opts(self, share_name):
+        # all shares if no share is specified
+        if share_name is None:
+            return dict()
+        return dict(share_name=share_name)
 
-    def _end_cifs_acls(self, tag):
-        return self.cifs_share_acl_list_iter_end(tag=tag)
+    def _iter_cifs_acls(self, tag):
+        for acl_info in self._iter_tag("cifs_share_acl_list_iter", tag, "cifs-share-acls", "cifs-share-acl-info"):
+            for ace in self._acl_info_to_aces(acl_info):
+                yield ace
 
     def list_cifs_acls(self, share_name):
         """Return ACL of the specified share.
@@ -313,25 +426,37 @@ class SevenMode(Nidhogg):
         :rtype: :class:`~nidhogg.compatible.ACE` or empty list
         :raises NidhoggException: if an error occurs
         """
+        acls = list(self.iter_cifs_acls(share_name))
+        if not acls:
+            logger.warn("list_cifs_acls: no entries found")
+        return acls
+
+    def iter_cifs_acls(self, share_name):
+        """Return a generator of ACEs (access control entries), see :py:meth:`list_cifs_acls`.
+
+        :param share_name: name of the share
+        :type share_name: str
+        :return: generator of ACEs (access control entries)
+        :rtype: generator of :class:`~nidhogg.compatible.ACE`
+        :raises NidhoggException: if an error occurs
+        """
         tag = self._start_cifs_acls(share_name=share_name)["netapp"]["results"]["tag"]
-        results = self._get_cifs_acls(tag=tag)["netapp"]["results"]
-        if safe_get(safe_get(safe_get(safe_get(results, "cifs-share-acls"), "cifs-share-acl-info"), "user-acl-info"), "access-rights-info"):
-            name = results["cifs-share-acls"]["cifs-share-acl-info"]["share-name"]
-            acls = results["cifs-share-acls"]["cifs-share-acl-info"]["user-acl-info"]["access-rights-info"]
-            if isinstance(acls, list):
-                self._end_cifs_acls(tag=tag)
-                return [
-                    self._item_to_ace(name, item)
-                    for item in acls
-                ]
-            elif isinstance(acls, dict):
-                self._end_cifs_acls(tag=tag)
-                return [
-                    self._item_to_ace(name, acls)
-                ]
-        self._end_cifs_acls(tag=tag)
-        logger.warn("list_cifs_acls: no entries found")
-        return []
+        for ace in self._iter_cifs_acls(tag):
+            yield ace
+
+    def iter_all_cifs_acls(self):
+        """Return a generator of the ACEs (access control entries) of all cifs shares, see
+        :py:meth:`~.Nidhogg.list_all_cifs_acls`.
+
+        The ACLs of all shares are retrieved by a single iteration in batches of :py:attr:`batch_size` shares.
+
+        :return: generator of ACEs (access control entries)
+        :rtype: generator of :class:`~nidhogg.compatible.ACE`
+        :raises NidhoggException: if an error occurs
+        """
+        tag = self._start_cifs_acls()["netapp"]["results"]["tag"]
+        for ace in self._iter_cifs_acls(tag):
+            yield ace
 
     def delete_cifs_acl(self, share_name, user_or_group, is_group=False):
         """Delete cifs ACL of the specified user or group.
@@ -344,19 +469,20 @@ class SevenMode(Nidhogg):
         :type is_group: bool
         :raises NidhoggException: if an error occurs
         """
+        self.cifs_share_ace_delete(**self._delete_cifs_acl_opts(share_name, user_or_group, is_group))
+
+    def _delete_cifs_acl_opts(self, share_name, user_or_group, is_group):
         if is_group:
-            opts = dict(
+            return dict(
                 share_name=share_name,
                 unix_group_name=user_or_group,
                 is_unixgroup="true"
             )
-        else:
-            opts = dict(
-                share_name=share_name,
-                user_name=user_or_group,
-                is_unixgroup="false"
-            )
-        self.cifs_share_ace_delete(**opts)
+        return dict(
+            share_name=share_name,
+            user_name=user_or_group,
+            is_unixgroup="false"
+        )
 
     def delete_cifs_acls(self, share_name):
         """Remove all cifs permssions.
@@ -373,7 +499,8 @@ class SevenMode(Nidhogg):
                 is_group=ace["is_group"]
             )
 
-    def set_quota(self, volume, qtree, quota_in_mb=1024, wait_til_finished=True):
+    @invalidates(depends_on_volume(QUOTA))
+    def set_quota(self, volume, qtree, quota_in_mb=1024, wait_til_finished=True, timeout=None):
         """Set a quota in MiB (default = 1GiB) for the specified volume and qtree.
 
         :param volume: name of the volume
@@ -384,39 +511,21 @@ class SevenMode(Nidhogg):
         :type quota_in_mb: int
         :param wait_til_finished: if false, do not wait for resize operation
         :type wait_til_finished: bool
+        :param timeout: max. time in seconds to wait for the resize, see :class:`~nidhogg.core.QuotaResize`
+        :type timeout: float
+        :return: handle of the resize
+        :rtype: :class:`~nidhogg.core.QuotaResize`
         :raises NidhoggException: if an error occurs
         :raises NidhoggException: if resize did not finish in time and we were waiting for it
         :raises NidhoggException: if quotas are not enabled
         """
-        quota_target = "/vol/{0}/{1}".format(volume, qtree)
-        quota_type = "tree"
-        quota_in_kb = int(round(quota_in_mb * 1024))
-        self.quota_set_entry(
-            volume=volume,
-            qtree="",
-            disk_limit=quota_in_kb,
-            soft_disk_limit=int(round(quota_in_kb * 0.8)),  # use 80% of the given quota as warn-limit
-            quota_target=quota_target,
-            quota_type=quota_type
-        )
-        self.quota_resize(volume=volume)
+        self._set_quota_entry(volume, qtree, quota_in_mb)
+        resize = self.resize_quotas(volume, timeout=timeout, qtrees=[qtree])
         if wait_til_finished:
-            for i in range(0, nidhogg.core.QUOTA_RESIZE_WAIT_CYCLES):
-                sleep(nidhogg.core.QUOTA_RESIZE_WAIT_TIME)
-                status = self.quota_status(volume=volume)["netapp"]["results"]["status"]
-                if status.lower() == "on":
-                    return
-                # check if quotas are turned on at all
-                if status.lower() == "off":
-                    raise NidhoggException("Quotas are not enabled.")
-            # waiting for quote resize exceeded
-            logger.debug("resize of {0}:/vol/{1} after setting quota for {2} did not finish".format(
-                self.vserver_fqdn,
-                volume,
-                qtree
-            ))
-            raise NidhoggException("Quota resize did not finish in time.")
+            resize.wait()
+        return resize
 
+    @invalidates(depends_on_volume(QUOTA))
     def delete_quota(self, volume, qtree):
         """Delete the quota of the specified volume and qtree.
 
@@ -426,14 +535,7 @@ class SevenMode(Nidhogg):
         :type qtree: str
         :raises NidhoggException: if an error occurs
         """
-        quota_target = "/vol/{0}/{1}".format(volume, qtree)
-        quota_type = "tree"
-        self.quota_delete_entry(
-            volume=volume,
-            qtree="",
-            quota_target=quota_target,
-            quota_type=quota_type
-        )
+        self.quota_delete_entry(**self._quota_entry_opts(volume, qtree))
 
     def update_snapmirror(self, destination_volume, destination_qtree=None, source_filer=None, source_volume=None, source_qtree=None):
         """Trigger the snapmirror replication.
@@ -455,25 +557,8 @@ class SevenMode(Nidhogg):
         :raises NidhoggException: if source params are incomplete
         :raises NidhoggException: if qtree params are used, but incomplete
         """
-        if bool(source_filer) ^ bool(source_volume):
-            raise NidhoggException("Incomplete source params.")
-        if source_qtree and not source_volume:
-            raise NidhoggException("Param source_volume missing.")
-        if destination_qtree and source_filer and not source_qtree:
-            raise NidhoggException("Param source_qtree missing.")
-        if source_qtree and not destination_qtree:
-            raise NidhoggException("Param destination_qtree missing.")
-        opts = dict()
-        if destination_qtree:
-            opts['destination_location'] = "/vol/{0}/{1}".format(destination_volume, destination_qtree)
-        else:
-            opts['destination_location'] = destination_volume
-        if source_filer:
-            if source_qtree:
-                opts['source_location'] = "{0}:/vol/{1}/{2}".format(source_filer, source_volume, source_qtree)
-            else:
-                opts['source_location'] = "{0}:{1}".format(source_filer, source_volume)
-        self.snapmirror_update(**opts)
+        self.snapmirror_update(**self._snapmirror_update_opts(
+            destination_volume, destination_qtree, source_filer, source_volume, source_qtree))
 
     def update_snapmirror_with_snapshot(self, name, destination_volume, destination_qtree=None, source_filer=None, source_volume=None, source_qtree=None):
         """Update the named snapshot to the snapmirror destination.
@@ -501,6 +586,14 @@ class SevenMode(Nidhogg):
         :raises NidhoggException: if source contains no new data
         :raises NidhoggException: if destination is busy
         """
+        self.snapmirror_update(
+            source_snapshot=name,
+            destination_snapshot=name,
+            **self._snapmirror_update_opts(
+                destination_volume, destination_qtree, source_filer, source_volume, source_qtree)
+        )
+
+    def _snapmirror_update_opts(self, destination_volume, destination_qtree, source_filer, source_volume, source_qtree):
         if bool(source_filer) ^ bool(source_volume):
             raise NidhoggException("Incomplete source params.")
         if source_qtree and not source_volume:
@@ -509,10 +602,7 @@ class SevenMode(Nidhogg):
             raise NidhoggException("Param source_qtree missing.")
         if source_qtree and not destination_qtree:
             raise NidhoggException("Param destination_qtree missing.")
-        opts = dict(
-            source_snapshot=name,
-            destination_snapshot=name,
-        )
+        opts = dict()
         if destination_qtree:
             opts['destination_location'] = "/vol/{0}/{1}".format(destination_volume, destination_qtree)
         else:
@@ -522,7 +612,7 @@ class SevenMode(Nidhogg):
                 opts['source_location'] = "{0}:/vol/{1}/{2}".format(source_filer, source_volume, source_qtree)
             else:
                 opts['source_location'] = "{0}:{1}".format(source_filer, source_volume)
-        self.snapmirror_update(**opts)
+        return opts
 
     def get_snapmirror_status(self, volume=None, qtree=None):
         """Get status of snapmirror replication pairs. If no params are provided, return all snapmirror status pairs.
@@ -535,25 +625,41 @@ class SevenMode(Nidhogg):
         :rtype: list of :class:`~nidhogg.compatible.SnapmirrorStatus` or empty list
         :raises NidhoggException: if an error occurs
         """
+        status = list(self.iter_snapmirror_status(volume, qtree))
+        if not status:
+            logger.warn("get_snapmirror_status: no entries found")
+        return status
+
+    def iter_snapmirror_status(self, volume=None, qtree=None):
+        """Return a generator of snapmirror pair status, see :py:meth:`get_snapmirror_status`.
+
+        :param volume: name of source or destination volume
+        :type volume: str
+        :param qtree: name of source or destination qtree
+        :type qtree: str
+        :return: generator of snapmirror pair status
+        :rtype: generator of :class:`~nidhogg.compatible.SnapmirrorStatus`
+        :raises NidhoggException: if an error occurs
+        """
+        results = self.snapmirror_get_status(**self._snapmirror_status_opts(volume, qtree))["netapp"]["results"]
+        for status in self._snapmirror_status_reply(results):
+            yield status
+
+    def _snapmirror_status_opts(self, volume, qtree):
         opts = dict()
         if volume and qtree:
             opts['location'] = "/vol/{0}/{1}".format(volume, qtree)
         elif volume:
             opts['location'] = "{0}".format(volume)
-        results = self.snapmirror_get_status(**opts)["netapp"]["results"]
-        if results["is-available"] == "true":
-            if results.get("snapmirror-status", {}).get("snapmirror-status-info", False):
-                if isinstance(results["snapmirror-status"]["snapmirror-status-info"], list):
-                    return [
-                        self._item_to_snapmirrorstatus(item)
-                        for item in results["snapmirror-status"]["snapmirror-status-info"]
-                    ]
-                elif isinstance(results["snapmirror-status"]["snapmirror-status-info"], dict):
-                    return [
-                        self._item_to_snapmirrorstatus(results["snapmirror-status"]["snapmirror-status-info"])
-                    ]
-        logger.warn("get_snapmirror_status: no entries found")
-        return []
+        return opts
+
+    def _snapmirror_status_reply(self, results):
+        if results["is-available"] != "true":
+            return []
+        return [
+            self._item_to_snapmirrorstatus(item)
+            for item in as_list(results.get("snapmirror-status", {}).get("snapmirror-status-info"))
+        ]
 
     def get_snapmirror_volume_status(self, volume):
         """Get status of a snapmirror volume.
@@ -567,6 +673,7 @@ class SevenMode(Nidhogg):
             volume=volume
         )["netapp"]["results"])
 
+    @invalidates(depends_on_volume(SPACE))
     def create_snapshot(self, volume, name):
         """Create a snapshot.
 
@@ -35,3 +35,22 @@ def safe_get(d, key):
     if key in d and d[key] is not None:
         return d[key]
     return {}
+
+
+def as_list(value):
+    """Helper function.
+
+    The Netapp API returns a single element as dict and several elements as list.
+
+    :param value: element(s) of the API response
+    :type value: dict or list
+    :return: list of elements, empty list if there are no elements
+    :rtype: list
+    """
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        return [value]
+    return []
@@ -25,6 +25,9 @@ setup(
     url="https://github.com/ifxit/nidhogg",
     packages=["nidhogg"],
     install_requires=open("requirements.txt").readlines(),
+    extras_require={
+        "aio": ["aiohttp"],
+    },
     license="MIT License, Copyright (c) 2018 Infineon Technologies AG",
     platforms="any",
     keywords=["netapp", "vserver", "sevenmode", "ontapi"],
@@ -1,22 +1,54 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import sys
+
 import pytest
 import mock
 
+from nidhogg.cache import MODE_CACHE
 from nidhogg.core import NidhoggException
 from nidhogg.sevenmode import SevenMode
 from nidhogg.clustermode import ClusterMode
 
 
+# asyncio API requires Python >= 3.6
+collect_ignore = ["test_aio.py"] if sys.version_info < (3, 6) else []
+
+
+@pytest.fixture(autouse=True)
+def clear_mode_cache():
+    MODE_CACHE.clear()
+
+
 STD_NETAPP_RESULT_OK = {'netapp': {'results': {"@status": "passed"}}}
 STD_NETAPP_RESULT_FAILED = {'netapp': {'results': {"@status": "failed"}}}
+STD_QUOTA = {
+    'disk-limit': "1024", 'soft-disk-limit': "-", 'threshold': "-", 'file-limit': "-", 'soft-file-limit': "-",
+    'disk-used': "0", 'files-used': "0", 'quota-target': "/vol/vol1/qtree1", 'tree': "qtree1", 'volume': "vol1"
+}
+# a volume and a quota, accepted by the list methods of both modes
+STD_NETAPP_RESULT_RECORDS = {'netapp': {'results': {
+    "@status": "passed",
+    'num-records': "1",
+    # seven-mode
+    'volumes': {'volume-info': {'name': "vol1", 'state': "online"}},
+    'quotas': {'quota': STD_QUOTA},
+    # cluster-mode
+    'attributes-list': {
+        'volume-attributes': {'volume-id-attributes': {'name': "vol1", 'type': "rw"}},
+        'quota': STD_QUOTA,
+    },
+}}}
 
 
 def do_mock(self, key, **kwargs):
     self.sent.append((key, kwargs))
     if self.patched_return_value.get("netapp", {}).get("results", {}).get("@status", "passed") == "failed":
         raise NidhoggException("error error error")
+    if key.endswith("_iter_next") and self.sent[-2:-1] == [(key, kwargs)]:
+        # the filer ends a seven-mode iteration by a batch without records
+        return {'netapp': {'results': {'records': "0"}}}
     return self.patched_return_value
 
 
@@ -71,6 +103,11 @@ def std_netapp_reply():
     return STD_NETAPP_RESULT_OK
 
 
+@pytest.fixture
+def std_netapp_records():
+    return STD_NETAPP_RESULT_RECORDS
+
+
 @pytest.fixture
 def mode(request, monkeypatch):
     # See http://pytest.org/latest/example/parametrize.html#deferring-the-setup-of-parametrized-resources
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import asyncio
+
+import pytest
+import xmltodict
+
+import nidhogg.aio
+from nidhogg.aio import AsyncClusterMode, AsyncQuotaResize, AsyncQuotaResizeJob, AsyncSevenMode
+from nidhogg.cache import MODE_CACHE
+from nidhogg.compatible import Volume
+from nidhogg.core import NidhoggException
+
+
+REPLY = "<netapp><results status='passed'>{0}</results></netapp>"
+
+VOLUME = """
+<volume-attributes>
+    <volume-id-attributes><name>{0}</name><type>rw</type></volume-id-attributes>
+    <volume-state-attributes><state>online</state></volume-state-attributes>
+    <volume-space-attributes><size-total>100</size-total></volume-space-attributes>
+</volume-attributes>"""
+
+
+class FakeHttp(object):
+    """Asynchronous transport returning the queued replies."""
+
+    instances = []
+
+    def __init__(self, url, username, password, verify=False, pool_maxsize=None):
+        self.replies = []
+        self.sent = []
+        self.closed = False
+        FakeHttp.instances.append(self)
+
+    def parse_xml_reply(self, xmlresponse):
+        return xmltodict.parse(xmlresponse)
+
+    async def invoke_request(self, req):
+        self.sent.append(req.decode("utf-8"))
+        await asyncio.sleep(0)
+        return self.replies.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def clustermode():
+    n = AsyncClusterMode("https://my.url.to.filer", "user", "password", 1, 21, False, http=FakeHttp)
+    n.page_size = 2
+    return n
+
+
+@pytest.fixture
+def sevenmode():
+    return AsyncSevenMode("https://my.url.to.filer", "user", "password", 1, 15, False, http=FakeHttp)
+
+
+@pytest.mark.parametrize("clustered, klass", [("true", AsyncClusterMode), ("false", AsyncSevenMode)])
+def test_get_netapp(clustered, klass):
+    FakeHttp.instances = []
+    probe_reply = REPLY.format("<is-clustered>{0}</is-clustered>".format(clustered))
+    original_init = FakeHttp.__init__
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self.replies.append(probe_reply)
+
+    FakeHttp.__init__ = init
+    try:
+        filer = run(nidhogg.aio.get_netapp("my.url.to.filer", "user", "password", http=FakeHttp))
+    finally:
+        FakeHttp.__init__ = original_init
+    assert isinstance(filer, klass)
+    assert filer.url == "https://my.url.to.filer"
+    # the transport of the probe is reused
+    assert FakeHttp.instances == [filer.http]
+    assert not filer.http.closed
+    assert MODE_CACHE.get("https://my.url.to.filer") is (clustered == "true")
+
+
+@pytest.mark.parametrize("clustered, klass", [(True, AsyncClusterMode), (False, AsyncSevenMode)])
+def test_get_netapp_cached_mode(clustered, klass):
+    MODE_CACHE.set("https://my.url.to.filer", clustered)
+    filer = run(nidhogg.aio.get_netapp("my.url.to.filer", "user", "password", http=FakeHttp))
+    assert isinstance(filer, klass)
+    assert filer.http.sent == []
+
+
+def test_context_manager_sync(clustermode):
+    with pytest.raises(TypeError):
+        with clustermode:
+            pass   # pragma: no cover
+
+
+def test_not_implemented(clustermode, sevenmode):
+    with pytest.raises(NotImplementedError):
+        run(clustermode.get_snapmirror_volume_status("vol1"))
+    with pytest.raises(NotImplementedError):
+        run(sevenmode.list_snapmirror_destinations())
+
+
+def test_add_desired_attributes(clustermode):
+    clustermode.add_desired_attributes("volume_get_iter", dict(volume_attributes=dict(
+        volume_autosize_attributes=dict(mode=None)
+    )))
+    clustermode.http.replies.append(REPLY.format("<num-records>0</num-records>"))
+    assert run(clustermode.list_volumes()) == []
+    assert "<volume-autosize-attributes><mode" in clustermode.http.sent[0]
+
+
+def test_has_forcegroup(clustermode, sevenmode):
+    assert run(sevenmode.has_forcegroup()) is True
+    clustermode.http.replies.append(REPLY.format("<major-version>1</major-version><minor-version>21</minor-version>"))
+    assert run(clustermode.has_forcegroup()) is False
+    # requested once
+    assert run(clustermode.has_forcegroup()) is False
+    assert len(clustermode.http.sent) == 1
+
+
+def test_context_manager(clustermode):
+    async def use():
+        async with clustermode as filer:
+            return filer
+
+    assert run(use()) is clustermode
+    assert clustermode.http.closed
+
+
+def test_api_call_failed(sevenmode):
+    sevenmode.http.replies.append("<netapp><results status='failed' reason='nope'/></netapp>")
+    with pytest.raises(NidhoggException):
+        run(sevenmode.system_get_version())
+
+
+def test_list_volumes_paged(clustermode):
+    clustermode.http.replies = [
+        REPLY.format("<attributes-list>{0}{1}</attributes-list><num-records>2</num-records><next-tag>t1</next-tag>".format(
+            VOLUME.format("vol1"), VOLUME.format("vol2"))),
+        REPLY.format("<attributes-list>{0}</attributes-list><num-records>1</num-records>".format(VOLUME.format("vol3"))),
+    ]
+    volumes = run(clustermode.list_volumes())
+    assert [v["name"] for v in volumes] == ["vol1", "vol2", "vol3"]
+    assert "<tag>t1</tag>" in clustermode.http.sent[1]
+
+
+def test_iter_volumes_stops_at_max_records(clustermode):
+    clustermode.http.replies = [
+        REPLY.format("<attributes-list>{0}{1}</attributes-list><num-records>2</num-records><next-tag>t1</next-tag>".format(
+            VOLUME.format("vol1"), VOLUME.format("vol2"))),
+    ]
+
+    async def collect():
+        return [v async for v in clustermode.iter_volumes(max_records=2)]
+
+    assert len(run(collect())) == 2
+    assert len(clustermode.http.sent) == 1
+
+
+def test_list_qtrees_empty(sevenmode):
+    sevenmode.http.replies.append(REPLY.format(""))
+    assert run(sevenmode.list_qtrees("vol1")) == []
+
+
+def test_get_volumes_with_quota_info(sevenmode, monkeypatch):
+    async def list_volumes():
+        return [
+            Volume(name=name, state="online", snapable=True, size_total=size_total, size_used=0.0,
+                   size_available=size_total, files_used=0.0, files_total=10.0, filer="my.url.to.filer")
+            for name, size_total in [("vol1", 100.0), ("vol2", 200.0)]
+        ]
+
+    async def get_allocated_quota_size(volume):
+        return 50.0
+
+    monkeypatch.setattr(sevenmode, "list_volumes", list_volumes, raising=False)
+    monkeypatch.setattr(sevenmode, "get_allocated_quota_size", get_allocated_quota_size, raising=False)
+    volumes = run(sevenmode.get_volumes_with_quota_info(filter_volume_names=["vol2"]))
+    assert len(volumes) == 1
+    assert volumes[0]["quota_ratio"] == 0.25
+
+
+@pytest.mark.parametrize("status, raises", [("on", False), ("off", True), ("resizing", True)])
+def test_set_quota(clustermode, monkeypatch, status, raises):
+    monkeypatch.setattr("nidhogg.core.QUOTA_RESIZE_WAIT_TIME", 0)
+    monkeypatch.setattr("nidhogg.core.QUOTA_RESIZE_WAIT_CYCLES", 2)
+    clustermode.http.replies = [REPLY.format(""), REPLY.format("")] + \
+        [REPLY.format("<status>{0}</status>".format(status))] * 2
+    if raises:
+        with pytest.raises(NidhoggException):
+            run(clustermode.set_quota("vol1", "qtree1", quota_in_mb=1))
+    else:
+        run(clustermode.set_quota("vol1", "qtree1", quota_in_mb=1))
+    assert "<quota-set-entry>" in clustermode.http.sent[0]
+    assert "<policy>default</policy>" in clustermode.http.sent[0]
+    assert "<quota-resize>" in clustermode.http.sent[1]
+
+
+def test_list_cifs_acls_sevenmode_batches(sevenmode):
+    # batches with less records than requested do not end the iteration
+    sevenmode.batch_size = 2
+    acl = ("<cifs-share-acls><cifs-share-acl-info><share-name>share1</share-name><user-acl-info>"
+           "<access-rights-info><user-name>{0}</user-name><access-rights>Read</access-rights></access-rights-info>"
+           "</user-acl-info></cifs-share-acl-info></cifs-share-acls><records>1</records>")
+    sevenmode.http.replies = [
+        REPLY.format("<tag>t1</tag>"),
+        REPLY.format(acl.format("user1")),
+        REPLY.format(acl.format("user2")),
+        REPLY.format("<records>0</records>"),
+        REPLY.format(""),
+    ]
+    acls = run(sevenmode.list_cifs_acls("share1"))
+    assert [ace["user_or_group"] for ace in acls] == ["user1", "user2"]
+    assert len(sevenmode.http.sent) == 5
+    assert "<cifs-share-acl-list-iter-end><tag>t1</tag>" in sevenmode.http.sent[-1]
+
+
+def test_sync_cifs_acls(clustermode):
+    clustermode.http.replies = [
+        REPLY.format("<attributes-list><cifs-share-access-control><share>share1</share><user-or-group>user1"
+                     "</user-or-group><permission>read</permission></cifs-share-access-control></attributes-list>"
+                     "<num-records>1</num-records>"),
+        REPLY.format(""),
+        REPLY.format(""),
+    ]
+    changes = run(clustermode.sync_cifs_acls("share1", [dict(user_or_group="user2", permission="read")]))
+    assert [ace["user_or_group"] for ace in changes["created"]] == ["user2"]
+    assert [ace["user_or_group"] for ace in changes["deleted"]] == ["user1"]
+    assert len(clustermode.http.sent) == 3
+
+
+def test_exists_qtree_clustermode(clustermode):
+    clustermode.http.replies = [REPLY.format("<num-records>0</num-records>")]
+    assert run(clustermode.exists_qtree("vol1", "qtree1")) is False
+    assert "<max-records>2</max-records>" in clustermode.http.sent[0]
+    assert "<qtree>qtree1</qtree>" in clustermode.http.sent[0]
+
+
+def test_get_qtree_clustermode_pattern(clustermode):
+    # "q*" matches qtree "q1" first
+    qtree = "<qtree-info><qtree>{0}</qtree><status>normal</status><security-style>unix</security-style></qtree-info>"
+    clustermode.http.replies = [REPLY.format(
+        "<attributes-list>" + qtree.format("q1") + qtree.format("q*") + "</attributes-list><num-records>2</num-records>"
+    )]
+    assert run(clustermode.get_qtree("vol1", "q*"))["qtree"] == "q*"
+
+
+@pytest.fixture
+def no_wait(monkeypatch):
+    monkeypatch.setattr("nidhogg.core.QUOTA_RESIZE_POLL_INTERVAL", 0)
+
+
+def test_resize_quotas_sevenmode(sevenmode, no_wait):
+    sevenmode.http.replies = [REPLY.format(""), REPLY.format("<status>resizing</status>"),
+                              REPLY.format("<status>on</status>")]
+    resize = run(sevenmode.resize_quotas("vol1"))
+    assert isinstance(resize, AsyncQuotaResize)
+    assert "<quota-resize>" in sevenmode.http.sent[0]
+    assert run(resize.done()) is False
+    run(resize.wait())
+    assert resize.finished
+    assert len(sevenmode.http.sent) == 3
+
+
+def test_resize_quotas_job(clustermode, no_wait):
+    job = ("<attributes-list><job-info><job-id>{0}</job-id><job-state>{1}</job-state></job-info></attributes-list>"
+           "<num-records>1</num-records>")
+    clustermode.http.replies = [
+        REPLY.format("<result-jobid>42</result-jobid>"),
+        REPLY.format(job.format("42", "running")),
+        REPLY.format(job.format("42", "success")),
+    ]
+    resize = run(clustermode.resize_quotas("vol1"))
+    assert isinstance(resize, AsyncQuotaResizeJob)
+    assert run(resize.done()) is False
+    run(resize.wait())
+    assert resize.finished
+    assert "<job-id>42</job-id>" in clustermode.http.sent[2]
+
+
+def test_wait_for_quota_resizes_batched(clustermode, no_wait):
+    clustermode.http.replies = [
+        REPLY.format("<result-jobid>1</result-jobid>"),
+        REPLY.format("<result-jobid>2</result-jobid>"),
+        REPLY.format("<attributes-list><job-info><job-id>1</job-id><job-state>success</job-state></job-info>"
+                     "<job-info><job-id>2</job-id><job-state>success</job-state></job-info></attributes-list>"
+                     "<num-records>2</num-records>"),
+    ]
+
+    async def resize():
+        resizes = [await clustermode.resize_quotas(volume) for volume in ["vol1", "vol2"]]
+        await clustermode.wait_for_quota_resizes(resizes)
+        return resizes
+
+    assert all(resize.finished for resize in run(resize()))
+    assert "<job-id>1|2</job-id>" in clustermode.http.sent[2]
+
+
+def test_wait_for_quota_resizes_failed(sevenmode, no_wait):
+    sevenmode.http.replies = [REPLY.format(""), REPLY.format("<status>off</status>")]
+
+    async def resize():
+        await sevenmode.wait_for_quota_resizes([await sevenmode.resize_quotas("vol1")])
+
+    with pytest.raises(NidhoggException):
+        run(resize())
+
+
+def test_provision_homes(sevenmode, no_wait):
+    sent = []
+
+    async def _do(api, **kwargs):
+        sent.append((api, kwargs))
+        await asyncio.sleep(0)
+        if api == "cifs_share_add" and kwargs["share_name"] == "user2$":
+            raise NidhoggException("cifs_share_add failed")
+        return {'netapp': {'results': {'@status': "passed", 'status': "on"}}}
+
+    sevenmode._do = _do
+    results = run(sevenmode.provision_homes([
+        dict(volume="vol1", qtree="user1", quota_in_mb=10, share_name="user1$",
+             aces=[dict(user_or_group="user1", permission="Full Control")]),
+        dict(volume="vol1", qtree="user2", quota_in_mb=10, share_name="user2$"),
+        dict(volume="vol2", qtree="user3", quota_in_mb=10),
+    ], max_workers=2))
+    assert results[0]["steps"] == ["qtree", "quota", "share", "acl", "resize"]
+    assert isinstance(results[1]["error"], NidhoggException)
+    assert results[2]["steps"] == ["qtree", "quota", "resize"]
+    apis = [api for api, _ in sent]
+    assert apis.count("qtree_create") == 3
+    assert apis.count("cifs_share_ace_set") == 1
+    # the failed home is rolled back before the resizes
+    assert apis.index("qtree_delete") < apis.index("quota_resize")
+    assert sorted(kwargs["volume"] for api, kwargs in sent if api == "quota_resize") == ["vol1", "vol2"]
+
+
+QUOTA = ("<quota><volume>{0}</volume><tree>{1}</tree><disk-limit>{2}</disk-limit><disk-used>0</disk-used>"
+         "<file-limit>-</file-limit><files-used>0</files-used><soft-disk-limit>-</soft-disk-limit>"
+         "<soft-file-limit>-</soft-file-limit><threshold>-</threshold>"
+         "<quota-target>/vol/{0}/{1}</quota-target></quota>")
+
+
+def test_get_allocated_quota_sizes_clustermode(clustermode):
+    clustermode.http.replies = [
+        REPLY.format("<attributes-list>{0}{1}</attributes-list><num-records>2</num-records><next-tag>t1</next-tag>"
+                     .format(QUOTA.format("vol1", "q1", "1"), QUOTA.format("vol1", "", "8"))),
+        REPLY.format("<attributes-list>{0}</attributes-list><num-records>1</num-records>"
+                     .format(QUOTA.format("vol2", "q2", "2"))),
+    ]
+    assert run(clustermode.get_allocated_quota_sizes()) == {"vol1": 1024.0, "vol2": 2048.0}
+    assert "<query>" not in clustermode.http.sent[0]
+
+
+def test_get_volumes_with_quota_info_single_quota_report(sevenmode):
+    sevenmode.http.replies = [
+        REPLY.format("<volumes><volume-info><name>vol1</name><state>online</state><raid-status>raid_dp</raid-status>"
+                     "<size-total>4096</size-total></volume-info><volume-info><name>vol2</name><state>online</state>"
+                     "<raid-status>raid_dp</raid-status><size-total>4096</size-total></volume-info><volume-info><name>vol3</name>"
+                     "<state>online</state><raid-status>raid_dp</raid-status></volume-info></volumes>"),
+        REPLY.format("<quotas>{0}{1}</quotas>".format(QUOTA.format("vol1", "q1", "1"), QUOTA.format("vol1", "q2", "1"))),
+    ]
+    volumes = run(sevenmode.get_volumes_with_quota_info(single_quota_report=True))
+    assert [(v["name"], v["quota_size"], v["quota_ratio"]) for v in volumes] == [
+        ("vol1", 2048.0, 0.5), ("vol2", 0, 0.0), ("vol3", 0, None)
+    ]
+    assert "<volume>" not in sevenmode.http.sent[1]
+    assert len(sevenmode.http.sent) == 2
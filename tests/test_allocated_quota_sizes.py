@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
+from nidhogg.compatible import Volume
+from nidhogg.sevenmode import SevenMode
+
+
+def quota(volume, tree, disk_limit):
+    return {
+        'disk-limit': disk_limit,
+        'file-limit': "-",
+        'threshold': "-",
+        'soft-disk-limit': "-",
+        'soft-file-limit': "-",
+        'quota-target': "/vol/{0}/{1}".format(volume, tree),
+        'files-used': "1",
+        'disk-used': "1",
+        'tree': tree,
+        'volume': volume,
+    }
+
+
+QUOTAS = [quota("vol1", "qtree1", "1"), quota("vol1", "qtree2", "2"), quota("vol2", "qtree1", "4"), quota("vol2", "", "8")]
+
+seven_ret_value = {"quotas": {"quota": QUOTAS}}
+cluster_ret_value = {"attributes-list": {"quota": QUOTAS}, "num-records": len(QUOTAS)}
+
+
+def volume(name, size_total):
+    return Volume(
+        name=name, state="online", size_total=size_total, size_used=0.0, size_available=size_total,
+        files_used=0.0, files_total=1.0, snapable=True, filer="my.url.to.filer"
+    )
+
+
+def test_sevenmode_api(sevenmode):
+    sevenmode.get_allocated_quota_sizes()
+    assert sevenmode.sent == [('quota_report', {})]
+
+
+def test_clustermode_api(clustermode):
+    clustermode.get_allocated_quota_sizes()
+    assert clustermode.sent == [('quota_report_iter', {'desired_attributes': DESIRED_ATTRIBUTES['quota_report_iter'], 'max_records': 1000})]
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, cluster_ret_value),
+    (SevenMode, seven_ret_value),
+], indirect=True)
+def test_get_allocated_quota_sizes(mode):
+    assert mode.get_allocated_quota_sizes() == {"vol1": 3 * 1024, "vol2": 4 * 1024}
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, cluster_ret_value),
+    (SevenMode, seven_ret_value),
+], indirect=True)
+def test_get_volumes_with_quota_info(mode, monkeypatch):
+    monkeypatch.setattr(mode, "list_volumes", lambda: [volume("vol1", 1024.0), volume("vol2", 2048.0), volume("vol3", 10.0)])
+    volumes = mode.get_volumes_with_quota_info(single_quota_report=True)
+    assert len(mode.sent) == 1
+    assert [(v["name"], v["quota_size"], v["quota_ratio"]) for v in volumes] == [
+        ("vol1", 3072.0, 3.0), ("vol2", 4096.0, 2.0), ("vol3", 0, 0.0)
+    ]
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, cluster_ret_value),
+    (SevenMode, seven_ret_value),
+], indirect=True)
+def test_get_volumes_with_quota_info_without_size(mode, monkeypatch):
+    monkeypatch.setattr(mode, "list_volumes", lambda: [volume("vol1", None), volume("vol2", 0.0)])
+    volumes = mode.get_volumes_with_quota_info(single_quota_report=True)
+    assert [(v["name"], v["quota_size"], v["quota_ratio"]) for v in volumes] == [
+        ("vol1", 3072.0, None), ("vol2", 4096.0, None)
+    ]
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import mock
+import pytest
+
+from nidhogg.cache import QUOTA, SPACE
+from nidhogg.core import NidhoggException
+
+
+def sent_apis(nidhogg):
+    return [api for api, _ in nidhogg.sent]
+
+
+@pytest.fixture
+def cached(allmodes, monkeypatch, std_netapp_records):
+    monkeypatch.setattr("nidhogg.core.QUOTA_RESIZE_WAIT_TIME", 0)
+    allmodes.patched_return_value = std_netapp_records
+    allmodes.volume_info("vol1")
+    allmodes.volume_info("vol2")
+    allmodes.get_allocated_quota_size("vol1")
+    allmodes.get_allocated_quota_size(volume="vol2")
+    allmodes.sent = []
+    return allmodes
+
+
+def refresh(nidhogg):
+    nidhogg.volume_info("vol1")
+    nidhogg.volume_info("vol2")
+    nidhogg.get_allocated_quota_size("vol1")
+    nidhogg.get_allocated_quota_size("vol2")
+    return nidhogg.sent
+
+
+def test_cached(cached):
+    assert refresh(cached) == []
+
+
+def test_set_quota(cached):
+    cached.set_quota("vol1", "qtree1", wait_til_finished=False)
+    cached.sent = []
+    # only the quota of vol1 is requested again
+    assert len(refresh(cached)) == 1
+
+
+@pytest.mark.parametrize("method, args, requested", [
+    ("delete_quota", ("vol1", "qtree1"), 1),
+    ("create_qtree", ("vol1", "qtree1"), 1),
+    ("delete_qtree", ("vol1", "qtree1"), 2),
+    ("create_snapshot", ("vol1", "snap1"), 1),
+    ("delete_snapshot", ("vol1", "snap1"), 1),
+])
+def test_mutations(cached, method, args, requested):
+    getattr(cached, method)(*args)
+    cached.sent = []
+    assert len(refresh(cached)) == requested
+
+
+def test_list_volumes_depends_on_all_volumes(cached):
+    cached.list_volumes()
+    cached.set_quota("vol2", "qtree1", wait_til_finished=False)
+    cached.sent = []
+    cached.list_volumes()
+    assert cached.sent == []
+    cached.create_snapshot(volume="vol2", name="snap1")
+    cached.sent = []
+    cached.list_volumes()
+    assert len(cached.sent) == 1
+
+
+def test_invalidated_on_error(allmodes_failed):
+    with mock.patch.object(type(allmodes_failed), "invalidate_cache") as invalidate_cache:
+        with pytest.raises(NidhoggException):
+            allmodes_failed.create_qtree("vol1", "qtree1")
+    invalidate_cache.assert_called_once_with((QUOTA, "vol1"))
+
+
+def test_invalidate_volume(cached):
+    cached.invalidate_volume("vol2")
+    assert len(refresh(cached)) == 2
+
+
+def test_invalidate_cache_tags(cached):
+    cached.invalidate_cache((SPACE, None))
+    assert len(refresh(cached)) == 2
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import gc
+import time
+import weakref
+
+import pytest
+from mock import patch
+
+from nidhogg.cache import TTLCache, cached_method
+from nidhogg.sevenmode import SevenMode
+
+
+def test_ttl_cache_maxsize():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    # "b" is the least recently used entry
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_ttl_cache_expired():
+    cache = TTLCache(ttl=10)
+    cache.set("a", None)
+    assert cache.get("a", 42) is None
+    with patch("nidhogg.cache.time.time", return_value=time.time() + 11):
+        assert cache.get("a", 42) == 42
+
+
+def test_cached_per_instance(sevenmode, std_netapp_records):
+    sevenmode.patched_return_value = std_netapp_records
+    sevenmode.volume_info("vol1")
+    sevenmode.volume_info("vol1")
+    assert len(sevenmode.sent) == 1
+    sevenmode.volume_info("vol2")
+    assert len(sevenmode.sent) == 2
+    other = SevenMode("https://my.url.to.filer", "user", "password", 1, 1, False)
+    other.sent = []
+    other.patched_return_value = sevenmode.patched_return_value
+    other.volume_info("vol1")
+    assert len(other.sent) == 1
+
+
+def test_cached_ttl(sevenmode, std_netapp_records):
+    sevenmode.patched_return_value = std_netapp_records
+    sevenmode.cache_ttl = 10
+    sevenmode.volume_info("vol1")
+    with patch("nidhogg.cache.time.time", return_value=time.time() + 11):
+        sevenmode.volume_info("vol1")
+    assert len(sevenmode.sent) == 2
+
+
+def test_invalidate(sevenmode, std_netapp_records):
+    sevenmode.patched_return_value = std_netapp_records
+    sevenmode.volume_info("vol1")
+    sevenmode.volume_info("vol2")
+    sevenmode.volume_info.invalidate("vol1")
+    sevenmode.volume_info("vol1")
+    sevenmode.volume_info("vol2")
+    assert len(sevenmode.sent) == 3
+    sevenmode.volume_info.invalidate()
+    sevenmode.volume_info("vol2")
+    assert len(sevenmode.sent) == 4
+    sevenmode.list_volumes()
+    sevenmode.invalidate_cache()
+    sevenmode.list_volumes()
+    sevenmode.volume_info("vol2")
+    assert len(sevenmode.sent) == 7
+
+
+def test_instance_not_kept_alive():
+    nidhogg = SevenMode("https://my.url.to.filer", "user", "password", 1, 1, False)
+    with patch("nidhogg.sevenmode.SevenMode.volume_list_info", create=True) as volume_list_info:
+        volume_list_info.return_value = {"netapp": {"results": {"volumes": {}}}}
+        nidhogg.list_volumes()
+    ref = weakref.ref(nidhogg)
+    del nidhogg
+    gc.collect()
+    assert ref() is None
+
+
+def test_cache_key():
+    class Filer(object):
+        cache_maxsize = 10
+        cache_ttl = 10
+
+        def __init__(self):
+            self.calls = 0
+
+        @cached_method
+        def quota(self, volume, unit="MB"):
+            self.calls += 1
+            return volume
+
+    filer = Filer()
+    # the signature is only inspected by the decorator
+    with patch("nidhogg.cache.inspect.signature", side_effect=AssertionError):
+        filer.quota("vol1")
+        filer.quota(volume="vol1")
+        filer.quota("vol1", "MB")
+        assert filer.calls == 1
+        filer.quota("vol1", unit="GB")
+        assert filer.calls == 2
+        with pytest.raises(TypeError):
+            filer.quota("vol1", size=1)
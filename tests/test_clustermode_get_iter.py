@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
+from nidhogg.utils import as_list
+
+
+def page(items, next_tag=None):
+    results = {
+        '@status': "passed",
+        'num-records': str(len(items)),
+    }
+    if items:
+        results['attributes-list'] = {'qtree-info': items if len(items) > 1 else items[0]}
+    if next_tag:
+        results['next-tag'] = next_tag
+    return {'netapp': {'results': results}}
+
+
+def qtree(name):
+    return {'qtree': name, 'status': "normal", 'security-style': "ntfs"}
+
+
+@pytest.fixture
+def paged(monkeypatch):
+    def do_mock(self, api, **kwargs):
+        self.sent.append((api, dict(kwargs)))
+        return self.pages.pop(0)
+    monkeypatch.setattr("nidhogg.clustermode.ClusterMode._do", do_mock)
+    n = ClusterMode("https://my.url.to.filer", "user", "password", 1, 1, False)
+    n.sent = []
+    n.page_size = 2
+    return n
+
+
+def test_get_iter_follows_next_tag(paged):
+    paged.pages = [
+        page([qtree("a"), qtree("b")], next_tag="tag1"),
+        page([qtree("c"), qtree("d")], next_tag="tag2"),
+        page([qtree("e")]),
+    ]
+    assert [qt['qtree'] for qt in paged.list_qtrees("vol")] == ["a", "b", "c", "d", "e"]
+    assert paged.sent == [
+        ('qtree_list_iter', {'desired_attributes': DESIRED_ATTRIBUTES['qtree_list_iter'], 'query': {'qtree_info': {'volume': "vol"}}, 'max_records': 2}),
+        ('qtree_list_iter', {'desired_attributes': DESIRED_ATTRIBUTES['qtree_list_iter'], 'query': {'qtree_info': {'volume': "vol"}}, 'max_records': 2, 'tag': "tag1"}),
+        ('qtree_list_iter', {'desired_attributes': DESIRED_ATTRIBUTES['qtree_list_iter'], 'query': {'qtree_info': {'volume': "vol"}}, 'max_records': 2, 'tag': "tag2"}),
+    ]
+
+
+def test_get_iter_max_records(paged):
+    paged.pages = [
+        page([qtree("a"), qtree("b")], next_tag="tag1"),
+        page([qtree("c")], next_tag="tag2"),
+    ]
+    assert [qt['qtree'] for qt in paged.list_qtrees("vol", max_records=3)] == ["a", "b", "c"]
+    assert [kwargs['max_records'] for _, kwargs in paged.sent] == [2, 1]
+
+
+def test_get_iter_empty_page(paged):
+    paged.pages = [
+        page([qtree("a"), qtree("b")], next_tag="tag1"),
+        page([], next_tag="tag2"),
+    ]
+    assert [qt['qtree'] for qt in paged.list_qtrees("vol")] == ["a", "b"]
+    assert len(paged.sent) == 2
+
+
+def test_get_iter_stream_replies(paged, monkeypatch):
+    def do_iter_mock(self, api, element, results, **kwargs):
+        self.sent.append((api, dict(kwargs)))
+        reply = self.pages.pop(0)["netapp"]["results"]
+        results.update(reply)
+        for item in as_list(reply.get('attributes-list', {}).get(element)):
+            yield item
+    monkeypatch.setattr("nidhogg.clustermode.ClusterMode._do_iter", do_iter_mock)
+    paged.stream_replies = True
+    paged.pages = [
+        page([qtree("a"), qtree("b")], next_tag="tag1"),
+        page([qtree("c")]),
+    ]
+    assert [qt['qtree'] for qt in paged.iter_qtrees("vol")] == ["a", "b", "c"]
+    assert [kwargs.get('tag') for _, kwargs in paged.sent] == [None, "tag1"]
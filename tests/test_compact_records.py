@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pickle
+import sys
+
+import pytest
+
+from nidhogg.compatible import Record, SnapmirrorStatus, Snapshot, Volume, VolumeWithQuotaRatio, compact_class
+from nidhogg.clustermode import ClusterMode
+from nidhogg.placement import VolumeHeap
+
+
+VOLUME = dict(name="vol1", state="online", size_total=100, size_used=40, size_available=60, files_used=1,
+              files_total=10, snapable=True, filer="filer99")
+
+
+@pytest.fixture
+def record():
+    return compact_class(Volume)(**VOLUME)
+
+
+def test_compact_class():
+    VolumeRecord = compact_class(Volume)
+    assert VolumeRecord is compact_class(Volume)
+    assert issubclass(VolumeRecord, Record)
+    assert VolumeRecord.__name__ == "VolumeRecord"
+    assert VolumeRecord.data_class is Volume
+    assert not hasattr(VolumeRecord(**VOLUME), "__dict__")
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(name="vol1"),
+    dict(VOLUME, foo=1),
+])
+def test_required_arguments(kwargs):
+    with pytest.raises(AttributeError):
+        compact_class(Volume)(**kwargs)
+
+
+def test_mapping_access(record):
+    assert record["name"] == "vol1"
+    assert record.get("state") == "online"
+    assert record.get("foo", 1) == 1
+    assert "size_total" in record
+    assert "foo" not in record
+    assert len(record) == len(VOLUME)
+    assert record.keys() == Volume.required_arguments
+    assert dict(record) == VOLUME
+    assert Volume(**record) == VOLUME
+    with pytest.raises(KeyError):
+        record["foo"]
+
+
+def test_setitem(record):
+    record["size_available"] = 50
+    assert record["size_available"] == 50
+    with pytest.raises(KeyError):
+        record["foo"] = 1
+
+
+def test_eq(record):
+    assert record == VOLUME
+    assert record == Volume(**VOLUME)
+    assert record == compact_class(Volume)(**VOLUME)
+    assert record != dict(VOLUME, name="vol2")
+    assert "vol1" in [record]
+    assert "vol2" not in [record]
+
+
+def test_lt(record):
+    VolumeWithQuotaRatioRecord = compact_class(VolumeWithQuotaRatio)
+    volumes = [VolumeWithQuotaRatioRecord(quota_size=size, quota_ratio=size / 100.0, **record) for size in [50, 10]]
+    assert min(volumes)["quota_size"] == 10
+    other = compact_class(Volume)(**dict(VOLUME, size_available=10))
+    assert max([record, other]) is record
+
+
+def test_pickle(record):
+    copy = pickle.loads(pickle.dumps(record))
+    assert type(copy) is compact_class(Volume)
+    assert copy == record
+
+
+def test_memory():
+    values = dict.fromkeys(SnapmirrorStatus.required_arguments)
+    assert sys.getsizeof(compact_class(SnapmirrorStatus)(**values)) < sys.getsizeof(SnapmirrorStatus(**values)) / 2
+
+
+def test_placement(record):
+    heap = VolumeHeap([record, compact_class(Volume)(**dict(VOLUME, name="vol2", size_available=30))], by="size")
+    assert heap.allocate(50)["name"] == "vol1"
+    assert heap.best()["name"] == "vol2"
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {
+        'num-records': '1',
+        'attributes-list': {
+            'snapshot-info': {'name': "snap1"}
+        }
+    })
+], indirect=True)
+def test_compact_records(mode):
+    mode.compact_records = True
+    snapshot, = mode.list_snapshots("vol1")
+    assert type(snapshot) is compact_class(Snapshot)
+    assert snapshot == {"name": "snap1"}
+    mode.compact_records = False
+    snapshot, = mode.list_snapshots("vol1")
+    assert type(snapshot) is Snapshot
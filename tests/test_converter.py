@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+from nidhogg.compatible import QTree, Volume
+from nidhogg.converter import Converter, kbytes_or_unlimited, number_or_unlimited, to_bool, to_float
+
+
+@pytest.fixture
+def to_volume():
+    return Converter({
+        "volume-id-attributes": Converter({
+            "name": "name",
+            "type": ("snapable", lambda value: value == "rw"),
+        }, required=["name"]),
+        "volume-state-attributes": Converter({
+            "state": "state",
+        }),
+        "volume-space-attributes": Converter({
+            "size-total": ("size_total", to_float),
+            "size-used": ("size_used", to_float),
+            "size-available": ("size_available", to_float),
+        }),
+        "volume-inode-attributes": Converter({
+            "files-used": ("files_used", to_float),
+            "files-total": ("files_total", to_float),
+        }),
+    }, defaults=dict(snapable=False), extra=["filer"])
+
+
+def test_convert_flat():
+    to_qtree = Converter({
+        "qtree": "qtree",
+        "status": "status",
+        "security-style": "security_style",
+    })
+    item = {"qtree": "q1", "status": "normal", "security-style": "unix", "oplocks": "enabled"}
+    assert to_qtree(item) == {"qtree": "q1", "status": "normal", "security_style": "unix"}
+    assert to_qtree.build(QTree, item) == QTree(qtree="q1", status="normal", security_style="unix")
+
+
+def test_convert_missing_keys():
+    to_qtree = Converter({
+        "qtree": "qtree",
+        "status": "status",
+        "security-style": ("security_style", lambda value: value.upper()),
+    }, defaults=dict(status="unknown"))
+    assert to_qtree({"qtree": "q1"}) == {"qtree": "q1", "status": "unknown", "security_style": None}
+
+
+def test_convert_required():
+    to_qtree = Converter({"qtree": "qtree", "status": "status"}, required=["qtree"])
+    with pytest.raises(KeyError):
+        to_qtree({"status": "normal"})
+
+
+def test_convert_defaults_not_in_field_map():
+    converter = Converter({"qtree": "qtree"}, defaults=dict(is_group=None, count=0))
+    assert converter({}) == {"qtree": None, "is_group": None, "count": 0}
+
+
+def test_convert_nested(to_volume):
+    item = {
+        "volume-id-attributes": {"name": "vol1", "type": "rw"},
+        "volume-state-attributes": {"state": "online"},
+        "volume-space-attributes": {"size-total": "100", "size-used": "40", "size-available": "60"},
+        "volume-inode-attributes": None,
+    }
+    assert to_volume.build(Volume, item, filer="filer99") == Volume(
+        name="vol1", snapable=True, state="online", size_total=100.0, size_used=40.0, size_available=60.0,
+        files_used=None, files_total=None, filer="filer99",
+    )
+
+
+def test_convert_nested_missing(to_volume):
+    values = to_volume({"volume-id-attributes": {"name": "vol1"}})
+    assert values["snapable"] is False
+    assert values["state"] is None
+    assert "filer" not in values
+    with pytest.raises(KeyError):
+        to_volume({})
+
+
+def test_build_extra_missing(to_volume):
+    with pytest.raises(TypeError):
+        to_volume.build(Volume, {"volume-id-attributes": {"name": "vol1"}})
+
+
+def test_invalid_field_map():
+    with pytest.raises(ValueError):
+        Converter({"qtree": "qtree"}, required=["status"])
+    with pytest.raises(ValueError):
+        Converter({"user-name": "user_or_group", "unix-group-name": "user_or_group"})
+    with pytest.raises(ValueError):
+        Converter({"filer": "filer"}, extra=["filer"])
+
+
+@pytest.mark.parametrize("func, value, result", [
+    (to_float, "12", 12.0),
+    (to_bool, "true", True),
+    (to_bool, "false", False),
+    (kbytes_or_unlimited, "2", 2048.0),
+    (kbytes_or_unlimited, "-", -1),
+    (number_or_unlimited, "5", 5.0),
+    (number_or_unlimited, "-", -1),
+])
+def test_value_functions(func, value, result):
+    assert func(value) == result
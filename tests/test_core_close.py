@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from mock import MagicMock
+
+from nidhogg.http import NidhoggHttp
+from nidhogg.sevenmode import SevenMode
+
+
+def test_close():
+    mock_http = MagicMock()
+    nidhogg = SevenMode("url", "user", "password", 1, 1, False, mock_http)
+    nidhogg.close()
+    nidhogg.http.close.assert_called_once_with()
+
+
+def test_context_manager():
+    mock_http = MagicMock()
+    with SevenMode("url", "user", "password", 1, 1, False, mock_http) as nidhogg:
+        assert isinstance(nidhogg, SevenMode)
+    nidhogg.http.close.assert_called_once_with()
+
+
+def test_pool_maxsize():
+    mock_http = MagicMock()
+    SevenMode("url", "user", "password", 1, 1, False, mock_http, pool_maxsize=5)
+    mock_http.assert_called_once_with("url", "user", "password", False, pool_maxsize=5)
+
+
+def test_custom_http():
+    class CustomHttp(object):
+        # transport without param pool_maxsize
+        def __init__(self, url, username, password, verify):
+            self.url = url
+
+    nidhogg = SevenMode("url", "user", "password", 1, 1, False, CustomHttp)
+    assert isinstance(nidhogg.http, CustomHttp)
+
+
+def test_shared_http():
+    first = SevenMode("url", "user", "password", 1, 1, False)
+    second = SevenMode("url", "user", "password", 1, 1, False, first.http)
+    assert isinstance(first.http, NidhoggHttp)
+    assert second.http is first.http
@@ -3,20 +3,27 @@ from __future__ import unicode_literals
 
 
 def test_create_request(allmodes):
-    # tag order differs sometimes
-    ver_a = "<foobar><a>1</a><b>2</b></foobar>"
-    ver_b = "<foobar><b>2</b><a>1</a></foobar>"
+    xml = (
+        "<?xml version='1.0' encoding='utf-8'?>\n"
+        "<netapp version='1.1' xmlns='http://www.netapp.com/filer/admin' nmsdk_version='development' "
+        "nmsdk_language='python' nmsdk_app='Nidhogg'>"
+        "<foo-bar><a-a>1</a-a><b>2</b></foo-bar>"
+        "</netapp>"
+    )
+    assert allmodes._create_request("foo_bar", {"a_a": 1, "b": 2}) == xml.encode("utf-8")
 
-    xml = """<?xml version='1.0' encoding='utf-8'?>
-<netapp version='1.1'
-        xmlns='http://www.netapp.com/filer/admin'
-        nmsdk_version='development'
-        nmsdk_language='python'
-        nmsdk_app='Nidhogg'>
-    {}
-</netapp>"""
-    try:
-        assert allmodes._create_request(foobar={"a": 1, "b": 2}) == xml.format(ver_a)
-    except AssertionError:
-        # try it with other xml tag order again
-        assert allmodes._create_request(foobar={"a": 1, "b": 2}) == xml.format(ver_b)
+
+def test_create_request_cached_envelope(allmodes):
+    allmodes._create_request("foo_bar", {})
+    encoder = allmodes._encoder
+    allmodes._create_request("foo_bar", {"a": 1})
+    assert allmodes._encoder is encoder
+    assert list(encoder._templates) == ["foo_bar"]
+
+
+def test_create_request_share_properties(clustermode):
+    req = clustermode._create_request("cifs_share_create", {"share_properties": ["browsable", "oplocks"]})
+    assert (
+        b"<share-properties><cifs-share-properties>browsable</cifs-share-properties>"
+        b"<cifs-share-properties>oplocks</cifs-share-properties></share-properties>"
+    ) in req
@@ -5,6 +5,7 @@ from mock import MagicMock
 import pytest
 
 import xml
+from xml.etree.ElementTree import ParseError
 from nidhogg.core import NidhoggException
 from nidhogg.sevenmode import SevenMode
 
@@ -27,6 +28,8 @@ def test_core_do(nidhogg, std_netapp_reply):
     assert r == std_netapp_reply
     nidhogg.http.invoke_request.assert_called_with("req")
     nidhogg.http.parse_xml_reply.assert_called_with("reply")
+    # no state of the call is stored on the shared connection object
+    assert "xmldict" not in nidhogg.__dict__
 
 
 @pytest.fixture
@@ -49,3 +52,35 @@ def nidhogg_parse_xml_reply_failed(nidhogg):
 def test_core_do_parse_xml_reply(nidhogg_parse_xml_reply_failed):
     with pytest.raises(NidhoggException):
         nidhogg_parse_xml_reply_failed._do("foobar_api", a_a=1, b=2)
+
+
+def iter_xml_reply_mock(records, **results):
+    def iter_xml_reply(response, element, res, stats=None, keep_body=False):
+        res.update(results)
+        for record in records:
+            yield record
+    return iter_xml_reply
+
+
+def test_core_do_iter(nidhogg):
+    nidhogg.http.invoke_request_stream.return_value = "reply"
+    nidhogg.http.iter_xml_reply.side_effect = iter_xml_reply_mock([{'a': "1"}, {'a': "2"}], **{'@status': "passed", 'num-records': "2"})
+    results = {}
+    assert list(nidhogg._do_iter("foobar_api", "foobar-info", results, a_a=1)) == [{'a': "1"}, {'a': "2"}]
+    assert results == {'@status': "passed", 'num-records': "2"}
+    nidhogg.http.invoke_request_stream.assert_called_with("req")
+
+
+def test_core_do_iter_failed(nidhogg):
+    nidhogg.http.iter_xml_reply.side_effect = iter_xml_reply_mock([], **{'@status': "failed", '@reason': "bla blubb error"})
+    with pytest.raises(NidhoggException):
+        list(nidhogg._do_iter("foobar_api", "foobar-info", {}))
+
+
+def test_core_do_iter_parse_error(nidhogg):
+    def iter_xml_reply(response, element, res, stats=None, keep_body=False):
+        raise ParseError("haha")
+        yield   # pragma: no cover
+    nidhogg.http.iter_xml_reply.side_effect = iter_xml_reply
+    with pytest.raises(NidhoggException):
+        list(nidhogg._do_iter("foobar_api", "foobar-info", {}))
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
+
+
+def test_desired_attributes_sent(clustermode):
+    list(clustermode.iter_cifs_shares())
+    assert clustermode.sent[0][1]['desired_attributes'] == {
+        'cifs_share': {'path': None, 'share_name': None}
+    }
+
+
+def test_add_desired_attributes(clustermode):
+    clustermode.add_desired_attributes("volume_get_iter", dict(
+        volume_attributes=dict(
+            volume_id_attributes=dict(junction_path=None),
+            volume_autosize_attributes=dict(mode=None),
+        )
+    ))
+    clustermode.list_volumes()
+    volume_attributes = clustermode.sent[0][1]['desired_attributes']['volume_attributes']
+    assert volume_attributes['volume_id_attributes'] == {'name': None, 'type': None, 'junction_path': None}
+    assert volume_attributes['volume_autosize_attributes'] == {'mode': None}
+    # other objects are not affected
+    assert ClusterMode.desired_attributes is DESIRED_ATTRIBUTES
+    assert 'volume_autosize_attributes' not in DESIRED_ATTRIBUTES['volume_get_iter']['volume_attributes']
+
+
+def test_add_desired_attributes_new_api(clustermode):
+    clustermode.add_desired_attributes("aggr_get_iter", dict(aggr_attributes=dict(aggregate_name=None)))
+    assert clustermode.desired_attributes["aggr_get_iter"] == {'aggr_attributes': {'aggregate_name': None}}
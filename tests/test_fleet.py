@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import mock
+import pytest
+
+from nidhogg.core import NidhoggException
+from nidhogg.fleet import Fleet
+
+
+FILERS = ["filer01", "filer02", ("filer03", "other", "secret")]
+
+
+@pytest.fixture
+def connections():
+    connections = {}
+
+    def get_netapp(url, username, password, verify=False, pool_maxsize=None):
+        if url == "filer02":
+            raise NidhoggException("connection refused")
+        connections[url] = mock.MagicMock(name=url)
+        connections[url].username = username
+        connections[url].list_volumes.return_value = [url]
+        return connections[url]
+
+    with mock.patch("nidhogg.get_netapp", side_effect=get_netapp):
+        yield connections
+
+
+def test_call(connections):
+    results = Fleet(FILERS, "user", "password", max_workers=2).list_volumes()
+    assert list(results) == ["filer01", "filer02", "filer03"]
+    assert results["filer01"]["result"] == ["filer01"]
+    assert results["filer01"]["error"] is None
+    assert results["filer03"]["result"] == ["filer03"]
+    assert results["filer02"]["result"] is None
+    assert isinstance(results["filer02"]["error"], NidhoggException)
+    assert all(r["duration"] >= 0 for r in results.values())
+    assert connections["filer01"].username == "user"
+    assert connections["filer03"].username == "other"
+
+
+def test_call_error(connections):
+    fleet = Fleet(["filer01", "filer03"], "user", "password")
+    fleet.connection("filer01").get_snapmirror_status.side_effect = NidhoggException("failed")
+    results = fleet.get_snapmirror_status(volume="vol1")
+    assert isinstance(results["filer01"]["error"], NidhoggException)
+    assert results["filer03"]["error"] is None
+    connections["filer03"].get_snapmirror_status.assert_called_once_with(volume="vol1")
+
+
+def test_call_function(connections):
+    results = Fleet(["filer01"], "user", "password").call(lambda filer, suffix: filer.list_volumes()[0] + suffix, "!")
+    assert results["filer01"]["result"] == "filer01!"
+
+
+def test_connections_reused_and_closed(connections):
+    with Fleet(["filer01", "filer03"], "user", "password") as fleet:
+        fleet.get_volumes_with_quota_info(filter_volume_names=["vol1"])
+        first = dict(fleet.connections)
+        fleet.list_volumes()
+        assert fleet.connections == first
+    assert fleet.connections == {}
+    first["filer01"].close.assert_called_once_with()
+    first["filer01"].get_volumes_with_quota_info.assert_called_once_with(filter_volume_names=["vol1"])
@@ -9,12 +9,24 @@ from nidhogg.sevenmode import SevenMode
 from nidhogg.clustermode import ClusterMode
 
 
+QUOTA_ENTRY = {
+    'disk-limit': "1024",
+    'file-limit': "-",
+    'threshold': "-",
+    'soft-disk-limit': "-",
+    'soft-file-limit': "-"
+}
+
+
 def test_get_quota_sevenmode_api(sevenmode):
+    sevenmode.patched_return_value = {'netapp': {'results': dict(QUOTA_ENTRY, **{'@status': "passed"})}}
     sevenmode.get_quota("volume", "qtree")
     assert sevenmode.sent == [('quota_get_entry', {'qtree': "", 'quota-target': "/vol/volume/qtree", 'quota-type': "tree", 'volume': "volume"})]
 
 
 def test_get_quota_clustermode_api(clustermode):
+    clustermode.patched_return_value = {'netapp': {'results': {
+        '@status': "passed", 'num-records': "1", 'attributes-list': {'quota-entry': QUOTA_ENTRY}}}}
     clustermode.get_quota("volume", "qtree")
     assert clustermode.sent == [('quota_list_entries_iter', dict(
         query=dict(
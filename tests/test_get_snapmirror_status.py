@@ -5,7 +5,7 @@ import pytest
 
 from nidhogg.compatible import SnapmirrorStatus
 from nidhogg.sevenmode import SevenMode
-from nidhogg.clustermode import ClusterMode
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
 
 
 cluster_snapmirror_status = {
@@ -136,7 +136,7 @@ def test_get_snapmirror_status_cluster_api_1(clustermode):
     clustermode.get_snapmirror_status()
     assert clustermode.sent == [(
         'snapmirror_get_iter',
-        {}
+        {'desired_attributes': DESIRED_ATTRIBUTES['snapmirror_get_iter'], 'max_records': 1000}
     )]
 
 
@@ -145,12 +145,13 @@ def test_get_snapmirror_status_cluster_api_2(clustermode):
     assert clustermode.sent == [(
         'snapmirror_get_iter',
         {
+            'desired_attributes': DESIRED_ATTRIBUTES['snapmirror_get_iter'],
             'query': {
                 'snapmirror_info': {
                     'destination_location': u'my:volume'
                 }
             },
-            'max_records': 65536
+            'max_records': 1000
         }
     )]
 
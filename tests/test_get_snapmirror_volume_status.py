@@ -8,6 +8,9 @@ from nidhogg.sevenmode import SevenMode
 
 
 def test_get_snapmirror_volume_status_sevenmode_api(sevenmode):
+    sevenmode.patched_return_value = {'netapp': {'results': {
+        '@status': "passed", 'is-source': "true", 'is-destination': "false", 'is-transfer-in-progress': "false",
+        'is-transfer-broken': "false"}}}
     sevenmode.get_snapmirror_volume_status("volume")
     assert sevenmode.sent == [(
         'snapmirror_get_volume_status',
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import threading
+
 from mock import patch, MagicMock
 import pytest
 
@@ -13,19 +15,48 @@ def http():
 
 
 def test_invoke_request(http):
-    with patch("requests.post") as mock_post:
+    with patch("requests.Session.post") as mock_post:
         mock_post.return_value = MagicMock(text="my return mock")
         rep = http.invoke_request("this object should be posted")
         mock_post.assert_called_with(
             "https://example.com{}".format(FILER_URL),
-            auth=("user", "password"),
             data="this object should be posted",
-            headers={'Content-Type': 'text/xml; charset="UTF-8"'},
-            verify=False
         )
         assert rep == "my return mock"
 
 
+def test_session(http):
+    assert http.session.auth == ("user", "password")
+    assert http.session.verify is False
+    assert http.session.headers['Content-Type'] == 'text/xml; charset="UTF-8"'
+
+
+def test_session_pool_maxsize():
+    http = NidhoggHttp("https://example.com", "user", "password", pool_maxsize=3)
+    assert http.session.get_adapter("https://example.com")._pool_maxsize == 3
+
+
+def test_close(http):
+    assert http.session is not None
+    with patch("requests.Session.close") as mock_close:
+        http.close()
+        mock_close.assert_called_once_with()
+
+
+def test_session_per_thread(http):
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(http.session))
+    thread.start()
+    thread.join()
+    assert http.session is http.session
+    assert sessions[0] is not http.session
+    with patch("requests.Session.close") as mock_close:
+        http.close()
+        assert mock_close.call_count == 2
+    # new sessions after closing
+    assert http.session is not sessions[0]
+
+
 def test_parse_xml_reply(http):
     xml = "<a>6</a>"
     assert http.parse_xml_reply(xml)['a'] == "6"
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+import os
+
+from mock import MagicMock, patch
+import pytest
+import xmltodict
+
+from nidhogg.http import NidhoggHttp, FILER_URL
+from nidhogg.utils import as_list
+
+
+XML_DIR = os.path.join(os.path.dirname(__file__), "..", "xml")
+
+
+def reply_from_file(filename):
+    # the fixtures contain the request followed by the results, use the first results
+    with io.open(os.path.join(XML_DIR, filename), encoding="utf-8") as f:
+        content = f.read()
+    results = content[content.index("<results"):content.index("</results>") + len("</results>")]
+    return '<?xml version="1.0" encoding="UTF-8"?>\n<netapp xmlns="http://www.netapp.com/filer/admin" version="1.21">{0}</netapp>'.format(results)
+
+
+def streamed(xml):
+    return MagicMock(raw=io.BytesIO(xml.encode("utf-8")))
+
+
+@pytest.fixture
+def http():
+    return NidhoggHttp("https://example.com", "user", "password")
+
+
+def test_invoke_request_stream(http):
+    with patch("requests.Session.post") as mock_post:
+        r = http.invoke_request_stream("this object should be posted")
+        mock_post.assert_called_with(
+            "https://example.com{}".format(FILER_URL),
+            data="this object should be posted",
+            stream=True,
+        )
+        assert r.raw.decode_content is True
+
+
+@pytest.mark.parametrize("filename,element", [
+    ("clustermode/volume-get-iter.xml", "volume-attributes"),
+    ("clustermode/quota-report-iter.xml", "quota"),
+    ("clustermode/qtree-list-iter.xml", "qtree-info"),
+    ("clustermode/cifs-share-access-control-get-iter.xml", "cifs-share-access-control"),
+])
+def test_iter_xml_reply_same_as_xmltodict(http, filename, element):
+    xml = reply_from_file(filename)
+    expected = xmltodict.parse(xml)["netapp"]["results"]
+    response = streamed(xml)
+    results = {}
+    records = list(http.iter_xml_reply(response, element, results))
+    assert records == as_list(expected["attributes-list"][element])
+    assert results == {'@status': "passed", 'num-records': expected["num-records"]}
+    response.close.assert_called_once_with()
+
+
+def test_iter_xml_reply_next_tag(http):
+    xml = """<netapp xmlns="http://www.netapp.com/filer/admin"><results status="passed">
+        <attributes-list><qtree-info><qtree>a</qtree></qtree-info></attributes-list>
+        <next-tag>tag1</next-tag><num-records>1</num-records>
+    </results></netapp>"""
+    results = {}
+    assert list(http.iter_xml_reply(streamed(xml), "qtree-info", results)) == [{'qtree': "a"}]
+    assert results == {'@status': "passed", 'next-tag': "tag1", 'num-records': "1"}
+
+
+def test_iter_xml_reply_failed(http):
+    xml = """<netapp xmlns="http://www.netapp.com/filer/admin">
+        <results status="failed" reason="bla blubb error" errno="13005"/>
+    </netapp>"""
+    results = {}
+    assert list(http.iter_xml_reply(streamed(xml), "qtree-info", results)) == []
+    assert results == {'@status': "failed", '@reason': "bla blubb error", '@errno': "13005"}
+
+
+def test_iter_xml_reply_stats(http, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("nidhogg.http.default_timer", lambda: now[0])
+    reads = []
+
+    class SlowRaw(io.BytesIO):
+        def read(self, size=-1):
+            # every read takes 1s
+            now[0] += 1
+            reads.append(size)
+            return super(SlowRaw, self).read(size)
+
+    xml = """<netapp xmlns="http://www.netapp.com/filer/admin"><results status="passed">
+        <attributes-list><qtree-info><qtree>ä</qtree></qtree-info><qtree-info><qtree>b</qtree></qtree-info>
+        </attributes-list><num-records>2</num-records>
+    </results></netapp>""".encode("utf-8")
+    stats = {}
+    for record in http.iter_xml_reply(MagicMock(raw=SlowRaw(xml)), "qtree-info", {}, stats):
+        # the time of the caller is not counted
+        now[0] += 100
+    assert stats == {'bytes': len(xml), 'network_time': float(len(reads)), 'parse_time': 0.0}
+
+
+def test_iter_xml_reply_keep_body(http):
+    xml = """<netapp xmlns="http://www.netapp.com/filer/admin"><results status="passed">
+        <attributes-list><qtree-info><qtree>a</qtree></qtree-info></attributes-list>
+    </results></netapp>"""
+    stats = {}
+    assert list(http.iter_xml_reply(streamed(xml), "qtree-info", {}, stats, keep_body=True)) == [{'qtree': "a"}]
+    assert stats["body"] == xml.encode("utf-8")
+
+
+def test_iter_xml_reply_stats_closed(http):
+    xml = """<netapp xmlns="http://www.netapp.com/filer/admin"><results status="passed">
+        <attributes-list><qtree-info><qtree>a</qtree></qtree-info><qtree-info><qtree>b</qtree></qtree-info>
+        </attributes-list><num-records>2</num-records>
+    </results></netapp>"""
+    stats = {}
+    records = http.iter_xml_reply(streamed(xml), "qtree-info", {}, stats)
+    next(records)
+    records.close()
+    assert stats["bytes"] > 0
+    assert stats["parse_time"] >= 0
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import types
+
+import pytest
+from mock import MagicMock
+
+from nidhogg.core import Nidhogg, NidhoggException
+from nidhogg.sevenmode import SevenMode
+from nidhogg.clustermode import ClusterMode
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {
+        'num-records': "2",
+        'attributes-list': {
+            'qtree-info': [
+                {'qtree': "qtree1", 'status': "normal", 'security-style': "ntfs"},
+                {'qtree': "qtree2", 'status': "normal", 'security-style': "unix"},
+            ]
+        }
+    }),
+    (SevenMode, {
+        'qtrees': {
+            'qtree-info': [
+                {'qtree': "qtree1", 'status': "normal", 'security-style': "ntfs"},
+                {'qtree': "qtree2", 'status': "normal", 'security-style': "unix"},
+            ]
+        }
+    })
+], indirect=True)
+def test_iter_qtrees(mode):
+    qtrees = mode.iter_qtrees("vol")
+    assert isinstance(qtrees, types.GeneratorType)
+    # nothing is requested until the generator is consumed
+    assert mode.sent == []
+    assert [qt['qtree'] for qt in qtrees] == ["qtree1", "qtree2"]
+    assert [qt['qtree'] for qt in mode.list_qtrees("vol")] == ["qtree1", "qtree2"]
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {
+        'num-records': "1",
+        'attributes-list': {
+            'snapshot-info': {'name': "snap1"}
+        }
+    }),
+    (SevenMode, {
+        'snapshots': {
+            'snapshot-info': {'name': "snap1"}
+        }
+    })
+], indirect=True)
+def test_iter_snapshots_single_entry(mode):
+    assert list(mode.iter_snapshots("vol")) == [{'name': "snap1"}]
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {'num-records': "0"}),
+    (SevenMode, {})
+], indirect=True)
+def test_iter_volumes_no_entries(mode):
+    assert list(mode.iter_volumes()) == []
+
+
+def test_iter_cifs_shares_sevenmode_ends_tag(sevenmode, monkeypatch):
+    def get_tag(*args, **kwargs):
+        return dict(netapp=dict(results=dict(tag="12345")))
+    monkeypatch.setattr("nidhogg.sevenmode.SevenMode._start_cifs_shares", get_tag)
+    list(sevenmode.iter_cifs_shares())
+    assert sevenmode.sent[-1] == ('cifs_share_list_iter_end', {'tag': "12345"})
+
+
+def test_iter_cifs_shares_sevenmode_batches(sevenmode, monkeypatch):
+    def get_tag(*args, **kwargs):
+        return dict(netapp=dict(results=dict(tag="12345")))
+
+    def share(name):
+        return {'mount-point': "/vol/vol1/" + name, 'share-name': name}
+    monkeypatch.setattr("nidhogg.sevenmode.SevenMode._start_cifs_shares", get_tag)
+    replies = [
+        {'records': "2", 'cifs-shares': {'cifs-share-info': [share("a"), share("b")]}},
+        {'records': "1", 'cifs-shares': {'cifs-share-info': share("c")}},
+        {'records': "0"},
+    ]
+
+    def do(api, **kwargs):
+        sevenmode.sent.append((api, kwargs))
+        results = replies.pop(0) if api.endswith("_next") else {}
+        return dict(netapp=dict(results=results))
+    monkeypatch.setattr(sevenmode, "_do", do)
+    sevenmode.batch_size = 2
+    assert [s["share_name"] for s in sevenmode.iter_cifs_shares()] == ["a", "b", "c"]
+    assert sevenmode.sent == [
+        ('cifs_share_list_iter_next', {'tag': "12345", 'maximum': 2}),
+        ('cifs_share_list_iter_next', {'tag': "12345", 'maximum': 2}),
+        ('cifs_share_list_iter_next', {'tag': "12345", 'maximum': 2}),
+        ('cifs_share_list_iter_end', {'tag': "12345"}),
+    ]
+
+
+def test_iter_cifs_shares_sevenmode_ends_tag_on_error(sevenmode_failed, monkeypatch):
+    def get_tag(*args, **kwargs):
+        return dict(netapp=dict(results=dict(tag="12345")))
+    monkeypatch.setattr("nidhogg.sevenmode.SevenMode._start_cifs_shares", get_tag)
+    with pytest.raises(NidhoggException):
+        list(sevenmode_failed.iter_cifs_shares())
+    assert sevenmode_failed.sent[-1] == ('cifs_share_list_iter_end', {'tag': "12345"})
+
+
+class ListOnlyMode(Nidhogg):
+    """Mode implementing the list methods only, the iter methods and get_qtree are inherited."""
+
+    def list_qtrees(self, volume):
+        return [dict(qtree="qtree1"), dict(qtree="qtree2")]
+
+    def list_cifs_shares(self):
+        return [dict(share_name="share1"), dict(share_name="share2")]
+
+    def list_cifs_acls(self, share_name):
+        return [dict(share_name=share_name, user_or_group="user1")]
+
+    list_volumes = volume_info = list_snapshots = get_quota = list_quotas = create_cifs_share = None
+    set_cifs_acl = delete_cifs_acl = delete_cifs_acls = set_quota = delete_quota = update_snapmirror = None
+    update_snapmirror_with_snapshot = get_snapmirror_status = get_snapmirror_volume_status = None
+    create_snapshot = list_snapmirror_destinations = None
+
+
+def test_default_iter_methods():
+    mode = ListOnlyMode("url", "user", "password", 1, 15, False, MagicMock())
+    qtrees = mode.iter_qtrees("vol")
+    assert isinstance(qtrees, types.GeneratorType)
+    assert [qt["qtree"] for qt in qtrees] == ["qtree1", "qtree2"]
+    assert [ace["share_name"] for ace in mode.iter_cifs_acls("share1")] == ["share1"]
+    assert [ace["share_name"] for ace in mode.iter_all_cifs_acls()] == ["share1", "share2"]
+    assert mode.get_qtree("vol", "qtree2") == dict(qtree="qtree2")
+    assert mode.get_qtree("vol", "qtree3") is None
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+from nidhogg.core import NidhoggException
+from nidhogg.sevenmode import SevenMode
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
+
+
+@pytest.fixture
+def patch_start_cifs_acls(monkeypatch):
+    # patching start method to get the tag, used as input param
+    def get_tag(*args, **kwargs):
+        return dict(netapp=dict(results=dict(tag="12345")))
+    monkeypatch.setattr("nidhogg.sevenmode.SevenMode._start_cifs_acls", get_tag)
+
+
+def test_start_all_cifs_acls_sevenmode_api(sevenmode):
+    sevenmode._start_cifs_acls()
+    assert sevenmode.sent == [('cifs_share_acl_list_iter_start', {})]
+
+
+def test_list_all_cifs_acls_clustermode_api(clustermode):
+    clustermode.list_all_cifs_acls()
+    assert clustermode.sent == [('cifs_share_access_control_get_iter', {
+        'desired_attributes': DESIRED_ATTRIBUTES['cifs_share_access_control_get_iter'],
+        'max_records': 1000
+    })]
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {
+        'num-records': "3",
+        'attributes-list': {
+            'cifs-share-access-control': [{
+                'permission': "full_control",
+                'share': "share1",
+                'user-or-group': "user1",
+            }, {
+                'permission': "read",
+                'share': "share2",
+                'user-or-group': "user2",
+            }, {
+                'permission': "change",
+                'share': "share1",
+                'user-or-group': "user3",
+            }]
+        }
+    }),
+    (SevenMode, {
+        'records': "2",
+        'cifs-share-acls': {
+            'cifs-share-acl-info': [{
+                'share-name': "share1",
+                'user-acl-info': {
+                    "access-rights-info": [{
+                        'user-name': "user1",
+                        'access-rights': "full_control",
+                    }, {
+                        'user-name': "user3",
+                        'access-rights': "change",
+                    }]
+                }
+            }, {
+                'share-name': "share2",
+                'user-acl-info': {
+                    "access-rights-info": {
+                        'unix-group-name': "user2",
+                        'access-rights': "read",
+                    }
+                }
+            }]
+        }
+    })
+], indirect=True)
+def test_list_all_cifs_acls(mode, patch_start_cifs_acls):
+    acls = mode.list_all_cifs_acls()
+    assert sorted(acls) == ["share1", "share2"]
+    assert [ace['user_or_group'] for ace in acls["share1"]] == ["user1", "user3"]
+    assert [ace['permission'] for ace in acls["share1"]] == ["full_control", "change"]
+    assert [ace['user_or_group'] for ace in acls["share2"]] == ["user2"]
+    # a single iteration
+    assert len(set(api for api, _ in mode.sent if not api.endswith("_end"))) == 1
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {'num-records': "0"}),
+    (SevenMode, {'records': "0"})
+], indirect=True)
+def test_list_all_cifs_acls_no_entries(mode, patch_start_cifs_acls):
+    assert mode.list_all_cifs_acls() == {}
+
+
+def test_list_all_cifs_acls_failed(allmodes_failed):
+    with pytest.raises(NidhoggException):
+        allmodes_failed.list_all_cifs_acls()
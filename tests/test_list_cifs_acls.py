@@ -5,7 +5,7 @@ import pytest
 
 from nidhogg.core import NidhoggException
 from nidhogg.sevenmode import SevenMode
-from nidhogg.clustermode import ClusterMode
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
 
 
 def test_start_cifs_acl_sevenmode_api(sevenmode):
@@ -28,14 +28,14 @@ def test_list_cifs_acl_sevenmode_api(sevenmode, monkeypatch):
     monkeypatch.setattr("nidhogg.sevenmode.SevenMode._start_cifs_acls", get_tag)
     sevenmode.list_cifs_acls("share")
     assert sevenmode.sent == [
-        ('cifs_share_acl_list_iter_next', {'tag': "12345", 'maximum': u'1'}),
+        ('cifs_share_acl_list_iter_next', {'tag': "12345", 'maximum': 1000}),
         ('cifs_share_acl_list_iter_end', {'tag': "12345"})
     ]
 
 
 def test_list_cifs_acls_clustermode_api(clustermode):
     clustermode.list_cifs_acls("share")
-    assert clustermode.sent == [('cifs_share_access_control_get_iter', {'max_records': 65536, 'query': {'cifs_share_access_control': {'share': u'share'}}})]
+    assert clustermode.sent == [('cifs_share_access_control_get_iter', {'desired_attributes': DESIRED_ATTRIBUTES['cifs_share_access_control_get_iter'], 'max_records': 1000, 'query': {'cifs_share_access_control': {'share': u'share'}}})]
 
 
 seven_ret_value = {
@@ -5,7 +5,7 @@ import pytest
 
 from nidhogg.core import NidhoggException
 from nidhogg.sevenmode import SevenMode
-from nidhogg.clustermode import ClusterMode
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
 
 
 def test_list_qtrees_sevenmode_api(sevenmode):
@@ -15,7 +15,7 @@ def test_list_qtrees_sevenmode_api(sevenmode):
 
 def test_list_qtrees_clustermode_api(clustermode):
     clustermode.list_qtrees("asdf")
-    assert clustermode.sent == [('qtree_list_iter', {'max_records': 65536, 'query': {'qtree_info': {'volume': "asdf"}}})]
+    assert clustermode.sent == [('qtree_list_iter', {'desired_attributes': DESIRED_ATTRIBUTES['qtree_list_iter'], 'max_records': 1000, 'query': {'qtree_info': {'volume': "asdf"}}})]
 
 
 seven_ret_value = {
@@ -59,13 +59,50 @@ def test_list_qtrees(mode):
          {"qtree": "hallo", "status": "normal", 'security_style': "unix"}]
 
 
+def test_exists_qtree_sevenmode(sevenmode):
+    sevenmode.patched_return_value = {'netapp': {'results': seven_ret_value}}
+    assert True is sevenmode.exists_qtree("asdf", "hallo")
+    assert False is sevenmode.exists_qtree("asdf", "servus")
+    # qtrees of the volume are listed once
+    assert sevenmode.sent == [('qtree_list', {'volume': 'asdf'})]
+
+
+def test_exists_qtree_sevenmode_create_qtree(sevenmode):
+    sevenmode.patched_return_value = {'netapp': {'results': seven_ret_value}}
+    assert False is sevenmode.exists_qtree("asdf", "servus")
+    sevenmode.create_qtree("asdf", "servus")
+    sevenmode.exists_qtree("asdf", "servus")
+    assert [api for api, _ in sevenmode.sent] == ['qtree_list', 'qtree_create', 'qtree_list']
+
+
+def test_get_qtree_clustermode_api(clustermode):
+    clustermode.get_qtree("asdf", "hallo")
+    assert clustermode.sent == [('qtree_list_iter', {
+        'desired_attributes': DESIRED_ATTRIBUTES['qtree_list_iter'],
+        'max_records': 1000,
+        'query': {'qtree_info': {'volume': "asdf", 'qtree': "hallo"}}
+    })]
+
+
 @pytest.mark.parametrize('mode', [
-    (ClusterMode, cluster_ret_value),
+    (ClusterMode, {
+        'attributes-list': {'qtree-info': {'qtree': "hallo", 'status': "normal", 'security-style': "unix"}},
+        'num-records': 1,
+    }),
+    (SevenMode, seven_ret_value)
+], indirect=True)
+def test_get_qtree(mode):
+    assert mode.get_qtree("asdf", "hallo") == {"qtree": "hallo", "status": "normal", 'security_style': "unix"}
+    assert mode.exists_qtree("asdf", "hallo") is True
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {'num-records': 0}),
     (SevenMode, seven_ret_value)
 ], indirect=True)
-def test_exists_qtree(mode):
-    assert True is mode.exists_qtree("asdf", "hallo")
-    assert False is mode.exists_qtree("asdf", "servus")
+def test_get_qtree_not_found(mode):
+    assert mode.get_qtree("asdf", "servus") is None
+    assert mode.exists_qtree("asdf", "servus") is False
 
 
 @pytest.mark.parametrize('mode', [
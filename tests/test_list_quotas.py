@@ -5,7 +5,7 @@ import pytest
 
 from nidhogg.core import NidhoggException
 from nidhogg.sevenmode import SevenMode
-from nidhogg.clustermode import ClusterMode
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
 
 
 def test_list_quotas_sevenmode_api(sevenmode):
@@ -15,7 +15,7 @@ def test_list_quotas_sevenmode_api(sevenmode):
 
 def test_list_quotas_clustermode_api(clustermode):
     clustermode.list_quotas("asdf")
-    assert clustermode.sent == [('quota_report_iter', {'max_records': 65536, 'query': {'quota': {'volume': "asdf"}}})]
+    assert clustermode.sent == [('quota_report_iter', {'desired_attributes': DESIRED_ATTRIBUTES['quota_report_iter'], 'max_records': 1000, 'query': {'quota': {'volume': "asdf"}}})]
 
 
 seven_ret_value = {
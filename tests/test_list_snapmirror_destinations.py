@@ -3,7 +3,7 @@ from __future__ import unicode_literals
 
 import pytest
 
-from nidhogg.clustermode import ClusterMode
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
 
 
 cluster_snapmirror_destination_info = {
@@ -44,7 +44,7 @@ def test_list_snapmirror_destinatons_api_1(clustermode):
     clustermode.list_snapmirror_destinations()
     assert clustermode.sent == [(
         'snapmirror_get_destination_iter',
-        {}
+        {'desired_attributes': DESIRED_ATTRIBUTES['snapmirror_get_destination_iter'], 'max_records': 1000}
     )]
 
 
@@ -53,12 +53,13 @@ def test_list_snapmirror_destinatons_api_2(clustermode):
     assert clustermode.sent == [(
         'snapmirror_get_destination_iter',
         {
+            'desired_attributes': DESIRED_ATTRIBUTES['snapmirror_get_destination_iter'],
             'query': {
                 'snapmirror_destination_info': {
                     'source_location': u'my:volume'
                 }
             },
-            'max_records': 65536
+            'max_records': 1000
         }
     )]
 
@@ -4,7 +4,7 @@ from __future__ import unicode_literals
 import pytest
 
 from nidhogg.sevenmode import SevenMode
-from nidhogg.clustermode import ClusterMode
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
 
 
 def test_list_snapshots_sevenmode_api(sevenmode):
@@ -14,7 +14,7 @@ def test_list_snapshots_sevenmode_api(sevenmode):
 
 def test_list_snapshots_clustermode_api(clustermode):
     clustermode.list_snapshots("vol")
-    assert clustermode.sent == [('snapshot_get_iter', {'max_records': 65536, 'query': {'snapshot_info': {'volume': 'vol'}}})]
+    assert clustermode.sent == [('snapshot_get_iter', {'desired_attributes': DESIRED_ATTRIBUTES['snapshot_get_iter'], 'max_records': 1000, 'query': {'snapshot_info': {'volume': 'vol'}}})]
 
 
 @pytest.mark.parametrize('mode', [
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+from mock import MagicMock
+
+from nidhogg import metrics
+from nidhogg.compatible import ApiCallEvent
+from nidhogg.core import NidhoggException
+from nidhogg.metrics import HistogramCollector, Histogram, export_prometheus
+from nidhogg.sevenmode import SevenMode
+
+
+REPLY = "<netapp><results status='passed'><num-records>2</num-records></results></netapp>"
+
+
+@pytest.fixture
+def nidhogg():
+    mock_http = MagicMock()
+    nidhogg = SevenMode("https://filer99.example.com", "user", "password", 1, 1, False, mock_http)
+    nidhogg.http.invoke_request.return_value = REPLY
+    nidhogg.http.parse_xml_reply.return_value = {"netapp": {"results": {"@status": "passed", "num-records": "2"}}}
+    return nidhogg
+
+
+@pytest.fixture
+def events(nidhogg):
+    events = []
+    nidhogg.instruments.append(events.append)
+    return events
+
+
+def event(api="volume-get-iter", filer="filer99", status="passed", duration=0.2, records=2, bytes_in=100):
+    return ApiCallEvent(api=api, filer=filer, status=status, duration=duration, network_time=duration / 2,
+                        parse_time=duration / 2, bytes_out=10, bytes_in=bytes_in, records=records)
+
+
+def test_do_event(nidhogg, events):
+    nidhogg._do("volume_get_iter", max_records=2)
+    e, = events
+    assert e["api"] == "volume-get-iter"
+    assert e["filer"] == "filer99"
+    assert e["status"] == "passed"
+    assert e["records"] == 2
+    assert e["bytes_in"] == len(REPLY)
+    assert e["bytes_out"] == len(nidhogg._create_request("volume_get_iter", dict(max_records=2)))
+    assert e["duration"] >= e["network_time"] + e["parse_time"] >= 0
+
+
+def test_do_event_failed(nidhogg, events):
+    nidhogg.http.parse_xml_reply.return_value = {"netapp": {"results": {"@status": "failed", "@reason": "error"}}}
+    with pytest.raises(NidhoggException):
+        nidhogg._do("quota_status", volume="vol1")
+    assert events[0]["status"] == "failed"
+    assert events[0]["records"] is None
+
+
+def test_do_event_error(nidhogg, events):
+    nidhogg.http.invoke_request.side_effect = IOError("network down")
+    with pytest.raises(IOError):
+        nidhogg._do("quota_status", volume="vol1")
+    assert events[0]["status"] == "error"
+    assert events[0]["bytes_in"] is None
+    assert events[0]["parse_time"] == 0.0
+
+
+def iter_xml_reply(response, element, results, stats=None, keep_body=False):
+    results.update({"@status": "passed"})
+    try:
+        for record in [{"a": "1"}, {"a": "2"}, {"a": "3"}]:
+            yield record
+    finally:
+        stats.update(bytes=300, network_time=0.5, parse_time=0.25)
+
+
+def test_do_iter_event(nidhogg, events):
+    nidhogg.http.iter_xml_reply.side_effect = iter_xml_reply
+    assert len(list(nidhogg._do_iter("volume_get_iter", "volume-attributes", {}))) == 3
+    assert events[0]["status"] == "passed"
+    assert events[0]["records"] == 3
+    assert events[0]["bytes_in"] == 300
+    assert events[0]["network_time"] >= 0.5
+    assert events[0]["parse_time"] == 0.25
+
+
+def test_do_iter_event_closed(nidhogg, events):
+    nidhogg.http.iter_xml_reply.side_effect = iter_xml_reply
+    records = nidhogg._do_iter("volume_get_iter", "volume-attributes", {})
+    next(records)
+    records.close()
+    assert events[0]["status"] == "closed"
+    assert events[0]["records"] == 1
+    assert events[0]["bytes_in"] == 300
+
+
+def test_do_event_bytes(nidhogg, events):
+    reply = "<netapp><results status='passed'><comment>\u00e4</comment></results></netapp>"
+    nidhogg.http.invoke_request.return_value = reply
+    nidhogg._do("quota_status", volume="vol1")
+    assert events[0]["bytes_in"] == len(reply) + 1
+
+
+def test_failing_instrument(nidhogg, events):
+    nidhogg.instruments.insert(0, MagicMock(side_effect=ValueError("bug")))
+    nidhogg._do("quota_status", volume="vol1")
+    assert len(events) == 1
+
+
+def test_register(nidhogg):
+    collector = metrics.register(HistogramCollector())
+    try:
+        assert metrics.register(collector) is collector
+        assert metrics.INSTRUMENTS == [collector]
+        nidhogg._do("quota_status", volume="vol1")
+    finally:
+        metrics.unregister(collector)
+    assert metrics.INSTRUMENTS == []
+    nidhogg._do("quota_status", volume="vol1")
+    assert collector.stats[("quota-status", "filer99", "passed")].duration.count == 1
+
+
+def test_histogram():
+    histogram = Histogram([0.1, 1.0])
+    for value in [0.05, 0.1, 0.5, 5.0]:
+        histogram.observe(value)
+    assert histogram.cumulative_counts() == [2, 3]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(5.65)
+
+
+def test_hot_calls():
+    collector = HistogramCollector()
+    collector(event(api="quota-status", duration=0.1))
+    collector(event(api="quota-status", duration=0.1))
+    collector(event(api="volume-get-iter", duration=5.0))
+    (key, stats), = collector.hot_calls(1)
+    assert key == ("volume-get-iter", "filer99", "passed")
+    assert stats.records == 2
+    collector.clear()
+    assert collector.hot_calls() == []
+
+
+def test_export_prometheus():
+    collector = HistogramCollector(buckets=[0.1, 1.0])
+    collector(event(duration=0.5))
+    collector(event(filer='fi"ler', duration=2.0, bytes_in=None, records=None))
+    text = export_prometheus(collector)
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert "# TYPE nidhogg_api_duration_seconds histogram" in lines
+    labels = 'api="volume-get-iter",filer="filer99",status="passed"'
+    assert 'nidhogg_api_duration_seconds_bucket{%s,le="0.1"} 0' % labels in lines
+    assert 'nidhogg_api_duration_seconds_bucket{%s,le="1.0"} 1' % labels in lines
+    assert 'nidhogg_api_duration_seconds_bucket{%s,le="+Inf"} 1' % labels in lines
+    assert 'nidhogg_api_duration_seconds_sum{%s} 0.5' % labels in lines
+    assert 'nidhogg_api_duration_seconds_count{%s} 1' % labels in lines
+    assert 'nidhogg_api_records_total{%s} 2' % labels in lines
+    assert 'nidhogg_api_response_bytes_total{api="volume-get-iter",filer="fi\\"ler",status="passed"} 0' in lines
+    assert "# TYPE nidhogg_api_parse_seconds_total counter" in lines
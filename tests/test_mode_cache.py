@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import time
+
+from mock import patch, PropertyMock
+
+from nidhogg import get_netapp
+from nidhogg.cache import MODE_CACHE, ModeCache
+from nidhogg.clustermode import ClusterMode
+from nidhogg.sevenmode import SevenMode
+
+
+URL = "https://mynetapp.example.com"
+
+
+def test_get_set():
+    cache = ModeCache()
+    assert cache.get(URL) is None
+    cache.set(URL, True)
+    assert cache.get(URL) is True
+    cache.clear()
+    assert cache.get(URL) is None
+
+
+def test_ttl():
+    cache = ModeCache(ttl=10)
+    cache.set(URL, False)
+    assert cache.get(URL) is False
+    with patch("nidhogg.cache.time.time", return_value=time.time() + 11):
+        assert cache.get(URL) is None
+
+
+def test_file(tmpdir):
+    filename = str(tmpdir.join("modes.json"))
+    ModeCache(filename=filename).set(URL, True)
+    assert ModeCache(filename=filename).get(URL) is True
+
+
+def test_file_concurrent(tmpdir):
+    filename = str(tmpdir.join("modes.json"))
+    # i.e. two processes, both read the file before the other one wrote it
+    first, second = ModeCache(filename=filename), ModeCache(filename=filename)
+    assert first.get(URL) is None
+    assert second.get("https://other.example.com") is None
+    first.set(URL, True)
+    second.set("https://other.example.com", False)
+    cache = ModeCache(filename=filename)
+    assert cache.get(URL) is True
+    assert cache.get("https://other.example.com") is False
+
+
+def test_file_invalid(tmpdir):
+    filename = tmpdir.join("modes.json")
+    filename.write("no json")
+    assert ModeCache(filename=str(filename)).get(URL) is None
+
+
+def test_clustermode_reuses_probe():
+    with patch("nidhogg.SevenMode.clustered", new_callable=PropertyMock) as mock_clustered:
+        mock_clustered.return_value = True
+        with patch("nidhogg.sevenmode.SevenMode.close") as mock_close:
+            nidhogg = get_netapp(url="mynetapp.example.com", username="admin", password="secret")
+    assert isinstance(nidhogg, ClusterMode)
+    assert nidhogg.clustered is True
+    assert not mock_close.called
+    assert MODE_CACHE.get(URL) is True
+
+
+def test_cached_mode():
+    MODE_CACHE.set(URL, True)
+    with patch("nidhogg.SevenMode.clustered", new_callable=PropertyMock) as mock_clustered:
+        nidhogg = get_netapp(url="mynetapp.example.com", username="admin", password="secret")
+    assert not mock_clustered.called
+    assert isinstance(nidhogg, ClusterMode)
+    MODE_CACHE.set(URL, False)
+    assert isinstance(get_netapp(url="mynetapp.example.com", username="admin", password="secret"), SevenMode)
+
+
+def test_no_cache():
+    MODE_CACHE.set(URL, True)
+    with patch("nidhogg.SevenMode.clustered", new_callable=PropertyMock) as mock_clustered:
+        mock_clustered.return_value = False
+        nidhogg = get_netapp(url="mynetapp.example.com", username="admin", password="secret", mode_cache=None)
+    assert isinstance(nidhogg, SevenMode)
+    assert MODE_CACHE.get(URL) is True
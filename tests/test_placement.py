@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import mock
+import pytest
+
+from nidhogg import get_best_volume_across
+from nidhogg.compatible import FilerResult, Volume, VolumeWithQuotaRatio
+from nidhogg.core import NidhoggException
+from nidhogg.fleet import Fleet
+from nidhogg.placement import BY_SIZE, VolumeHeap
+
+
+def volume(name, size_available, quota_size, size_total=1000.0, filer="filer01"):
+    return VolumeWithQuotaRatio(
+        name=name, state="online", size_total=size_total, size_used=size_total - size_available,
+        size_available=size_available, files_used=10.0, files_total=100.0, snapable=True,
+        quota_size=quota_size, quota_ratio=quota_size / size_total, filer=filer
+    )
+
+
+def check_volume(volume, size):
+    return volume["size_available"] >= size
+
+
+@pytest.fixture
+def volumes():
+    return [volume("vol1", 100.0, 900.0), volume("vol2", 500.0, 300.0), volume("vol3", 800.0, 600.0)]
+
+
+def test_best_by_quota(volumes):
+    heap = VolumeHeap(volumes)
+    assert heap.best()["name"] == "vol2"
+    assert heap.best(check_volume, size=600.0)["name"] == "vol3"
+    assert len(heap) == 3
+
+
+def test_best_by_size(volumes):
+    assert VolumeHeap(volumes, by=BY_SIZE).best()["name"] == "vol3"
+
+
+def test_best_no_volume(volumes):
+    heap = VolumeHeap(volumes)
+    with pytest.raises(NidhoggException):
+        heap.best(check_volume, size=1000.0)
+    assert len(heap) == 3
+
+
+def test_unknown_ranking(volumes):
+    with pytest.raises(NidhoggException):
+        VolumeHeap(volumes, by="files")
+
+
+def test_allocate_by_quota(volumes):
+    heap = VolumeHeap(volumes)
+    # vol2 ratio: 0.3 -> 0.5 -> 0.7, vol3: 0.6
+    assert [heap.allocate(200.0)["name"] for _ in range(3)] == ["vol2", "vol2", "vol3"]
+    assert volumes[1]["quota_size"] == 700.0
+    assert volumes[1]["quota_ratio"] == 0.7
+
+
+def test_allocate_by_size(volumes):
+    heap = VolumeHeap(volumes, by=BY_SIZE)
+    assert [heap.allocate(200.0)["name"] for _ in range(3)] == ["vol3", "vol3", "vol2"]
+    assert volumes[2]["size_available"] == 400.0
+
+
+def test_top(volumes):
+    heap = VolumeHeap(volumes)
+    assert [v["name"] for v in heap.top(2)] == ["vol2", "vol3"]
+    assert [v["name"] for v in heap.top(5, check_volume, size=200.0)] == ["vol2", "vol3"]
+
+
+def test_get_best_volume_across(volumes):
+    fleet = Fleet(["filer01", "filer02", "filer03"], "user", "password")
+    results = [
+        FilerResult(filer="filer01", result=volumes[:2], error=None, duration=0.1),
+        FilerResult(filer="filer02", result=None, error=NidhoggException("failed"), duration=0.1),
+        FilerResult(filer="filer03", result=volumes[2:], error=None, duration=0.1),
+    ]
+    with mock.patch.object(fleet, "call", return_value=dict((r["filer"], r) for r in results)) as call:
+        heap = get_best_volume_across(fleet, filter_volume_names=["vol1", "vol2", "vol3"])
+    call.assert_called_once_with("get_volumes_with_quota_info", filter_volume_names=["vol1", "vol2", "vol3"])
+    assert len(heap) == 3
+    assert heap.best()["name"] == "vol2"
+
+
+def test_get_best_volume_across_by_size():
+    volumes = [
+        Volume(name="vol1", state="online", size_total=10.0, size_used=5.0, size_available=5.0, files_used=1.0,
+               files_total=10.0, snapable=True, filer="filer01"),
+    ]
+    with mock.patch("nidhogg.fleet.Fleet.call") as call, mock.patch("nidhogg.fleet.Fleet.close") as close:
+        call.return_value = {"filer01": FilerResult(filer="filer01", result=volumes, error=None, duration=0.1)}
+        heap = get_best_volume_across(["filer01"], "user", "password", by=BY_SIZE)
+    call.assert_called_once_with("get_volumes", filter_volume_names=[])
+    close.assert_called_once_with()
+    assert heap.best()["name"] == "vol1"
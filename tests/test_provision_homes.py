@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+import requests
+
+from nidhogg.core import NidhoggException
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr("nidhogg.core.sleep", slept.append)
+    return slept
+
+
+def fake_do(nidhogg, fail=(), status="on"):
+    # fail: tuples (api, value of any param) of the failing calls
+    def _do(api, **kwargs):
+        nidhogg.sent.append((api, kwargs))
+        if any(api == failed_api and value in kwargs.values() for failed_api, value in fail):
+            raise NidhoggException("{0} failed".format(api))
+        return {'netapp': {'results': {'@status': "passed", 'status': status}}}
+    return _do
+
+
+def home(volume, qtree, **kwargs):
+    return dict(volume=volume, qtree=qtree, **kwargs)
+
+
+def test_provision_homes(sevenmode, sleeps):
+    sevenmode._do = fake_do(sevenmode)
+    results = sevenmode.provision_homes([
+        home("vol1", "user1", quota_in_mb=10, share_name="user1$",
+             aces=[dict(user_or_group="user1", permission="Full Control")]),
+        home("vol1", "user2", quota_in_mb=20, share_name="user2$", share_options=dict(comment="home of user2")),
+        home("vol2", "user3", quota_in_mb=30),
+    ], max_workers=2)
+    assert [r["home"]["qtree"] for r in results] == ["user1", "user2", "user3"]
+    assert [r["error"] for r in results] == [None, None, None]
+    assert results[0]["steps"] == ["qtree", "quota", "share", "acl", "resize"]
+    assert results[2]["steps"] == ["qtree", "quota", "resize"]
+    apis = [api for api, _ in sevenmode.sent]
+    assert apis.count("qtree_create") == 3
+    assert apis.count("quota_set_entry") == 3
+    assert apis.count("cifs_share_add") == 2
+    assert apis.count("cifs_share_ace_set") == 1
+    # one resize per volume
+    assert sorted(kwargs["volume"] for api, kwargs in sevenmode.sent if api == "quota_resize") == ["vol1", "vol2"]
+    assert ("cifs_share_add", {
+        'path': "/vol/vol1/user2", 'share_name': "user2$", 'umask': "007", 'comment': "home of user2"
+    }) in sevenmode.sent
+
+
+def test_provision_homes_rollback(sevenmode, sleeps):
+    sevenmode._do = fake_do(sevenmode, fail=[("cifs_share_add", "user2$")])
+    results = sevenmode.provision_homes([
+        home("vol1", "user1", quota_in_mb=10, share_name="user1$"),
+        home("vol1", "user2", quota_in_mb=20, share_name="user2$"),
+    ])
+    assert results[0]["error"] is None
+    assert isinstance(results[1]["error"], NidhoggException)
+    assert results[1]["steps"] == ["qtree", "quota"]
+    assert results[1]["rollback_error"] is None
+    # only the successful home is resized, the failed one rolled back in reverse order
+    rollback = [(api, kwargs) for api, kwargs in sevenmode.sent if api in ("quota_delete_entry", "qtree_delete")]
+    assert [api for api, _ in rollback] == ["quota_delete_entry", "qtree_delete"]
+    assert rollback[1][1]["qtree"] == "/vol/vol1/user2"
+
+
+def test_provision_homes_rollback_before_resize(sevenmode, sleeps):
+    sevenmode._do = fake_do(sevenmode, fail=[("cifs_share_add", "user2$")])
+    sevenmode.provision_homes([
+        home("vol1", "user1", quota_in_mb=10),
+        home("vol1", "user2", quota_in_mb=20, share_name="user2$"),
+    ], max_workers=1)
+    apis = [api for api, _ in sevenmode.sent]
+    # the quota entry of the failed home is deleted before the resize would activate it
+    assert apis.index("quota_delete_entry") < apis.index("quota_resize")
+    assert apis.count("quota_resize") == 1
+
+
+def test_provision_homes_resize_failed(sevenmode, sleeps):
+    sevenmode._do = fake_do(sevenmode, status="off")
+    results = sevenmode.provision_homes([
+        home("vol1", "user1", quota_in_mb=10),
+        home("vol1", "user2"),
+    ])
+    assert "not enabled" in str(results[0]["error"])
+    assert results[0]["steps"] == ["qtree", "quota"]
+    # the second resize deactivating the deleted quota entry failed too
+    assert "not enabled" in str(results[0]["rollback_error"])
+    # no quota, nothing to resize
+    assert results[1]["error"] is None
+    assert results[1]["steps"] == ["qtree"]
+    apis = [api for api, _ in sevenmode.sent]
+    assert apis.count("qtree_delete") == 1
+    assert apis[apis.index("quota_delete_entry") + 1:].count("quota_resize") == 1
+
+
+def test_provision_homes_any_error(sevenmode, sleeps):
+    do = fake_do(sevenmode)
+
+    def _do(api, **kwargs):
+        if api == "cifs_share_add":
+            raise requests.exceptions.ConnectionError("connection aborted")
+        return do(api, **kwargs)
+
+    sevenmode._do = _do
+    results = sevenmode.provision_homes([
+        home("vol1", "user1", quota_in_mb=10, share_name="user1$"),
+        dict(volume="vol1"),
+        home("vol1", "user3", quota_in_mb=10),
+    ])
+    assert isinstance(results[0]["error"], requests.exceptions.ConnectionError)
+    assert results[0]["rollback_error"] is None
+    assert isinstance(results[1]["error"], KeyError)
+    assert results[1]["steps"] == []
+    assert results[2]["error"] is None
+    assert results[2]["steps"] == ["qtree", "quota", "resize"]
+
+
+def test_provision_homes_rollback_failed(sevenmode, sleeps):
+    sevenmode._do = fake_do(sevenmode, fail=[
+        ("quota_set_entry", "/vol/vol1/user1"), ("qtree_delete", "/vol/vol1/user1")
+    ])
+    results = sevenmode.provision_homes([home("vol1", "user1", quota_in_mb=10)])
+    assert results[0]["steps"] == ["qtree"]
+    assert "quota_set_entry" in str(results[0]["error"])
+    assert "qtree_delete" in str(results[0]["rollback_error"])
+    assert [api for api, _ in sevenmode.sent].count("quota_resize") == 0
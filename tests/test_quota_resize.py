@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+from nidhogg.core import NidhoggException, QuotaResize
+from nidhogg.sevenmode import SevenMode
+from nidhogg.clustermode import ClusterMode
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr("nidhogg.core.sleep", slept.append)
+    return slept
+
+
+def status_do(nidhogg, statuses):
+    statuses = list(statuses)
+
+    def _do(api, **kwargs):
+        nidhogg.sent.append((api, kwargs))
+        status = statuses.pop(0) if api == "quota_status" else "on"
+        return {'netapp': {'results': {'@status': "passed", 'status': status}}}
+    return _do
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {'@status': "passed", 'status': "on"}),
+    (SevenMode, {'@status': "passed", 'status': "on"})
+], indirect=True)
+def test_set_quota_returns_resize(mode, sleeps):
+    resize = mode.set_quota("volume", "qtree", wait_til_finished=False)
+    assert isinstance(resize, QuotaResize)
+    assert [api for api, _ in mode.sent] == ["quota_set_entry", "quota_resize"]
+    assert sleeps == []
+    assert resize.done()
+    assert mode.sent[-1] == ("quota_status", {"volume": "volume"})
+
+
+def test_wait_backoff(sevenmode, sleeps, monkeypatch):
+    monkeypatch.setattr("nidhogg.core.QUOTA_RESIZE_WAIT_TIME", 1)
+    sevenmode._do = status_do(sevenmode, ["resizing", "resizing", "resizing", "resizing", "on"])
+    resize = sevenmode.resize_quotas("volume", timeout=100)
+    resize.wait()
+    # starts sub-second, doubles, capped at QUOTA_RESIZE_WAIT_TIME
+    assert sleeps == [0.25, 0.5, 1, 1, 1]
+    assert resize.done()
+    assert [api for api, _ in sevenmode.sent].count("quota_status") == 5
+
+
+def test_wait_deadline(sevenmode, sleeps):
+    sevenmode._do = status_do(sevenmode, ["resizing", "resizing"])
+    resize = sevenmode.resize_quotas("volume", timeout=0)
+    with pytest.raises(NidhoggException) as e:
+        resize.wait()
+    assert "did not finish in time" in str(e.value)
+    assert sleeps == [0]
+
+
+def test_done_quotas_off(clustermode):
+    clustermode._do = status_do(clustermode, ["off"])
+    resize = clustermode.resize_quotas("volume")
+    with pytest.raises(NidhoggException) as e:
+        resize.done()
+    assert "not enabled" in str(e.value)
+
+
+def test_overlapping_resizes(clustermode, sleeps):
+    clustermode._do = status_do(clustermode, ["resizing", "on", "on"])
+    resizes = [clustermode.resize_quotas(volume) for volume in ["vol1", "vol2"]]
+    assert [resize.done() for resize in resizes] == [False, True]
+    for resize in resizes:
+        resize.wait()
+    assert sleeps == [0.25]
+    assert [kwargs for api, kwargs in clustermode.sent if api == "quota_resize"] == [
+        {"volume": "vol1"}, {"volume": "vol2"}]
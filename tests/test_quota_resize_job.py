@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+from nidhogg.clustermode import QuotaResizeJob
+from nidhogg.core import NidhoggException, QuotaResize
+
+
+@pytest.fixture(autouse=True)
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr("nidhogg.core.sleep", slept.append)
+    return slept
+
+
+def job_info(job_id, state, progress=None, completion=None):
+    return {"job-id": job_id, "job-state": state, "job-progress": progress, "job-completion": completion}
+
+
+def jobs_do(clustermode, pages):
+    """Reply the quota-resize with a job id per volume and job-get-iter with the given pages."""
+    pages = list(pages)
+
+    def _do(api, **kwargs):
+        clustermode.sent.append((api, kwargs))
+        if api == "quota_resize":
+            return {'netapp': {'results': {'@status': "passed", 'result-jobid': "job-" + kwargs["volume"],
+                                           'result-status': "in_progress"}}}
+        if api == "job_get_iter":
+            items = pages.pop(0)
+            return {'netapp': {'results': {'@status': "passed", 'num-records': str(len(items)),
+                                           'attributes-list': {'job-info': items}}}}
+        return {'netapp': {'results': {'@status': "passed", 'status': "on"}}}
+    return _do
+
+
+def test_resize_quotas_job(clustermode):
+    clustermode._do = jobs_do(clustermode, [
+        [job_info("job-vol1", "running", "50%")],
+        [job_info("job-vol1", "success", "100%")],
+    ])
+    resize = clustermode.resize_quotas("vol1")
+    assert isinstance(resize, QuotaResizeJob)
+    assert resize.job_id == "job-vol1"
+    assert not resize.done()
+    assert resize.progress == "50%"
+    resize.wait()
+    assert resize.progress == "100%"
+    api, kwargs = clustermode.sent[-1]
+    assert api == "job_get_iter"
+    assert kwargs["query"] == {"job_info": {"job_id": "job-vol1"}}
+    assert "quota_status" not in [api for api, _ in clustermode.sent]
+
+
+def test_resize_quotas_without_job(clustermode):
+    clustermode._do = lambda api, **kwargs: {'netapp': {'results': {'@status': "passed", 'status': "on"}}}
+    resize = clustermode.resize_quotas("vol1")
+    assert type(resize) is QuotaResize
+    assert resize.done()
+
+
+def test_job_failed(clustermode):
+    clustermode._do = jobs_do(clustermode, [
+        [job_info("job-vol1", "failure", completion="quota rules invalid")],
+    ])
+    with pytest.raises(NidhoggException) as e:
+        clustermode.set_quota("vol1", "qtree1")
+    assert "quota rules invalid" in str(e.value)
+
+
+def test_job_removed(clustermode):
+    clustermode._do = jobs_do(clustermode, [[]])
+    resize = clustermode.resize_quotas("vol1")
+    assert resize.done()
+    assert [api for api, _ in clustermode.sent] == ["quota_resize", "job_get_iter", "quota_status"]
+
+
+def test_wait_for_quota_resizes_batched(clustermode, sleeps):
+    clustermode._do = jobs_do(clustermode, [
+        [job_info("job-vol1", "running"), job_info("job-vol2", "success")],
+        [job_info("job-vol1", "success")],
+    ])
+    resizes = [clustermode.resize_quotas(volume) for volume in ["vol1", "vol2"]]
+    clustermode.wait_for_quota_resizes(resizes)
+    assert all(resize.finished for resize in resizes)
+    queries = [kwargs["query"] for api, kwargs in clustermode.sent if api == "job_get_iter"]
+    assert queries == [
+        {"job_info": {"job_id": "job-vol1|job-vol2"}},
+        {"job_info": {"job_id": "job-vol1"}},
+    ]
+    assert sleeps == [0.25, 0.5]
+
+
+def test_wait_for_quota_resizes_sevenmode(sevenmode, sleeps):
+    sevenmode.patched_return_value = {'netapp': {'results': {'@status': "passed", 'status': "on"}}}
+    resizes = [sevenmode.resize_quotas(volume) for volume in ["vol1", "vol2"]]
+    sevenmode.wait_for_quota_resizes(resizes)
+    assert [api for api, _ in sevenmode.sent] == ["quota_resize", "quota_resize", "quota_status", "quota_status"]
+    assert sleeps == [0.25]
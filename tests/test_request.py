@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+
+import pytest
+
+from nidhogg.request import RequestEncoder, escape, tag
+
+
+@pytest.fixture
+def encoder():
+    return RequestEncoder("<netapp>")
+
+
+def test_tag():
+    assert tag("volume_get_iter") == "volume-get-iter"
+    assert tag("max-records") == "max-records"
+
+
+@pytest.mark.parametrize("value, text", [
+    (None, ""),
+    (True, "true"),
+    (False, "false"),
+    (100, "100"),
+    ("vol1", "vol1"),
+    ("a<b & 'c' \"d\">", "a&lt;b &amp; &apos;c&apos; &quot;d&quot;&gt;"),
+    ("\xe4", "\xe4"),
+])
+def test_escape(value, text):
+    assert escape(value) == text
+
+
+def test_encode(encoder):
+    params = collections.OrderedDict([
+        ("max_records", 10),
+        ("query", dict(volume_attributes=dict(volume_id_attributes=dict(name="vol1")))),
+        ("desired_attributes", dict(volume_attributes=dict.fromkeys(["name"]))),
+    ])
+    assert encoder.encode("volume_get_iter", params) == (
+        b"<netapp><volume-get-iter>"
+        b"<max-records>10</max-records>"
+        b"<query><volume-attributes><volume-id-attributes><name>vol1</name></volume-id-attributes>"
+        b"</volume-attributes></query>"
+        b"<desired-attributes><volume-attributes><name></name></volume-attributes></desired-attributes>"
+        b"</volume-get-iter></netapp>"
+    )
+
+
+def test_encode_list(encoder):
+    assert encoder.encode("foo", {"bar": ["a", {"b_c": 1}]}) == (
+        b"<netapp><foo><bar><item>a</item><item><b-c>1</b-c></item></bar></foo></netapp>"
+    )
+
+
+def test_encode_utf8(encoder):
+    assert encoder.encode("foo", {"bar": "\xe4"}) == "<netapp><foo><bar>\xe4</bar></foo></netapp>".encode("utf-8")
+
+
+def test_template(encoder):
+    assert encoder.template("quota_status") == ("<netapp><quota-status>", "</quota-status></netapp>")
+    assert encoder.template("quota_status") is encoder.template("quota_status")
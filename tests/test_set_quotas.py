@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+from nidhogg.core import NidhoggException
+from nidhogg.sevenmode import SevenMode
+from nidhogg.clustermode import ClusterMode
+
+
+@pytest.fixture(autouse=True)
+def no_timeout(monkeypatch):
+    monkeypatch.setattr("nidhogg.core.QUOTA_RESIZE_WAIT_TIME", 0)
+    monkeypatch.setattr("nidhogg.core.QUOTA_RESIZE_WAIT_CYCLES", 1)
+
+
+def failing_do(nidhogg, failing_qtree):
+    def _do(api, **kwargs):
+        nidhogg.sent.append((api, kwargs))
+        if api == "quota_set_entry" and kwargs["quota_target"].endswith(failing_qtree):
+            raise NidhoggException("error error error")
+        return {'netapp': {'results': {'@status': "passed", 'status': "on"}}}
+    return _do
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {'@status': "passed", 'status': "on"}),
+    (SevenMode, {'@status': "passed", 'status': "on"})
+], indirect=True)
+def test_set_quotas(mode):
+    results = mode.set_quotas("volume", {"qtree1": 1000, "qtree2": 2000})
+    assert results == {"qtree1": None, "qtree2": None}
+    assert [api for api, _ in mode.sent] == ["quota_set_entry", "quota_set_entry", "quota_resize", "quota_status"]
+    assert sorted(kwargs["disk_limit"] for api, kwargs in mode.sent[:2]) == [1024000, 2048000]
+    assert mode.sent[2] == ("quota_resize", {"volume": "volume"})
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {'@status': "passed", 'status': "on"}),
+    (SevenMode, {'@status': "passed", 'status': "on"})
+], indirect=True)
+def test_set_quotas_partly_failed(mode, monkeypatch):
+    monkeypatch.setattr(mode, "_do", failing_do(mode, "qtree2"))
+    results = mode.set_quotas("volume", {"qtree1": 1000, "qtree2": 2000})
+    assert results["qtree1"] is None
+    assert isinstance(results["qtree2"], NidhoggException)
+    assert [api for api, _ in mode.sent].count("quota_resize") == 1
+
+
+def test_set_quotas_all_failed(sevenmode, monkeypatch):
+    monkeypatch.setattr(sevenmode, "_do", failing_do(sevenmode, "qtree1"))
+    results = sevenmode.set_quotas("volume", {"qtree1": 1000})
+    assert isinstance(results["qtree1"], NidhoggException)
+    assert [api for api, _ in sevenmode.sent] == ["quota_set_entry"]
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {'@status': "passed", 'status': "resizing"}),
+    (SevenMode, {'@status': "passed", 'status': "resizing"})
+], indirect=True)
+def test_set_quotas_time_out(mode):
+    with pytest.raises(NidhoggException):
+        mode.set_quotas("volume", {"qtree1": 1000, "qtree2": 2000})
+
+
+@pytest.mark.parametrize('mode', [
+    (ClusterMode, {'@status': "passed", 'status': "resizing"}),
+    (SevenMode, {'@status': "passed", 'status': "resizing"})
+], indirect=True)
+def test_set_quotas_time_out_ignored(mode):
+    mode.set_quotas("volume", {"qtree1": 1000}, wait_til_finished=False)
+    assert [api for api, _ in mode.sent] == ["quota_set_entry", "quota_resize"]
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+from nidhogg.compatible import ACE
+from nidhogg.core import NidhoggException
+
+
+def current_aces(*aces):
+    # tuples (user_or_group, permission, is_group[, user_group_type])
+    def iter_cifs_acls(*args, **kwargs):
+        for ace in aces:
+            user_or_group, permission, is_group = ace[:3]
+            yield ACE(share_name="share1", user_or_group=user_or_group, permission=permission, is_group=is_group,
+                      user_group_type=ace[3] if len(ace) > 3 else None)
+    return iter_cifs_acls
+
+
+def test_sync_cifs_acls_unchanged_clustermode(clustermode, monkeypatch):
+    monkeypatch.setattr(clustermode, "iter_cifs_acls", current_aces(("user1", "read", None)))
+    changes = clustermode.sync_cifs_acls("share1", [dict(user_or_group="user1", permission="read")])
+    assert changes == dict(created=[], modified=[], deleted=[], failed=[])
+    assert clustermode.sent == []
+
+
+def test_sync_cifs_acls_clustermode(clustermode, monkeypatch):
+    monkeypatch.setattr(clustermode, "iter_cifs_acls", current_aces(
+        ("user1", "read", None), ("user2", "read", None), ("user3", "read", None)
+    ))
+    changes = clustermode.sync_cifs_acls("share1", [
+        dict(user_or_group="user1", permission="read"),
+        dict(user_or_group="user2", permission="full_control"),
+        dict(user_or_group="group4", permission="change", is_group=True),
+    ], max_workers=1)
+    assert [ace["user_or_group"] for ace in changes["created"]] == ["group4"]
+    assert [ace["user_or_group"] for ace in changes["modified"]] == ["user2"]
+    assert [ace["user_or_group"] for ace in changes["deleted"]] == ["user3"]
+    assert clustermode.sent == [
+        ('cifs_share_access_control_create', {
+            'permission': "change", 'share': "share1", 'user_or_group': "group4", 'user_group_type': "unix_group"
+        }),
+        ('cifs_share_access_control_modify', {
+            'permission': "full_control", 'share': "share1", 'user_or_group': "user2", 'user_group_type': "windows"
+        }),
+        ('cifs_share_access_control_delete', {'share': "share1", 'user_or_group': "user3"}),
+    ]
+
+
+def test_sync_cifs_acls_user_group_type_clustermode(clustermode, monkeypatch):
+    monkeypatch.setattr(clustermode, "iter_cifs_acls", current_aces(
+        ("user1", "read", None, "unix_user"), ("group2", "read", None, "unix_group")
+    ))
+    # i.e. the ACEs of another share, read from the filer
+    source = list(current_aces(("user1", "read", None, "windows"), ("group2", "change", None, "unix_group"))())
+    changes = clustermode.sync_cifs_acls("share1", source, max_workers=1)
+    assert [ace["user_group_type"] for ace in changes["created"]] == ["windows"]
+    assert [ace["user_or_group"] for ace in changes["modified"]] == ["group2"]
+    assert [ace["user_group_type"] for ace in changes["deleted"]] == ["unix_user"]
+    assert clustermode.sent == [
+        ('cifs_share_access_control_create', {
+            'permission': "read", 'share': "share1", 'user_or_group': "user1", 'user_group_type': "windows"
+        }),
+        ('cifs_share_access_control_modify', {
+            'permission': "change", 'share': "share1", 'user_or_group': "group2", 'user_group_type': "unix_group"
+        }),
+        ('cifs_share_access_control_delete', {
+            'share': "share1", 'user_or_group': "user1", 'user_group_type': "unix_user"
+        }),
+    ]
+
+
+def test_sync_cifs_acls_sevenmode(sevenmode, monkeypatch):
+    monkeypatch.setattr(sevenmode, "iter_cifs_acls", current_aces(("user1", "Read", False), ("user1", "Read", True)))
+    changes = sevenmode.sync_cifs_acls("share1", [dict(user_or_group="user1", permission="Change")])
+    assert [ace["user_or_group"] for ace in changes["modified"]] == ["user1"]
+    assert [ace["is_group"] for ace in changes["deleted"]] == [True]
+    assert sorted(sevenmode.sent) == sorted([
+        ('cifs_share_ace_set', {'access_rights': "Change", 'share_name': "share1", 'user_name': "user1"}),
+        ('cifs_share_ace_delete', {
+            'share_name': "share1", 'unix_group_name': "user1", 'is_unixgroup': "true"
+        }),
+    ])
+
+
+def test_sync_cifs_acls_failed_change(clustermode, monkeypatch):
+    monkeypatch.setattr(clustermode, "iter_cifs_acls", current_aces(("user1", "read", None), ("user3", "read", None)))
+
+    def _do(api, **kwargs):
+        clustermode.sent.append((api, kwargs))
+        if api == "cifs_share_access_control_create":
+            raise NidhoggException("create failed")
+        return {'netapp': {'results': {'@status': "passed"}}}
+
+    clustermode._do = _do
+    changes = clustermode.sync_cifs_acls("share1", [
+        dict(user_or_group="user1", permission="change"),
+        dict(user_or_group="user2", permission="read"),
+    ])
+    # the other changes are applied, the failed one is reported
+    assert [ace["user_or_group"] for ace in changes["modified"]] == ["user1"]
+    assert [ace["user_or_group"] for ace in changes["deleted"]] == ["user3"]
+    assert changes["created"] == []
+    (change, ace, error), = changes["failed"]
+    assert change == "created"
+    assert ace["user_or_group"] == "user2"
+    assert "create failed" in str(error)
+    assert len(clustermode.sent) == 3
+
+
+def test_sync_cifs_acls_invalid_permission(allmodes, monkeypatch):
+    monkeypatch.setattr(allmodes, "iter_cifs_acls", current_aces(("user1", "read", None)))
+    with pytest.raises(NidhoggException):
+        allmodes.sync_cifs_acls("share1", [dict(user_or_group="user2", permission="nope")])
+    assert allmodes.sent == []
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from nidhogg.utils import as_list
+
+
+def test_as_list_list():
+    assert as_list([{'a': 1}, {'a': 2}]) == [{'a': 1}, {'a': 2}]
+
+
+def test_as_list_dict():
+    assert as_list({'a': 1}) == [{'a': 1}]
+
+
+def test_as_list_empty():
+    assert as_list(None) == []
+    assert as_list({}) == []
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
-from nidhogg.core import underline_to_dash
+from nidhogg.utils import underline_to_dash
 
 
 def test_underline_to_dash_empty_dict():
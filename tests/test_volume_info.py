@@ -4,17 +4,19 @@ from __future__ import unicode_literals
 import pytest
 
 from nidhogg.sevenmode import SevenMode
-from nidhogg.clustermode import ClusterMode
+from nidhogg.clustermode import ClusterMode, DESIRED_ATTRIBUTES
 
 
-def test_volume_info_sevenmode_api(sevenmode):
+def test_volume_info_sevenmode_api(sevenmode, std_netapp_records):
+    sevenmode.patched_return_value = std_netapp_records
     sevenmode.volume_info("name1")
     assert sevenmode.sent == [('volume_list_info', {"volume": "name1"})]
 
 
-def test_volume_info_clustermode_api(clustermode):
+def test_volume_info_clustermode_api(clustermode, std_netapp_records):
+    clustermode.patched_return_value = std_netapp_records
     clustermode.volume_info("name1")
-    assert clustermode.sent == [('volume_get_iter', {'query': {'volume_id_attributes': {'name': 'name1'}}})]
+    assert clustermode.sent == [('volume_get_iter', {'desired_attributes': DESIRED_ATTRIBUTES['volume_get_iter'], 'query': {'volume_id_attributes': {'name': 'name1'}}})]
 
 
 @pytest.mark.parametrize('mode', [
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import logging
+
+import pytest
+from mock import MagicMock
+
+from nidhogg.core import log_wire, wire_logger
+from nidhogg.sevenmode import SevenMode
+
+
+@pytest.fixture
+def nidhogg(std_netapp_reply):
+    mock_http = MagicMock()
+    nidhogg = SevenMode("url", "user", "password", 1, 1, False, mock_http)
+    nidhogg.http.invoke_request.return_value = "<netapp><results status='passed'/></netapp>"
+    nidhogg.http.parse_xml_reply.return_value = std_netapp_reply
+    return nidhogg
+
+
+def wire_messages(caplog):
+    return [record.getMessage() for record in caplog.records if record.name == "nidhogg.wire"]
+
+
+def test_wire_log_disabled(nidhogg, caplog, monkeypatch):
+    body = MagicMock()
+    monkeypatch.setattr("nidhogg.core._Body", body)
+    caplog.set_level(logging.INFO, logger="nidhogg.wire")
+    nidhogg._do("foobar_api", a=1)
+    assert wire_messages(caplog) == []
+    # the body is not even wrapped
+    assert not body.called
+
+
+def test_wire_log(nidhogg, caplog):
+    caplog.set_level(logging.DEBUG, logger="nidhogg.wire")
+    nidhogg._do("foobar_api", a=1)
+    request, response = wire_messages(caplog)
+    assert request.startswith("request: <?xml")
+    assert request.endswith("<foobar-api><a>1</a></foobar-api></netapp>")
+    assert response == "response: <netapp><results status='passed'/></netapp>"
+
+
+def test_wire_log_truncated(caplog, monkeypatch):
+    monkeypatch.setattr("nidhogg.core.WIRE_LOG_LIMIT", 4)
+    caplog.set_level(logging.DEBUG, logger="nidhogg.wire")
+    log_wire("response", b"0123456789")
+    log_wire("response", "0123")
+    assert wire_messages(caplog) == ["response: 0123... (10 bytes)", "response: 0123"]
+
+
+def test_wire_log_sampled(caplog, monkeypatch):
+    monkeypatch.setattr("nidhogg.core.WIRE_LOG_SAMPLE_RATE", 3)
+    monkeypatch.setattr("nidhogg.core._wire_log_counter", iter(range(6)))
+    caplog.set_level(logging.DEBUG, logger="nidhogg.wire")
+    for i in range(6):
+        log_wire("request", str(i))
+    assert wire_messages(caplog) == ["request: 0", "request: 3"]
+
+
+def test_wire_log_sampled_per_call(nidhogg, caplog, monkeypatch):
+    monkeypatch.setattr("nidhogg.core.WIRE_LOG_SAMPLE_RATE", 2)
+    monkeypatch.setattr("nidhogg.core._wire_log_counter", iter(range(4)))
+    caplog.set_level(logging.DEBUG, logger="nidhogg.wire")
+    for i in range(4):
+        nidhogg._do("foobar_api", a=i)
+    messages = wire_messages(caplog)
+    # request and response of every second call
+    assert [message.split(":")[0] for message in messages] == ["request", "response"] * 2
+    assert "<a>0</a>" in messages[0]
+    assert "<a>2</a>" in messages[2]
+
+
+def test_wire_log_streamed_reply(nidhogg, caplog, monkeypatch):
+    def iter_xml_reply(response, element, results, stats=None, keep_body=False):
+        results.update({"@status": "passed"})
+        yield {"a": "1"}
+        if keep_body:
+            stats["body"] = b"<netapp>...</netapp>"
+
+    nidhogg.http.iter_xml_reply.side_effect = iter_xml_reply
+    monkeypatch.setattr("nidhogg.core.WIRE_LOG_SAMPLE_RATE", 2)
+    monkeypatch.setattr("nidhogg.core._wire_log_counter", iter(range(2)))
+    caplog.set_level(logging.DEBUG, logger="nidhogg.wire")
+    for i in range(2):
+        list(nidhogg._do_iter("foobar_api", "foobar-info", {}, a=i))
+    request, response = wire_messages(caplog)
+    assert "<a>0</a>" in request
+    assert response == "response: <netapp>...</netapp>"
+
+
+def test_wire_log_not_in_core_logger(nidhogg, caplog):
+    caplog.set_level(logging.DEBUG, logger="nidhogg.core")
+    caplog.set_level(logging.INFO, logger="nidhogg.wire")
+    nidhogg._do("foobar_api", a=1)
+    assert not [record for record in caplog.records if "foobar-api" in record.getMessage()]
+    assert wire_logger.name == "nidhogg.wire"